@@ -2,6 +2,7 @@ import os
 from typing import Optional
 from google.genai import types
 from core.gemini import get_gemini_client
+from services.agent_config import read_prompt_file
 from models.agronome import FichePlant
 
 class AgronomeAgent:
@@ -9,9 +10,9 @@ class AgronomeAgent:
         self.client = get_gemini_client()
         self.model = "gemini-3-pro-preview"
         self.system_prompt_path = "../docs/agents/agronome/system_prompt.txt"
-        self._load_system_prompt()
 
-    def _load_system_prompt(self):
+    def _load_system_prompt(self) -> str:
+        # Resolved per request (TTL-cached file read): the agent instance is long-lived
         try:
             # Try to load from file relative to backend root or absolute
             # Assuming backend is CWD or we start from there
@@ -25,17 +26,17 @@ class AgronomeAgent:
             # Let's try absolute path based on known structure if relative fails
             real_path = "/Volumes/Donnees/devs/bastouille.core/docs/agents/agronome/system_prompt.txt"
             
-            if os.path.exists(real_path):
-                with open(real_path, "r") as f:
-                    self.system_prompt = f.read()
+            prompt = read_prompt_file(real_path)
+            if prompt is not None:
+                return prompt
             else:
                  # Fallback if file not found (hardcoded safety)
-                 self.system_prompt = "Tu es un expert agronome. Remplis la fiche plante JSON demandée."
                  print(f"Warning: System prompt file not found at {real_path}")
+                 return "Tu es un expert agronome. Remplis la fiche plante JSON demandée."
                  
         except Exception as e:
             print(f"Error loading system prompt: {e}")
-            self.system_prompt = "Tu es un expert agronome."
+            return "Tu es un expert agronome."
 
     async def analyze(self, user_input: str, conversation_id: Optional[str] = None) -> FichePlant:
         """
@@ -45,7 +46,7 @@ class AgronomeAgent:
             contents=user_input,
             config=types.GenerateContentConfig(
                 temperature=0.1, # Low temp for factual data
-                system_instruction=self.system_prompt,
+                system_instruction=self._load_system_prompt(),
                 response_mime_type="application/json",
                 response_schema=FichePlant
             ),
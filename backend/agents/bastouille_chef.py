@@ -1,9 +1,14 @@
 import logging
 import json
 import asyncio
+from contextlib import aclosing
 from typing import List, Dict, Any, Optional
 from google.genai import types
 
+from core.config import settings
+from core.context_budget import ContextBudget, estimate_tokens
+from core.conversations import History, complete_exchange, get_conversation_store, to_contents
+from core.database import run_db
 from core.gemini import get_gemini_client
 from functions import (
     liste_varietes,
@@ -17,6 +22,8 @@ from functions import (
 logger = logging.getLogger(__name__)
 
 class BastouilleChef:
+    conversation_key = "Baštouille.Chef" # Conversation store key
+
     def __init__(self):
         self.client = get_gemini_client()
         
@@ -57,38 +64,73 @@ Tu gères le jardin via des outils précis.
 7. Sois concis.
 8. OPTIMISATION : Si tu dois récupérer des infos pour plusieurs sujets (ex: historique de 5 plantes), lance TOUS les appels d'outils EN MÊME TEMPS (parallèle) dans la même réponse. N'attends pas le résultat de l'un pour lancer l'autre.
 """
+        # Always sent in full: reserved from the context budget
+        self.pinned_tokens = estimate_tokens(self.system_prompt + json.dumps(
+            [d.model_dump(exclude_none=True) for d in self.tool_declarations[0].function_declarations],
+            ensure_ascii=False, default=str
+        ))
 
-    async def chat_stream(self, user_message: str, history: List[Dict[str, str]] = [], conversation_id: str = None):
+    async def _run_tool(self, index: int, fn_name: str, fn_args: Dict[str, Any], semaphore: asyncio.Semaphore):
+        """
+        Executes one tool call. Sync tools are DB-bound and run on the DB pool.
+        Returns (index, result) so results can be re-ordered after concurrent execution.
+        """
+        if fn_name not in self.available_tools_logic:
+            return index, {"error": f"Function {fn_name} not found."}
+
+        tool = self.available_tools_logic[fn_name]
+        async with semaphore:
+            try:
+                if asyncio.iscoroutinefunction(tool):
+                    result_data = await tool(**fn_args)
+                else:
+                    result_data = await run_db(tool, **fn_args)
+            except Exception as e:
+                result_data = {"error": str(e)}
+        return index, result_data
+
+    async def chat_stream(self, user_message: str, history: Optional[List[Dict[str, str]]] = None, conversation_id: str = None):
         """
         Chat loop supporting Native Function Calling via Gemini.
         Yields JSON (SSE) for frontend.
         Args:
             user_message: The new message
-            history: List of dicts [{"role": "user", "content": "..."}]
-            conversation_id: The session ID for logging
+            history: List of dicts [{"role": "user", "content": "..."}] (legacy clients).
+                Omitted: the conversation's stored history is used (core.conversations).
+            conversation_id: The session ID (logging, conversation store)
         """
-        # 0. Build Contents with History
-        # We need to convert Frontend [{role, content}] to Gemini [types.Content]
-        contents = []
-        for msg in history:
-            role = "user" if msg.get("role") == "user" else "model"
-            contents.append(types.Content(role=role, parts=[types.Part(text=msg.get("content", ""))]))
-
-        # Add current message
-        contents.append(types.Content(role="user", parts=[types.Part(text=user_message)]))
+        # 0. Current exchange: the new message, then model turns and tool results.
+        # History (stored contents or client messages) is added per turn within the context budget
+        # (older turns summarized, earlier tool results compacted).
+        store = get_conversation_store()
+        if history is None:
+            history = await store.load(self.conversation_key, conversation_id) or []
+        exchange = [types.Content(role="user", parts=[types.Part(text=user_message)])]
+        budget = ContextBudget("Baštouille.Chef")
         
         # Initialize loop variables
-        current_history = list(contents) 
         MAX_TURNS = 30 # Increased from 5 to avoid blocking on lists
-        turn_count = 0
-        
+        try:
+            async with aclosing(self._turns(history, exchange, budget, MAX_TURNS, conversation_id)) as turns:
+                async for event in turns:
+                    yield event
+        finally:
+            # Every exit (answer, empty response, MAX_TURNS, client disconnect) keeps the exchange
+            await store.save(self.conversation_key, conversation_id, to_contents(history) + complete_exchange(exchange))
+
+    async def _turns(self, history: History, exchange: List[types.Content], budget: ContextBudget, max_turns: int, conversation_id: str):
+        """
+        Model / tool turns of one exchange (appended to `exchange`), as SSE lines.
+        """
         # We enter the loop immediately. The loop logic will handle the "First Call" as iteration 1.
-        while turn_count < MAX_TURNS:
+        turn_count = 0
+        while turn_count < max_turns:
             turn_count += 1
             
-            # Generate Content (This handles both initial answer and subsequent tool outputs)
-            response = await self.client.generate_content(
-                contents=current_history,
+            # Stream Content (This handles both initial answer and subsequent tool outputs)
+            # Text deltas are forwarded as soon as they arrive (time-to-first-token)
+            async with aclosing(self.client.generate_content_stream(
+                contents=budget.compact_contents(history, exchange, self.pinned_tokens),
                 config=types.GenerateContentConfig(
                     tools=self.tool_declarations,
                     temperature=0.2,
@@ -98,77 +140,75 @@ Tu gères le jardin via des outils précis.
                 # Trace ID includes turn count
                 trace_id=f"turn-{int(asyncio.get_event_loop().time())}-{turn_count}",
                 conversation_id=conversation_id
-            )
-            
-            if not response.candidates:
+            )) as stream:
+                # Non-thought text before a function call is a preamble ("Je vérifie..."): it is
+                # held back until the turn shows a call (-> thought) or outgrows a preamble (-> message)
+                held, held_chars, answering = [], 0, False
+                async for part in stream:
+                    if part.function_call:
+                        if held:
+                            yield json.dumps({"type": "thought_token", "content": "".join(held)}) + "\n"
+                            held, held_chars = [], 0
+                    elif part.thought or answering:
+                        event_type = "thought_token" if part.thought else "message_token"
+                        yield json.dumps({"type": event_type, "content": part.text}) + "\n"
+                    else:
+                        held.append(part.text)
+                        held_chars += len(part.text)
+                        if held_chars > settings.CHEF_PREAMBLE_HOLD_CHARS:
+                            answering = True
+                            yield json.dumps({"type": "message_token", "content": "".join(held)}) + "\n"
+                            held, held_chars = [], 0
+                if held:
+                    yield json.dumps({"type": "message_token", "content": "".join(held)}) + "\n"
+
+            if not stream.parts:
                  yield json.dumps({"type": "message_token", "content": "⚠️ Erreur: Réponse vide du modèle."}) + "\n"
                  return
 
-            # Note: A single candidate can have multiple parts (e.g. Text then FunctionCall)
-            parts = response.candidates[0].content.parts
-            
-            # Add this turn's response to history (all parts)
-            current_history.append(types.Content(role="model", parts=parts))
+            # Add this turn's response to history (assembled parts, incl. thought signatures)
+            exchange.append(types.Content(role="model", parts=stream.parts))
             
-            has_tool_use = False
-            
-            for part in parts:
-                # 1. Text Response (Thought or Final Answer)
-                if part.text:
-                    # If this text part uses tool, it might be reasoning
-                    # For now, we simply yield it as message/thought based on context?
-                    # Simplify: Logic used to be "if function_call follows, it is thought".
-                    
-                    is_thought = False
-                    if any(p.function_call for p in parts) and part != parts[-1]:
-                         is_thought = True
-                    
-                    if is_thought:
-                         yield json.dumps({"type": "thought_token", "content": part.text}) + "\n"
-                    else:
-                         yield json.dumps({"type": "message_token", "content": part.text}) + "\n"
+            function_calls = stream.function_calls
 
-                # 2. Function Call
-                if part.function_call:
-                    has_tool_use = True
-                    fn_call = part.function_call
-                    fn_name = fn_call.name
-                    fn_args = fn_call.args
-                    
-                    # Notify UI: Tool Start
-                    yield json.dumps({"type": "step_start", "tool": fn_name, "args": fn_args}) + "\n"
-                    
-                    # Execute Python Function
-                    result_data = {}
-                    if fn_name in self.available_tools_logic:
-                        try:
-                            result_data = self.available_tools_logic[fn_name](**fn_args)
-                        except Exception as e:
-                            result_data = {"error": str(e)}
-                    else:
-                        result_data = {"error": f"Function {fn_name} not found."}
-                    
-                    # Notify UI: Tool End
-                    yield json.dumps({"type": "step_end", "tool": fn_name, "result": json.dumps(result_data, default=str)}) + "\n"
-                    
-                    # Create Response Part for History
-                    fn_response_part = types.Part(
-                        function_response=types.FunctionResponse(
-                            name=fn_name,
-                            response={"result": result_data}
-                        )
-                    )
-                    
-                    # Add Result to History (User role for function response in Gemini API)
-                    current_history.append(types.Content(role="user", parts=[fn_response_part]))
-            
             # Logic flow control
-            if has_tool_use:
-                # Continue loop to get next step/final answer
-                continue
-            else:
-                # No tool used, just text (already yielded above), so we are done
+            if not function_calls:
+                # No tool used, just text (already streamed above), so we are done
                 return
+
+            # 2. Function Calls: independent calls of the same turn run concurrently
+            # Notify UI: Tool Start
+            for fn_call in function_calls:
+                yield json.dumps({"type": "step_start", "tool": fn_call.name, "args": fn_call.args}) + "\n"
+
+            semaphore = asyncio.Semaphore(settings.CHEF_TOOL_CONCURRENCY)
+            tasks = [
+                asyncio.ensure_future(self._run_tool(i, fn_call.name, dict(fn_call.args or {}), semaphore))
+                for i, fn_call in enumerate(function_calls)
+            ]
+            results = [None] * len(tasks)
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    index, result_data = await next_done
+                    results[index] = result_data
+                    # Notify UI: Tool End (as soon as each call finishes)
+                    yield json.dumps({"type": "step_end", "tool": function_calls[index].name, "result": json.dumps(result_data, default=str)}) + "\n"
+            finally:
+                # Client disconnected mid-turn: don't leave orphan tasks
+                for task in tasks:
+                    task.cancel()
+
+            # Add Results to History in call order (User role for function response in Gemini API)
+            exchange.append(types.Content(role="user", parts=[
+                types.Part(
+                    function_response=types.FunctionResponse(
+                        name=fn_call.name,
+                        response={"result": result_data}
+                    )
+                )
+                for fn_call, result_data in zip(function_calls, results)
+            ]))
+            # Continue loop to get next step/final answer
         
         # If we reach here, MAX_TURNS was exceeded
         yield json.dumps({"type": "message_token", "content": "\n\n⚠️ **Alerte sécurité** : J'ai atteint ma limite de réflexion (30 étapes). J'arrête ici pour ne pas tourner en rond."}) + "\n"
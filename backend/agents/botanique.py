@@ -6,6 +6,7 @@ from schemas.agent import AgentResponse, TokenUsage
 from services.llm import GeminiProvider
 from services.agent_config import AgentConfigService
 from services.traceability import TraceabilityService
+from core.database import run_db
 import time
 
 logger = logging.getLogger(__name__)
@@ -27,7 +28,7 @@ class BotaniqueAgent:
         Returns (system_prompt, user_prompt)
         """
         # 1. Get System Prompt
-        system_prompt = self.config_service.get_system_prompt(self.agent_key)
+        system_prompt = await run_db(self.config_service.get_system_prompt, self.agent_key)
         if not system_prompt:
             logger.warning("Using fallback system prompt (DB fetch failed or empty).")
             # Fallback en dur au cas où la DB est inaccessible
@@ -37,7 +38,7 @@ class BotaniqueAgent:
             """
 
         # 2. Get Few-Shot Examples
-        examples = self.config_service.get_few_shot_examples(self.agent_key)
+        examples = await run_db(self.config_service.get_few_shot_examples, self.agent_key)
         
         # 3. Build User Prompt with Examples
         example_text = ""
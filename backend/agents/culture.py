@@ -1,23 +1,71 @@
+import asyncio
 import json
 import logging
 import time
-import re
+from contextlib import aclosing
 from typing import List, Dict, Any, Optional
+from google.genai import types
 from core.config import settings
-from services.llm import get_llm_provider
+from core.context_budget import ContextBudget, clip_lines, clip_text, estimate_tokens
+from core.conversations import History, complete_exchange, get_conversation_store, to_contents, to_messages
+from core.database import run_db
+from services.llm import get_llm_provider, TextDelta, ToolCall, ToolSession
 from services.persistence import get_supabase_client, BotaniquePersistenceService
 from agents.tools.culture import CultureTools
 from agents.tools.culture_search import CultureSearchTool
+from agents.tools.declarations import tool_declarations
+from agents.stream_parser import StreamParser
 from services.traceability import TraceabilityService
+from services.agent_config import AgentConfigService
 
 logger = logging.getLogger(__name__)
 
+# Native function-calling declarations, generated from the tool signatures and docstrings
+TOOL_DECLARATIONS = tool_declarations({
+    "create_subject": CultureTools.create_subject,
+    "log_event": CultureTools.log_event,
+    "list_my_subjects": CultureTools.list_my_subjects,
+    "list_garden_events": CultureTools.list_garden_events,
+    "search_garden": CultureSearchTool.search_garden
+})
+
+# Text protocol (providers without native tool support)
+TEXT_PROTOCOL = """NOTE IMPORTANTE :
+- Si tu as besoin de vérifier l'existence d'une plante ou d'un sujet, utilise l'outil `search_garden`.
+- Si tu as besoin de connaître l'historique ou les actions passées, utilise `list_garden_events`.
+- Si tu décides d'effectuer une action, génère le bloc JSON ci-dessous.
+- Sinon, réponds simplement en texte naturel.
+
+STYLE DE RÉPONSE :
+- Avant chaque action, explique ta réflexion en commençant par "PENSÉE :".
+- SÉPARATEUR OBLIGATOIRE : Si tu écris une réponse, écris 'RÉPONSE :' avant le texte final.
+- Ne mentionne JAMAIS "j'utilise l'outil" ou le JSON dans la réponse finale.
+- Parle comme un humain expert ("C'est noté", "Action effectuée").
+
+```json
+PENSÉE : Je vérifie si...
+{
+  "tool": "nom_de_l_outil",
+  "args": { ... }
+}
+```
+"""
+
+FINAL_ANSWER_INSTRUCTIONS = (
+    "SYSTEM: L'action est terminée. Formule maintenant ta réponse FINALE à l'utilisateur.\n"
+    "IMPORTANT : N'écris PAS de pensée. Écris DIRECTEMENT ta réponse.\n"
+    "CONSIGNE STRICTE : Ne mentionne PAS le nom des outils techniques ou des JSON. Parle naturellement."
+)
+
 class CultureAgent:
+    conversation_key = "Culture" # Conversation store key
+
     def __init__(self):
         self.llm = get_llm_provider()
         self.supabase = get_supabase_client()
         self.persistence = BotaniquePersistenceService() # Used for context injection
         self.traceability = TraceabilityService()
+        self.config_service = AgentConfigService(self.supabase)
         
         # Tools
         self.action_tools = CultureTools()
@@ -32,29 +80,39 @@ class CultureAgent:
             "search_garden": self.search_tool.search_garden
         }
 
-    def _build_prompt(self) -> str:
-        # Fetch from DB to allow dynamic updates
-        res = self.supabase.table("agent_configurations").select("system_prompt").eq("agent_key", "culture_v1").execute()
-        if res.data:
-            return res.data[0]["system_prompt"]
+    def _build_prompt(self, native: bool = False) -> str:
+        # Fetch from DB to allow dynamic updates (TTL-cached by AgentConfigService).
+        # Native function calling has its own prompt, without the JSON tool-call format
+        # (migration not applied yet: culture_v1, stray JSON blocks are caught by the parser)
+        prompt = native and self.config_service.get_system_prompt("culture_native_v1")
+        if not prompt:
+            prompt = self.config_service.get_system_prompt("culture_v1")
+        if prompt:
+            return prompt
         return "Tu es le Chef de Culture." # Fallback
 
 
-    async def chat_stream(self, user_query: str, history: List[Dict[str, str]] = []):
+    async def chat_stream(self, user_query: str, history: Optional[List[Dict[str, str]]] = None, conversation_id: Optional[str] = None):
         """
         Async Generator that streams the agent's thought process and final response.
         Yields JSON strings (SSE format).
+        Without an explicit history, the conversation's stored history is used (core.conversations).
         """
         start_time = time.time()
+        store = get_conversation_store()
+        if history is None:
+            history = await store.load(self.conversation_key, conversation_id) or []
+        exchange = [] # Filled by the turn loop on every exit, then stored
         
         # 1. Build Prompt
-        system_prompt = self._build_prompt()
-        varieties_summary = self.persistence.get_all_varieties_summary()
+        native = settings.CULTURE_NATIVE_TOOLS and self.llm.supports_tools
+        system_prompt = await run_db(self._build_prompt, native)
+        varieties_summary = await run_db(self.persistence.get_all_varieties_summary, user_query)
         
         context_block = f"""
 [CONTEXTE BOTANIQUE (LISTE DES VARIÉTÉS)]
 Voici la liste des variétés références dans la base. Tu peux t'en servir pour suggérer des corrections ou autocompléter les noms.
-{varieties_summary}
+{clip_lines(varieties_summary, settings.AGENT_VARIETIES_CONTEXT_TOKENS)}
 [/CONTEXTE BOTANIQUE]
 """
         system_prompt += context_block
@@ -66,191 +124,40 @@ ATTENTION : Tu as l'INTERDICTION de toucher à la base de données (outils créa
 Si l'utilisateur te demande une action (planter, noter, créer...) :
 1. Reformule d'abord ce que tu comptes faire "Je vais créer X...", "Je note l'événement Y".
 2. Attends la confirmation de l'utilisateur ("Oui", "Go", "C'est bon").
-3. SEULEMENT ALORS, génère le JSON de l'outil.
+3. SEULEMENT ALORS, appelle l'outil.
 Si l'utilisateur vient de confirmer, tu peux agir.
 """
             system_prompt += safety_block
         
-        history_text = ""
-        if history:
-            history_text = "[HISTORIQUE DE CONVERSATION]\n"
-            for msg in history:
-                role = msg.get("role", "user").upper()
-                content = msg.get("content", "")
-                history_text += f"{role}: {content}\n"
-            history_text += "[/HISTORIQUE DE CONVERSATION]\n"
-        
-        full_prompt = f"""{system_prompt}
-
-{history_text}
-
-USER_QUERY: {user_query}
-
-NOTE IMPORTANTE :
-- Si tu as besoin de vérifier l'existence d'une plante ou d'un sujet, utilise l'outil `search_garden`.
-- Si tu as besoin de connaître l'historique ou les actions passées, utilise `list_garden_events`.
-- Si tu décides d'effectuer une action, génère le bloc JSON ci-dessous.
-- Sinon, réponds simplement en texte naturel.
-
-STYLE DE RÉPONSE :
-- Avant chaque action, explique ta réflexion en commençant par "PENSÉE :".
-- SÉPARATEUR OBLIGATOIRE : Si tu écris une réponse, écris 'RÉPONSE :' avant le texte final.
-- Ne mentionne JAMAIS "j'utilise l'outil" ou le JSON dans la réponse finale.
-- Parle comme un humain expert ("C'est noté", "Action effectuée").
-
-```json
-PENSÉE : Je vérifie si...
-{{
-  "tool": "nom_de_l_outil",
-  "args": {{ ... }}
-}}
-```
-"""
-        
         total_usage = {"prompt_tokens": 0, "completion_tokens": 0}
+        trace = {"prompt": f"{system_prompt}\n\nUSER_QUERY: {user_query}"}
+        budget = ContextBudget("Culture") # Pins the system prompt, compacts history and tool outputs per turn
+        if native:
+            # Native function calling: tool calls arrive as structured parts, no text protocol
+            agent_version = "v1.6-native-tools"
+            turns = self._native_turns(system_prompt, user_query, history, total_usage, budget, exchange)
+        else:
+            # Fallback for providers without tool support: PENSÉE / RÉPONSE markers and a JSON block
+            agent_version = "v1.5-history"
+            turns = self._text_turns(system_prompt, user_query, to_messages(history), total_usage, trace, budget, exchange)
+        try:
+            async with aclosing(turns):
+                async for event in turns:
+                    yield event
+        finally:
+            # Also after max_turns or a client disconnect, not only on a final answer
+            if exchange:
+                await store.save(self.conversation_key, conversation_id, to_contents(history) + exchange)
 
-        # 4. Tool Execution Logic (ReAct Loop)
-        max_turns = 5
-        current_turn = 0
-        
-        while current_turn < max_turns:
-            current_turn += 1
-            
-            # Streaming Generation
-            response_buffer = ""
-            stream_state = "START" 
-            
-            # Use generate_stream for token-by-token output
-            async for chunk in self.llm.generate_stream(full_prompt):
-                if not chunk: continue
-                response_buffer += chunk
-                
-                # Logic to decide what to show
-                
-                # Check entry to Tool Hiding
-                if "```json" in response_buffer and stream_state != "TOOL_HIDING":
-                    stream_state = "TOOL_HIDING"
-                    continue
-                
-                if stream_state == "TOOL_HIDING":
-                    continue 
-
-                # State Transitions based on START
-                if stream_state == "START":
-                    cleaned_buffer = response_buffer.strip()
-                    if cleaned_buffer.upper().startswith("PENSÉE"):
-                        stream_state = "THOUGHT"
-                    elif response_buffer.upper().strip().startswith("RÉPONSE") or "**RÉPONSE" in response_buffer.upper():
-                        stream_state = "MESSAGE"
-                    else:
-                        # If we have enough content and no thought marker, assume message
-                        if len(cleaned_buffer) > 10:
-                            stream_state = "MESSAGE"
-                
-                # Process Chunk based on Current State
-                if stream_state == "THOUGHT":
-                    # Check for explicit "RÉPONSE :" marker OR double newline
-                    # Use a sliding window check to catch split markers
-                    # response_buffer ALREADY contains chunk (line 126). 
-                    # We want the window that covers the checking area: end of previous buffer + start of new chunk.
-                    # Safest is just to look at the end of the full buffer.
-                    
-                    window_size = len(chunk) + 25 # Look back a bit further than the chunk
-                    combined_check = response_buffer[-window_size:]
-                    
-                    # Robust Regex Trigger
-                    trigger_match = re.search(r"(?i)(\*\*|#)?\s*R[ÉE]PONSE\s*(\*\*|#)?\s*:", combined_check)
-                    
-                    if trigger_match: 
-                        stream_state = "MESSAGE"
-                        
-                        # CALCULATE SPLIT EXACTLY
-                        match_end_in_window = trigger_match.end()
-                        start_of_chunk_in_window = len(combined_check) - len(chunk)
-                        
-                        # We split relative to the chunk start
-                        split_idx = match_end_in_window - start_of_chunk_in_window
-                            
-                        if split_idx <= 0:
-                            # Marker ended before this chunk started (should have been caught, but maybe latent?)
-                            yield json.dumps({"type": "message_token", "content": chunk}) + "\n"
-                        else:
-                            # Marker ends inside this chunk (or at the end of it)
-                            # Everything before the split point is part of the thought (or the marker itself)
-                            # We yield it as thought so it appears in logs but not in chat
-                            thought_part = chunk[:split_idx]
-                            if thought_part:
-                                yield json.dumps({"type": "thought_token", "content": thought_part}) + "\n"
-                            
-                            
-                            # Everything after is message
-                            if split_idx < len(chunk):
-                                msg_part = chunk[split_idx:]
-                                yield json.dumps({"type": "message_token", "content": msg_part}) + "\n"
-                             
-                    elif "\n\n" in chunk:
-                         stream_state = "MESSAGE"
-                         parts = chunk.split("\n\n", 1)
-                         yield json.dumps({"type": "thought_token", "content": parts[0]}) + "\n"
-                         if len(parts) > 1:
-                            yield json.dumps({"type": "message_token", "content": parts[1]}) + "\n"
-                    else:
-                        yield json.dumps({"type": "thought_token", "content": chunk}) + "\n"
-                
-                elif stream_state == "MESSAGE":
-                     yield json.dumps({"type": "message_token", "content": chunk}) + "\n"
-                    
-
-                
-
-
-            # End of Stream (for this turn)
-            tool_call = self._parse_tool_call(response_buffer)
-            
-            if not tool_call:
-                logger.info(f"Turn {current_turn}: Response (No Tool) -> {len(response_buffer)} chars")
-                break
-            
-            # 4b. Execute Tool
-            tool_name = tool_call.get("tool")
-            tool_args = tool_call.get("args")
-            tool_output_str = ""
-            
-            logger.info(f"Turn {current_turn}: Executing {tool_name}")
-            yield json.dumps({"type": "step_start", "tool": tool_name, "args": tool_args}) + "\n"
-            
-            step_start_ts = time.time()
-            if tool_name in self.tools_map:
-                try:
-                    result = self.tools_map[tool_name](**tool_args)
-                    tool_output_str = json.dumps(result, ensure_ascii=False)
-                except Exception as e:
-                    tool_output_str = f"Error: {e}"
-            else:
-                tool_output_str = f"Error: Tool {tool_name} not found."
-            
-            duration_ms = int((time.time() - step_start_ts) * 1000)
-            
-            yield json.dumps({"type": "step_end", "tool": tool_name, "duration": duration_ms, "result": tool_output_str}) + "\n"
-            
-            # 4c. Re-Prompt with Tool Output
-            full_prompt += f"\nASSISTANT (Interne): {response_buffer}\n" 
-            full_prompt += f"SYSTEM: Résultat de l'outil : {tool_output_str}\n"
-            full_prompt += "SYSTEM: L'action est terminée. Formule maintenant ta réponse FINALE à l'utilisateur.\n"
-            full_prompt += "IMPORTANT : N'écris PAS de pensée. Écris DIRECTEMENT ta réponse.\n"
-            full_prompt += "CONSIGNE STRICTE : Ne mentionne PAS le nom des outils techniques ou des JSON. Parle naturellement."
-            
-            # Loop next turn...
-            
         # LOGGING TRACEABILITY
         duration_ms = int((time.time() - start_time) * 1000)
         try:
             await self.traceability.log_interaction(
                 agent_name="Culture",
-                agent_version="v1.5-history", 
+                agent_version=agent_version, 
                 model_name=settings.GEMINI_MODEL_NAME, 
                 input_content=user_query,
-                full_prompt=full_prompt, 
+                full_prompt=trace["prompt"], 
                 response_content="[Streamed Content]",
                 input_tokens=total_usage["prompt_tokens"],
                 output_tokens=total_usage["completion_tokens"],
@@ -262,66 +169,221 @@ PENSÉE : Je vérifie si...
         # Done
         yield ""
 
-    async def chat(self, user_query: str, history: List[Dict[str, str]] = []) -> str:
-        return "Chat method deprecated for streaming usage."
+    async def _native_turns(self, system_prompt: str, user_query: str, history: History, total_usage: Dict,
+                            budget: ContextBudget, exchange: List[types.Content]):
+        """
+        ReAct loop on the provider's native function calling (LLMProvider.tool_session).
+        Each tool starts as soon as its call is streamed; calls of the same turn run concurrently.
+        """
+        session = self.llm.tool_session(system_prompt, TOOL_DECLARATIONS, history, user_query, agent_name="Culture", budget=budget)
+        try:
+            async with aclosing(self._native_loop(session, total_usage)) as loop:
+                async for event in loop:
+                    yield event
+        finally:
+            # Stored on every exit, including max_turns (an unanswered call is dropped)
+            exchange.extend(complete_exchange(session.exchange))
 
-    def _accumulate_usage(self, total: Dict, new_usage: Dict):
-        total["prompt_tokens"] += new_usage.get("prompt_tokens", 0)
-        total["completion_tokens"] += new_usage.get("completion_tokens", 0)
+    async def _native_loop(self, session: ToolSession, total_usage: Dict):
+        max_turns = 5
+        for current_turn in range(1, max_turns + 1):
+            turn_usage = {}
+            calls, tasks = [], []
+            # A stray text-protocol JSON block (model following a text-mode prompt) is hidden from
+            # the chat by the parser and still dispatched; its result goes back as text
+            parser = StreamParser()
+            try:
+                async with aclosing(session.stream(usage=turn_usage)) as stream:
+                    async for item in stream:
+                        if isinstance(item, TextDelta) and not item.thought:
+                            had_call = parser.tool_call is not None
+                            for event_type, content in parser.feed(item.text):
+                                yield json.dumps({"type": event_type, "content": content}) + "\n"
+                            if had_call or parser.tool_call is None:
+                                continue
+                            logger.warning(f"Turn {current_turn}: JSON tool call in native mode text")
+                            item = ToolCall(name=parser.tool_call.get("tool"), args=parser.tool_call.get("args") or {}, native=False)
+                        if isinstance(item, ToolCall):
+                            logger.info(f"Turn {current_turn}: Executing {item.name}")
+                            yield json.dumps({"type": "step_start", "tool": item.name, "args": item.args}) + "\n"
+                            calls.append(item)
+                            tasks.append((time.time(), asyncio.ensure_future(self._run_tool(item.name, item.args))))
+                        elif item.text:
+                            yield json.dumps({"type": "thought_token", "content": item.text}) + "\n"
+                for event_type, content in parser.finish():
+                    yield json.dumps({"type": event_type, "content": content}) + "\n"
+                self._accumulate_usage(total_usage, turn_usage)
+
+                if not calls:
+                    logger.info(f"Turn {current_turn}: Response (No Tool)")
+                    return
+
+                results = []
+                for call, (step_start_ts, task) in zip(calls, tasks):
+                    result = await task
+                    output = json.dumps(result, ensure_ascii=False, default=str)
+                    duration_ms = int((time.time() - step_start_ts) * 1000)
+                    yield json.dumps({"type": "step_end", "tool": call.name, "duration": duration_ms, "result": output}) + "\n"
+                    results.append((call, json.loads(output)))
+            finally:
+                # Client disconnected mid-turn: don't leave orphan tasks
+                for _, task in tasks:
+                    task.cancel()
 
+            session.add_tool_results(results)
 
-    def _parse_tool_call(self, text: str) -> Optional[Dict]:
-        import re
-        import ast
+        logger.warning(f"Culture agent stopped after {max_turns} tool turns")
+
+    async def _text_turns(self, system_prompt: str, user_query: str, history: List[Dict[str, str]], total_usage: Dict,
+                          trace: Dict, budget: ContextBudget, exchange: List[types.Content]):
+        """
+        ReAct loop on the text protocol: the tool call is a JSON block parsed from the stream.
+        """
+        query_block = f"USER_QUERY: {user_query}\n\n{TEXT_PROTOCOL}"
+        steps = [] # Tool turns of this exchange: {"assistant": raw turn text, "result": tool result}
         
-        # DEBUG LOGGING
-        logger.info(f"PARSING TOOL RAW: {text}")
+        # 4. Tool Execution Logic (ReAct Loop)
+        max_turns = 5
+        current_turn = 0
         
+        reply = [] # Message tokens shown to the user
+        prepared = None # Next turn's prompt, prepared while the tool runs
         try:
-            # 1. Try code block
-            match = re.search(r"```(?:\w+)?\s*(\{.*?\})\s*```", text, re.DOTALL)
-            if match:
-                try: 
-                    return json.loads(match.group(1))
-                except:
-                    # Try literal eval for single quotes
-                    try: return ast.literal_eval(match.group(1))
-                    except: pass
+            while current_turn < max_turns:
+                current_turn += 1
+                full_prompt = self._render_text_prompt(system_prompt, history, query_block, steps, budget, prepared)
             
-            # 2. Try strict pure JSON or Python Dict
-            text_stripped = text.strip()
-            if text_stripped.startswith("{") and text_stripped.endswith("}"):
-                if '"tool"' in text_stripped or "'tool'" in text_stripped:
-                    try: return json.loads(text_stripped)
-                    except:
-                        try: return ast.literal_eval(text_stripped)
-                        except: pass
-            
-            # 3. Fallback: Brace Counting (Robust)
-            # Find all start indices of '{'
-            start_indices = [i for i, char in enumerate(text) if char == "{"]
+                # Streaming Generation: the parser routes each chunk once (thought / message / hidden tool JSON)
+                parser = StreamParser()
+                turn_usage = {}
+                tool_task = None
+                try:
+                    async with aclosing(self.llm.generate_stream(full_prompt, usage=turn_usage)) as stream:
+                        async for chunk in stream:
+                            if not chunk: continue
+                            for event_type, content in parser.feed(chunk):
+                                if event_type == "message_token": reply.append(content)
+                                yield json.dumps({"type": event_type, "content": content}) + "\n"
+
+                            if tool_task is None and parser.tool_call is not None:
+                                # Early dispatch: the tool starts as soon as its JSON block closes
+                                tool_name = parser.tool_call.get("tool")
+                                tool_args = parser.tool_call.get("args") or {}
+                                logger.info(f"Turn {current_turn}: Executing {tool_name}")
+                                yield json.dumps({"type": "step_start", "tool": tool_name, "args": tool_args}) + "\n"
+                                step_start_ts = time.time()
+                                tool_task = asyncio.ensure_future(self._run_tool(tool_name, tool_args))
+                                if settings.CULTURE_EARLY_TOOL_CANCEL:
+                                    break # Closing the stream stops the generation
+
+                    for event_type, content in parser.finish():
+                        if event_type == "message_token": reply.append(content)
+                        yield json.dumps({"type": event_type, "content": content}) + "\n"
+
+                    # End of Stream (for this turn)
+                    self._accumulate_usage(total_usage, turn_usage)
+                    response_buffer = parser.text
+                    logger.debug(f"Turn {current_turn} raw response: {response_buffer}")
+
+                    if tool_task is None:
+                        logger.info(f"Turn {current_turn}: Response (No Tool) -> {len(response_buffer)} chars")
+                        break
+
+                    # Next turn's prompt is prepared while the tool runs (started on the DB pool first)
+                    steps.append({"assistant": response_buffer, "result": None})
+                    await asyncio.sleep(0)
+                    prepared = self._prepare_text_prompt(system_prompt, history, query_block, steps, budget)
+                    steps[-1]["result"] = await tool_task
+                    tool_output_str = json.dumps(steps[-1]["result"], ensure_ascii=False, default=str)
+                finally:
+                    # Client disconnected mid-turn: don't leave an orphan task
+                    if tool_task is not None:
+                        tool_task.cancel()
+
+                duration_ms = int((time.time() - step_start_ts) * 1000)
             
-            for start_index in start_indices:
-                balance = 0
-                for i in range(start_index, len(text)):
-                    char = text[i]
-                    if char == "{":
-                        balance += 1
-                    elif char == "}":
-                        balance -= 1
-                    
-                    if balance == 0:
-                        # Found a balanced block
-                        candidate = text[start_index : i+1]
-                        # Quick check if it looks like a tool call
-                        if '"tool"' in candidate or "'tool'" in candidate:
-                            try: return json.loads(candidate)
-                            except:
-                                try: return ast.literal_eval(candidate)
-                                except: pass
-                        break # Stop extending this block, try next start_index if failed
+                yield json.dumps({"type": "step_end", "tool": tool_name, "duration": duration_ms, "result": tool_output_str}) + "\n"
             
-            return None
+                # Loop next turn: re-prompt with the tool output...
+        finally:
+            # Stored as plain text on every exit (tool turns only exist in the text protocol)
+            exchange.append(types.Content(role="user", parts=[types.Part(text=user_query)]))
+            if "".join(reply).strip():
+                exchange.append(types.Content(role="model", parts=[types.Part(text="".join(reply).strip())]))
+
+        trace["prompt"] = full_prompt
+
+    def _prepare_text_prompt(self, system_prompt: str, history: List[Dict[str, str]], query_block: str,
+                             steps: List[Dict[str, Any]], budget: ContextBudget) -> Dict[str, Any]:
+        """
+        Part of the next turn's prompt that does not depend on the latest tool result, prepared
+        while the tool runs: earlier tool turns compacted, latest reasoning, and the history fitted
+        to the tokens left before the result.
+        """
+        last = len(steps) - 1
+        exchange = "".join(
+            f"\nASSISTANT (Interne): {clip_text(step['assistant'], settings.AGENT_OLD_TOOL_OUTPUT_TOKENS)}\n"
+            f"SYSTEM: Résultat de l'outil : {json.dumps(budget.tool_output(step['result'], latest=False), ensure_ascii=False, default=str)}\n"
+            for step in steps[:last]
+        )
+        if steps:
+            exchange += f"\nASSISTANT (Interne): {steps[last]['assistant']}\n"
+        fixed_tokens = estimate_tokens(system_prompt) + estimate_tokens(query_block) + estimate_tokens(exchange)
+        if steps:
+            fixed_tokens += estimate_tokens(FINAL_ANSWER_INSTRUCTIONS)
+        history_text = self._render_history(budget.fit_history(history, budget.max_tokens - fixed_tokens))
+        return {"exchange": exchange, "fixed_tokens": fixed_tokens, "history_text": history_text}
+
+    def _render_text_prompt(self, system_prompt: str, history: List[Dict[str, str]], query_block: str,
+                            steps: List[Dict[str, Any]], budget: ContextBudget,
+                            prepared: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Text-protocol prompt of the next turn, within the context budget: earlier tool turns are
+        compacted, and the client history gets the tokens left (older turns summarized).
+        """
+        prepared = prepared or self._prepare_text_prompt(system_prompt, history, query_block, steps, budget)
+        exchange = prepared["exchange"]
+        history_text = prepared["history_text"]
+        if steps:
+            result = budget.tool_output(steps[-1]["result"], latest=True)
+            result_line = f"SYSTEM: Résultat de l'outil : {json.dumps(result, ensure_ascii=False, default=str)}\n"
+            exchange += result_line + FINAL_ANSWER_INSTRUCTIONS
+            fixed_tokens = prepared["fixed_tokens"] + estimate_tokens(result_line)
+            if fixed_tokens + estimate_tokens(history_text) > budget.max_tokens:
+                # The result needs room: the history gives way
+                history_text = self._render_history(budget.fit_history(history, budget.max_tokens - fixed_tokens))
+
+        full_prompt = f"{system_prompt}\n\n{history_text}\n\n{query_block}{exchange}"
+        budget.report(estimate_tokens(full_prompt))
+        return full_prompt
+
+    @staticmethod
+    def _render_history(fitted: List[Dict[str, str]]) -> str:
+        if not fitted:
+            return ""
+        history_text = "[HISTORIQUE DE CONVERSATION]\n"
+        for msg in fitted:
+            role = msg.get("role", "user").upper()
+            content = msg.get("content", "")
+            history_text += f"{role}: {content}\n"
+        history_text += "[/HISTORIQUE DE CONVERSATION]\n"
+        return history_text
+
+    async def _run_tool(self, tool_name: str, tool_args: Dict[str, Any]) -> Any:
+        """
+        Executes one tool call on the DB pool. Returns its result, or {"error": ...}.
+        """
+        if tool_name not in self.tools_map:
+            return {"error": f"Tool {tool_name} not found."}
+        try:
+            return await run_db(self.tools_map[tool_name], **tool_args)
         except Exception as e:
-            logger.warning(f"Failed to parse tool call JSON: {e}")
-            return None
+            return {"error": str(e)}
+
+    async def chat(self, user_query: str, history: List[Dict[str, str]] = []) -> str:
+        return "Chat method deprecated for streaming usage."
+
+    def _accumulate_usage(self, total: Dict, new_usage: Dict):
+        total["prompt_tokens"] += new_usage.get("prompt_tokens", 0)
+        total["completion_tokens"] += new_usage.get("completion_tokens", 0)
+
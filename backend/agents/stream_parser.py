@@ -0,0 +1,217 @@
+import ast
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# (SSE event type, text) pairs, e.g. ("thought_token", "PENSÉE : ...")
+Event = Tuple[str, str]
+
+START = "START"
+THOUGHT = "THOUGHT"
+MESSAGE = "MESSAGE"
+TOOL = "TOOL" # Inside the ```json block: hidden from the chat
+
+TOOL_FENCE = "```json"
+_REPLY_MARKER = re.compile(r"R[ÉE]PONSE\s*(?:\*\*|#)?\s*:", re.IGNORECASE)
+# Any prefix of _REPLY_MARKER up to (excluding) the ":" : the marker may continue in the next chunk
+_REPLY_PREFIX = re.compile(r"R(?:[ÉE](?:P(?:O(?:N(?:S(?:E\s*(?:(?:\*\*?|#)\s*)?)?)?)?)?)?)?", re.IGNORECASE)
+_JSON_TOKENS = re.compile(r"""[{}"'\\]""")
+_TAIL = 8 # Chars kept from previous chunks to read a "tool" key split across chunks
+
+
+def _fence_prefix_length(text: str) -> int:
+    # Longest suffix of text that is a proper prefix of TOOL_FENCE
+    if "`" not in text[-(len(TOOL_FENCE) - 1):]:
+        return 0
+    for n in range(min(len(TOOL_FENCE) - 1, len(text)), 0, -1):
+        if text.endswith(TOOL_FENCE[:n]):
+            return n
+    return 0
+
+
+def _load_tool_call(candidate: str) -> Optional[Dict[str, Any]]:
+    try:
+        call = json.loads(candidate)
+    except ValueError:
+        try:
+            call = ast.literal_eval(candidate) # Single-quoted Python dicts
+        except (ValueError, SyntaxError):
+            return None
+    return call if isinstance(call, dict) and "tool" in call else None
+
+
+class StreamParser:
+    """
+    Incremental router for the CultureAgent text protocol, fed chunk by chunk.
+
+    Classifies the streamed text into thought ("PENSÉE : ...") and message ("RÉPONSE : ..."
+    or plain text) tokens, hides the ```json tool block, and extracts the tool call as soon
+    as its JSON object closes (fenced or bare, JSON or Python dict syntax).
+
+    Each chunk is scanned once: marker prefixes split across chunks are held back (a few
+    chars) until the next chunk, and braces/strings are tracked with a stack, so the work
+    per character is constant whatever the response length.
+    """
+
+    def __init__(self):
+        self.state = START
+        self.tool_call: Optional[Dict[str, Any]] = None
+        self._chunks: List[str] = []
+        self._text: Optional[str] = ""
+        self._hold = "" # Unrouted suffix: possible marker prefix, or undecided START text
+        self._length = 0
+        self._fence_end: Optional[int] = None # Offset right after the ```json fence, once seen
+        # JSON scanner
+        self._offset = 0
+        self._tail = ""
+        self._stack: List[List[Any]] = [] # Open objects: [start offset, has a "tool" key]
+        self._quote: Optional[str] = None
+        self._quote_start = -1
+        self._escaped_at = -1
+
+    @property
+    def text(self) -> str:
+        """Raw text received so far."""
+        if self._text is None:
+            self._text = "".join(self._chunks)
+        return self._text
+
+    def feed(self, chunk: str) -> List[Event]:
+        """
+        Routes a new chunk. Returns the events it completes, consecutive same-type text merged.
+        """
+        if not chunk:
+            return []
+        self._chunks.append(chunk)
+        self._text = None
+        self._length += len(chunk)
+        if self.state == MESSAGE and not self._hold and "`" not in chunk:
+            if self.tool_call is None:
+                self._scan_json(chunk)
+            return [("message_token", chunk)] # Fast path: nothing left to detect but the fence
+        events: List[Event] = []
+        entering_tool = self.state != TOOL
+        self._route(self._hold + chunk, False, events)
+        if self.tool_call is None:
+            if entering_tool and self.state == TOOL:
+                # The tool object is scanned from the fence: braces or quotes in the prose
+                # before it ("{tomate", "{l'arbre}") must not nest or swallow it
+                start = self._fence_end - (self._length - len(chunk))
+                self._stack, self._quote, self._escaped_at, self._tail = [], None, -1, ""
+                self._offset = self._fence_end
+                chunk = chunk[start:]
+            self._scan_json(chunk)
+        return events
+
+    def finish(self) -> List[Event]:
+        """
+        End of stream: flushes the held-back text.
+        """
+        events: List[Event] = []
+        self._route(self._hold, True, events)
+        return events
+
+    def _route(self, pending: str, final: bool, events: List[Event]):
+        self._hold = ""
+        if self.state == TOOL:
+            return
+        fence = pending.find(TOOL_FENCE)
+        if fence >= 0:
+            self._fence_end = self._length - len(pending) + fence + len(TOOL_FENCE)
+            self._classify(pending[:fence], True, events)
+            self.state = TOOL
+            return
+        keep = 0 if final else _fence_prefix_length(pending)
+        body = pending[:len(pending) - keep]
+        self._hold = self._classify(body, final, events) + pending[len(pending) - keep:]
+
+    def _classify(self, text: str, final: bool, events: List[Event]) -> str:
+        """
+        Emits the routable part of text in the current state; returns the part to hold back.
+        """
+        if self.state == START:
+            stripped = text.lstrip()
+            upper = stripped.upper()
+            if upper.startswith("PENSÉE"):
+                self.state = THOUGHT
+            elif upper.startswith("RÉPONSE") or "**RÉPONSE" in upper or len(stripped) > 10 or (final and stripped):
+                self.state = MESSAGE
+            else:
+                # Not enough text to decide yet
+                return "" if final else text
+
+        while self.state == THOUGHT:
+            marker = _REPLY_MARKER.search(text)
+            blank = text.find("\n\n")
+            if marker and (blank < 0 or marker.start() < blank):
+                # The marker itself stays in the thought
+                self._emit(events, "thought_token", text[:marker.end()])
+                text = text[marker.end():]
+            elif blank >= 0:
+                self._emit(events, "thought_token", text[:blank])
+                text = text[blank + 2:]
+            else:
+                cut = len(text)
+                if not final:
+                    # Only the last R can start a marker ("RÉPONSE" has a single R)
+                    r = max(text.rfind("R"), text.rfind("r"))
+                    if r >= 0 and _REPLY_PREFIX.fullmatch(text, r):
+                        cut = r
+                    elif text.endswith("\n"):
+                        cut -= 1
+                self._emit(events, "thought_token", text[:cut])
+                return text[cut:]
+            self.state = MESSAGE
+
+        self._emit(events, "message_token", text)
+        return ""
+
+    @staticmethod
+    def _emit(events: List[Event], event_type: str, text: str):
+        if not text:
+            return
+        if events and events[-1][0] == event_type:
+            events[-1] = (event_type, events[-1][1] + text)
+        else:
+            events.append((event_type, text))
+
+    def _scan_json(self, chunk: str):
+        base = self._offset
+        window = self._tail + chunk
+        shift = base - len(self._tail) # Absolute offset of window[0]
+        for token in _JSON_TOKENS.finditer(chunk):
+            char = token.group()
+            pos = base + token.start()
+            if self._quote:
+                if pos == self._escaped_at:
+                    continue
+                if char == "\\":
+                    self._escaped_at = pos + 1
+                elif char == self._quote:
+                    self._quote = None
+                    # Only a "tool" key of the outermost object (nested args may have one too)
+                    if (len(self._stack) == 1 and pos - self._quote_start == 5
+                            and window[self._quote_start + 1 - shift:pos - shift] == "tool"):
+                        self._stack[-1][1] = True
+                continue
+            if char == "{":
+                self._stack.append([pos, False])
+            elif char == "}" and self._stack:
+                start, has_tool = self._stack.pop()
+                if has_tool and self.tool_call is None:
+                    self.tool_call = _load_tool_call(self.text[start:pos + 1])
+            elif char in "\"'" and self._stack:
+                # Strings only matter inside an object (apostrophes in prose are not quotes)
+                self._quote = char
+                self._quote_start = pos
+        self._offset += len(chunk)
+        self._tail = window[-_TAIL:]
+
+
+def parse_tool_call(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Tool call of a complete response, if any.
+    """
+    parser = StreamParser()
+    parser.feed(text)
+    return parser.tool_call
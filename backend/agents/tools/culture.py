@@ -24,8 +24,7 @@ class CultureTools:
             observation: Textual observation to store
             data: Additional JSON data specific to the event type (e.g. {mode_semis, zone...})
         """
-        all_subjects = self.service.list_subjects()
-        subject = next((s for s in all_subjects if s.tracking_id == subject_tracking_id), None)
+        subject = self.service.get_subject_by_tracking_id(subject_tracking_id)
         
         if not subject:
             return f"Error: Subject with tracking ID {subject_tracking_id} not found."
@@ -74,6 +73,12 @@ class CultureTools:
     def create_subject(self, name: str, quantity: int, unit: str, type_plant: str, data: Dict[str, Any] = {}) -> str:
         """
         Creates a new subject.
+        args:
+            name: Plant name, variety included (e.g. 'Tomate Marmande'), linked to the botanical referentiel
+            quantity: Number of units
+            unit: One of 'INDIVIDU', 'PLANT', 'METRE_LINEAIRE', 'M2' ('GRAINE' is counted as 'INDIVIDU')
+            type_plant: Kind of plant (e.g. 'Légume', 'Aromatique')
+            data: Initial event data (e.g. {mode_semis, zone...})
         """
         active_season = self.service.get_active_season()
         if not active_season:
@@ -118,13 +123,11 @@ class CultureTools:
         """
         internal_subject_id = None
         if subject_tracking_id:
-            # Resolve tracking ID
-            all_subjects = self.service.list_subjects()
-            target = next((s for s in all_subjects if s.tracking_id == subject_tracking_id), None)
-            if not target:
+            # Resolve tracking ID (indexed lookup, cached)
+            internal_subject_id = self.service.resolve_subject_id(subject_tracking_id)
+            if not internal_subject_id:
                 # Return error or empty list? Agent prefers error to know it failed finding
                 return [{"error": f"Subject with tracking ID {subject_tracking_id} not found."}]
-            internal_subject_id = target.id
             
         events = self.service.list_events(limit=limit, subject_id=internal_subject_id)
         
@@ -0,0 +1,72 @@
+import inspect
+import re
+import typing
+from typing import Any, Callable, Dict, List
+
+_JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean", dict: "object", list: "array"}
+_ARG_LINE = re.compile(r"^\s*(\w+)\s*(?:\([^)]*\))?\s*:\s*(.+)$")
+
+
+def _schema(annotation) -> Dict[str, Any]:
+    """
+    JSON Schema of a type hint (Optional[X] -> X, List[X] -> array of X, Dict -> free-form object).
+    """
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union:
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        return _schema(args[0]) if len(args) == 1 else {}
+    if origin in (list, List):
+        item = typing.get_args(annotation)
+        return {"type": "array", "items": _schema(item[0]) if item else {}}
+    json_type = _JSON_TYPES.get(origin or annotation)
+    return {"type": json_type} if json_type else {}
+
+
+def _parse_docstring(doc: str):
+    """
+    Description (text before "args:") and per-argument descriptions ("name: text" lines).
+    """
+    description, arguments = [], {}
+    section = None
+    for line in inspect.cleandoc(doc or "").splitlines():
+        header = line.strip().lower()
+        if header in ("args:", "arguments:", "returns:", "return:", "raises:"):
+            section = header
+        elif section in ("args:", "arguments:"):
+            match = _ARG_LINE.match(line)
+            if match:
+                arguments[match.group(1)] = match.group(2).strip()
+        elif section is None and line.strip():
+            description.append(line.strip())
+    return " ".join(description), arguments
+
+
+def function_declaration(fn: Callable) -> Dict[str, Any]:
+    """
+    Function declaration {"name", "description", "parameters"} generated from a tool's
+    signature (type hints -> JSON Schema, no default -> required) and docstring.
+    """
+    description, arg_docs = _parse_docstring(fn.__doc__)
+    hints = typing.get_type_hints(fn)
+    properties, required = {}, []
+    for name, param in inspect.signature(fn).parameters.items():
+        if name == "self" or param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+            continue
+        schema = _schema(hints.get(name, Any))
+        if name in arg_docs:
+            schema["description"] = arg_docs[name]
+        properties[name] = schema
+        if param.default is inspect.Parameter.empty:
+            required.append(name)
+    return {
+        "name": fn.__name__,
+        "description": description,
+        "parameters": {"type": "object", "properties": properties, "required": required},
+    }
+
+
+def tool_declarations(tools_map: Dict[str, Callable]) -> List[Dict[str, Any]]:
+    """
+    Declarations of an agent's tools_map, named after their keys.
+    """
+    return [{**function_declaration(fn), "name": name} for name, fn in tools_map.items()]
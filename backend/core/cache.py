@@ -0,0 +1,76 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, List
+from cachetools import TTLCache as _TTLCache
+
+_MISSING = object()
+
+# Named caches, exposed through the admin stats endpoint
+_registry: Dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache with TTL expiry, LRU-style eviction and hit/miss counters.
+    Thin wrapper around cachetools.TTLCache (services are also called from the DB pool threads).
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self._cache = _TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        register_cache(self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._cache.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._cache[key] = value
+
+    def invalidate(self, key: Hashable = None):
+        """
+        Removes one key, or clears the whole cache if no key is given.
+        """
+        with self._lock:
+            if key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(key, None)
+
+    def invalidate_matching(self, predicate: Callable[[Hashable], bool]):
+        """
+        Removes every key for which predicate(key) is true.
+        """
+        with self._lock:
+            for key in [k for k in self._cache.keys() if predicate(k)]:
+                self._cache.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
+
+
+def register_cache(cache: Any):
+    """
+    Exposes a cache (any object with `name` and `stats()`) through the admin stats endpoint.
+    """
+    _registry[cache.name] = cache
+
+
+def get_cache_stats() -> List[Dict[str, Any]]:
+    return [cache.stats() for cache in _registry.values()]
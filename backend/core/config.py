@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -14,12 +15,87 @@ class Settings(BaseSettings):
     GEMINI_MODEL_NAME: str = "gemini-2.5-flash"
     BOTANIQUE_AGENT_VERSION: str = "1.0"
     
+    # Database (supabase-py calls offloaded from the event loop)
+    DB_POOL_SIZE: int = 10 # Max concurrent PostgREST calls
+    SUPABASE_MAX_CONNECTIONS: int = 20 # Shared keep-alive HTTP pool
+    SUPABASE_KEEPALIVE_EXPIRY: float = 30.0 # Seconds
+    SUPABASE_TIMEOUT: float = 30.0 # Seconds
+
+    # LLM Logs (write-behind sink)
+    LLM_LOG_QUEUE_SIZE: int = 1000
+    LLM_LOG_BATCH_SIZE: int = 50
+    LLM_LOG_FLUSH_INTERVAL: float = 2.0 # Seconds
+    LLM_LOG_SPILL_PATH: str = "llm_logs_spill.jsonl" # Empty = drop rows under backpressure
+
+    # Caches
+    TRACKING_ID_CACHE_SIZE: int = 5000
+    TRACKING_ID_CACHE_TTL: float = 600.0 # Seconds
+    PROMPT_CACHE_TTL: float = 30.0 # Seconds (agent prompts, few-shot examples, prompt files)
+    VARIETIES_CACHE_CHECK_INTERVAL: float = 30.0 # Seconds between catalog version checks
+    VARIETIES_CONTEXT_MAX_ROWS: int = 200 # Above this, prompts only get query-relevant varieties
+    EMBEDDING_CACHE_SIZE: int = 2000 # In-memory LRU entries
+    EMBEDDING_CACHE_PATH: str = "embedding_cache.sqlite3" # Persistent layer, empty = memory only
+    CONVERSATION_STORE_SIZE: int = 1000 # Conversations kept in memory (LRU)
+    CONVERSATION_STORE_TTL: float = 21600.0 # Seconds since the last message
+    CONVERSATION_STORE_PERSIST: bool = False # Also keep them in the agent_conversations table
+    CONVERSATION_MAX_CONTENTS: int = 200 # Stored contents per conversation (oldest exchanges dropped)
+
+    # Embeddings (re-indexing pipeline)
+    EMBED_BATCH_SIZE: int = 100 # Texts per embedding call (API max 100)
+    EMBED_CONCURRENCY: int = 4 # Embedding calls in flight
+    EMBED_RATE_LIMIT_RPM: int = 1000 # Embedding calls per minute, 0 = unlimited
+    REINDEX_PAGE_SIZE: int = 1000 # Rows scanned per page
+    REINDEX_CHECKPOINT_PATH: str = "reindex_checkpoint.json"
+
+    # Local catalog index (in-process plant/fiche lookup, DB fallback until synced)
+    CATALOG_INDEX_ENABLED: bool = True
+    CATALOG_INDEX_REFRESH_INTERVAL: float = 60.0 # Seconds between delta syncs
+
+    # Offline vector search fallback when embeddings are unavailable (services/lexical_embedder.py)
+    LEXICAL_EMBEDDING_DIM: int = 8192 # Hashed n-gram buckets
+    LEXICAL_MATCH_THRESHOLD: float = 0.3 # Lexical cosine replacing the strict 0.85 embedding threshold
+    LEXICAL_INDEX_TTL: float = 300.0 # Seconds before an index built from the table (no catalog index) is rebuilt
+
+    # Local vector index (in-process similarity search, RPC fallback until synced)
+    VECTOR_INDEX_ENABLED: bool = False
+    VECTOR_INDEX_DIR: str = "vector_index"
+    VECTOR_INDEX_REFRESH_INTERVAL: float = 60.0 # Seconds between delta syncs
+    VECTOR_INDEX_PRECISION: str = "float32" # Scan matrix: float32 | float16 | int8
+    VECTOR_INDEX_RERANK: int = 4 # Quantized: k * rerank candidates re-scored in float32 (0 = off)
+    MATCH_PROBES: Optional[int] = None # match_* RPCs: ivfflat.probes (None = server default)
+    MATCH_EF_SEARCH: Optional[int] = None # match_* RPCs: hnsw.ef_search (None = 40, raised to match_count)
+    MATCH_RERANK: Optional[int] = None # match_* RPCs: halfvec candidates per result re-scored exactly (None = 4)
+
+    # Plant lookup (services/plant_search.py)
+    PLANT_SEARCH_HYBRID: bool = False # Fuse trigram and embedding rankings (costs a query embedding)
+    PLANT_SEARCH_CANDIDATES: int = 20 # Candidates per ranking before fusion
+    PLANT_SEARCH_MIN_SIMILARITY: float = 0.3 # pg_trgm word similarity threshold
+    PLANT_MATCH_MIN_VECTOR_SIMILARITY: float = 0.85 # find_best_match without lexical evidence
+
+    # Agent context budget (core/context_budget.py), estimated tokens
+    AGENT_CONTEXT_MAX_TOKENS: int = 12000 # Prompt budget per model turn (system prompt and tools are pinned)
+    AGENT_TOOL_OUTPUT_MAX_TOKENS: int = 0 # Latest tool output ceiling, 0 = sent in full
+    AGENT_OLD_TOOL_OUTPUT_TOKENS: int = 150 # Tool outputs (and internal turns) of earlier turns
+    AGENT_HISTORY_SUMMARY_TOKENS: int = 300 # Summary of the history turns that no longer fit
+    AGENT_VARIETIES_CONTEXT_TOKENS: int = 3000 # Varieties list in the Culture prompt
+    AGENT_CHARS_PER_TOKEN: float = 4.0 # Local token estimate (no tokenizer call)
+
+    # Baštouille Chef
+    CHEF_TOOL_CONCURRENCY: int = 5 # Max tool calls executed in parallel per model turn
+    CHEF_PREAMBLE_HOLD_CHARS: int = 200 # Text held back per turn in case function calls follow (0 = stream at once)
+
+    # Culture agent
+    CULTURE_NATIVE_TOOLS: bool = True # Native function calling when the provider supports it (else text protocol)
+    CULTURE_EARLY_TOOL_CANCEL: bool = True # Stop the generation once the tool call is dispatched (its tail is discarded)
+
     # Feature Flags
     AGENT_ACTION_CONFIRMATION: bool = True # Force agent to ask before write actions
     
     # Ollama
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL_NAME: str = "mistral"
+    OLLAMA_TIMEOUT: float = 120.0 # Seconds (read timeout between streamed chunks)
+    OLLAMA_MAX_CONNECTIONS: int = 10 # Shared keep-alive HTTP pool
     
     # Botanique Agent Specific
     BOTANIQUE_MODEL_NAME: str = "gemini-2.5-flash"
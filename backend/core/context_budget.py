@@ -0,0 +1,208 @@
+import json
+import logging
+import math
+from typing import Any, Dict, List, Optional
+
+from google.genai import types
+
+from core.config import settings
+from core.conversations import History, starts_turn, to_contents, to_messages
+
+logger = logging.getLogger(__name__)
+
+HISTORY_SUMMARY_HEADER = "[RÉSUMÉ DES ÉCHANGES PRÉCÉDENTS]"
+_MESSAGE_OVERHEAD = 4 # Role / separators, per message
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local token estimate (no tokenizer call): characters / AGENT_CHARS_PER_TOKEN.
+    """
+    return math.ceil(len(text) / settings.AGENT_CHARS_PER_TOKEN) if text else 0
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def clip_text(text: str, max_tokens: int) -> str:
+    """
+    Leading part of text within max_tokens, with the omitted length.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    keep = max(int(max_tokens * settings.AGENT_CHARS_PER_TOKEN), 0)
+    return f"{text[:keep]}… [tronqué : {len(text) - keep} caractères omis]"
+
+
+def clip_lines(text: str, max_tokens: int) -> str:
+    """
+    Leading whole lines of text within max_tokens, with the omitted line count.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    lines = text.splitlines()
+    kept, used = [], 0
+    for line in lines:
+        used += estimate_tokens(line) + 1
+        if used > max_tokens:
+            break
+        kept.append(line)
+    return "\n".join(kept + [f"… ({len(lines) - len(kept)} lignes omises)"])
+
+
+def compact_result(result: Any, max_tokens: int) -> Any:
+    """
+    Tool result within max_tokens: unchanged if it fits, else the leading list items that fit
+    (with the omitted count), else its clipped JSON text.
+    """
+    text = _dumps(result)
+    if estimate_tokens(text) <= max_tokens:
+        return result
+    if isinstance(result, list):
+        kept, used = [], 0
+        for item in result:
+            used += estimate_tokens(_dumps(item)) + 1
+            if used > max_tokens:
+                break
+            kept.append(item)
+        if kept:
+            return {"items": kept, "omitted": len(result) - len(kept), "total": len(result)}
+    return clip_text(text, max_tokens)
+
+
+def content_tokens(content: types.Content) -> int:
+    tokens = _MESSAGE_OVERHEAD
+    for part in content.parts or []:
+        if part.text:
+            tokens += estimate_tokens(part.text)
+        if part.function_call:
+            tokens += estimate_tokens(part.function_call.name + _dumps(part.function_call.args))
+        if part.function_response:
+            tokens += estimate_tokens(_dumps(part.function_response.response))
+    return tokens
+
+
+class ContextBudget:
+    """
+    Token budget of an agent prompt, applied before every model turn (one instance per request).
+
+    The system prompt and tool declarations are pinned. The current exchange (user message,
+    model turns, tool results) comes next: the latest tool output is sent in full (the model
+    answers from it), earlier ones are capped at AGENT_OLD_TOOL_OUTPUT_TOKENS. Client history
+    gets what is left, most recent turns first; older turns are folded into a short summary.
+    Long sessions therefore keep a flat prompt size, apart from the latest tool output.
+    Each turn's estimated size is logged.
+    """
+
+    def __init__(self, agent_name: str, max_tokens: Optional[int] = None):
+        self.agent_name = agent_name
+        self.max_tokens = max_tokens or settings.AGENT_CONTEXT_MAX_TOKENS
+        self.turn_tokens: List[int] = []
+
+    def report(self, tokens: int):
+        self.turn_tokens.append(tokens)
+        logger.info(f"[{self.agent_name}] Turn {len(self.turn_tokens)}: prompt ≈ {tokens} tokens (budget {self.max_tokens})")
+
+    def tool_output(self, result: Any, latest: bool) -> Any:
+        if latest:
+            if not settings.AGENT_TOOL_OUTPUT_MAX_TOKENS:
+                return result
+            return compact_result(result, settings.AGENT_TOOL_OUTPUT_MAX_TOKENS)
+        return compact_result(result, settings.AGENT_OLD_TOOL_OUTPUT_TOKENS)
+
+    def fit_history(self, history: List[Dict[str, str]], max_tokens: int) -> List[Dict[str, str]]:
+        """
+        Most recent messages within max_tokens; the older ones are folded into one summary
+        message, merged into the first kept message when it is also a user message.
+        """
+        sizes = [estimate_tokens(msg.get("content", "")) + _MESSAGE_OVERHEAD for msg in history]
+        if sum(sizes) <= max_tokens:
+            return list(history)
+
+        # The summary's share is reserved first; no room for it: no history at all
+        max_tokens -= settings.AGENT_HISTORY_SUMMARY_TOKENS + _MESSAGE_OVERHEAD
+        if max_tokens < 0:
+            return []
+        start, used = len(history), 0
+        while start > 0 and used + sizes[start - 1] <= max_tokens:
+            start -= 1
+            used += sizes[start]
+        kept = history[start:]
+        summary = self.summarize_history(history[:start])
+        if kept and kept[0].get("role") == "user":
+            return [{"role": "user", "content": f"{summary}\n\n{kept[0].get('content', '')}"}] + list(kept[1:])
+        return [{"role": "user", "content": summary}] + list(kept)
+
+    @staticmethod
+    def summarize_history(messages: List[Dict[str, str]]) -> str:
+        """
+        Extractive summary: the opening words of each message, within AGENT_HISTORY_SUMMARY_TOKENS.
+        """
+        lines = []
+        for msg in messages:
+            words = msg.get("content", "").split()
+            opening = " ".join(words[:20]) + ("…" if len(words) > 20 else "")
+            lines.append(f"{msg.get('role', 'user').upper()}: {opening}")
+        return clip_lines(f"{HISTORY_SUMMARY_HEADER}\n" + "\n".join(lines), settings.AGENT_HISTORY_SUMMARY_TOKENS)
+
+    def fit_contents(self, contents: List[types.Content], max_tokens: int) -> List[types.Content]:
+        """
+        fit_history for Gemini contents: only cut before a user message, so a function call
+        is never separated from its response.
+        """
+        sizes = [content_tokens(c) for c in contents]
+        if sum(sizes) <= max_tokens:
+            return list(contents)
+
+        max_tokens -= settings.AGENT_HISTORY_SUMMARY_TOKENS + _MESSAGE_OVERHEAD
+        if max_tokens < 0:
+            return []
+        start, used = len(contents), 0
+        for i in range(len(contents) - 1, -1, -1):
+            used += sizes[i]
+            if used > max_tokens:
+                break
+            if starts_turn(contents[i]):
+                start = i
+        summary = types.Part(text=self.summarize_history(to_messages(contents[:start])))
+        kept = contents[start:]
+        if kept:
+            return [types.Content(role="user", parts=[summary] + kept[0].parts)] + list(kept[1:])
+        return [types.Content(role="user", parts=[summary])]
+
+    def compact_contents(self, history: History, exchange: List[types.Content], pinned_tokens: int) -> List[types.Content]:
+        """
+        Gemini contents for the next turn: compacts the function responses of `exchange` in place,
+        then prepends the history that fits in the remaining budget (its tool results capped as old ones).
+        """
+        with_responses = [i for i, content in enumerate(exchange) if any(p.function_response for p in content.parts or [])]
+        for i in with_responses:
+            exchange[i] = self._compact_responses(exchange[i], latest=(i == with_responses[-1]))
+
+        used = pinned_tokens + sum(content_tokens(c) for c in exchange)
+        history = [self._compact_responses(c, latest=False) for c in to_contents(history)]
+        contents = self.fit_contents(history, self.max_tokens - used)
+        self.report(used + sum(content_tokens(c) for c in contents))
+
+        if contents and exchange and contents[-1].role == exchange[0].role:
+            # Consecutive same-role contents (e.g. only the history summary is left): merge them
+            return contents[:-1] + [types.Content(role=exchange[0].role, parts=contents[-1].parts + exchange[0].parts)] + exchange[1:]
+        return contents + exchange
+
+    def _compact_responses(self, content: types.Content, latest: bool) -> types.Content:
+        parts = []
+        for part in content.parts:
+            response = part.function_response
+            if response is None:
+                parts.append(part)
+                continue
+            result = (response.response or {}).get("result", response.response)
+            compacted = self.tool_output(result, latest)
+            if compacted is result:
+                parts.append(part)
+            else:
+                parts.append(types.Part(function_response=types.FunctionResponse(
+                    id=response.id, name=response.name, response={"result": compacted}
+                )))
+        return types.Content(role=content.role, parts=parts)
@@ -0,0 +1,155 @@
+import logging
+from typing import Dict, List, Optional, Union
+
+from google.genai import types
+
+from core.cache import TTLCache
+from core.config import settings
+from core.database import run_db
+from services.persistence import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+CONVERSATIONS_TABLE = "agent_conversations"
+
+# Client history [{role, content}] (legacy requests) or stored native contents
+History = List[Union[Dict[str, str], types.Content]]
+
+
+def to_contents(history: Optional[History]) -> List[types.Content]:
+    """
+    Gemini contents of a history. Client messages become text contents ("assistant" -> "model").
+    """
+    return [
+        msg if isinstance(msg, types.Content) else
+        types.Content(role="user" if msg.get("role") == "user" else "model", parts=[types.Part(text=msg.get("content", ""))])
+        for msg in history or []
+    ]
+
+
+def to_messages(history: Optional[History]) -> List[Dict[str, str]]:
+    """
+    Text messages [{role, content}] of a history (thoughts and tool-only turns are skipped).
+    """
+    messages = []
+    for msg in history or []:
+        if not isinstance(msg, types.Content):
+            messages.append(msg)
+            continue
+        text = "".join(part.text for part in msg.parts or [] if part.text and not part.thought)
+        if text:
+            messages.append({"role": "user" if msg.role == "user" else "assistant", "content": text})
+    return messages
+
+
+async def history_required(agent: str, conversation_id: Optional[str], history: Optional[History]) -> bool:
+    """
+    True if a request relies on a stored history the server does not have (restart, TTL, eviction,
+    another worker): the client must resend the conversation. New conversations send `history: []`.
+    """
+    return history is None and bool(conversation_id) and await get_conversation_store().load(agent, conversation_id) is None
+
+
+def starts_turn(content: types.Content) -> bool:
+    # A user message (not a function response): history can be cut before it
+    return content.role == "user" and not any(part.function_response for part in content.parts or [])
+
+
+def complete_exchange(exchange: List[types.Content]) -> List[types.Content]:
+    """
+    Exchange without a trailing model turn whose function calls were never answered
+    (interrupted while its tools ran), so that the stored history stays replayable.
+    """
+    if exchange and exchange[-1].role == "model" and any(part.function_call for part in exchange[-1].parts or []):
+        return list(exchange[:-1])
+    return list(exchange)
+
+
+class ConversationStore:
+    """
+    Server-side conversation history, keyed by (agent, X-Conversation-ID).
+
+    Holds native Gemini contents (text, function calls and responses, thought signatures)
+    so clients only send the new message. On a miss, the routers answer 409 and the client
+    resends its local history (history_required). In-memory LRU with TTL, optionally backed by the
+    `agent_conversations` table (CONVERSATION_STORE_PERSIST) to survive restarts and be
+    shared between workers. Stored histories are capped at CONVERSATION_MAX_CONTENTS,
+    dropping whole exchanges from the start.
+    """
+
+    def __init__(self, supabase=None, persist: Optional[bool] = None):
+        self._cache = TTLCache(name="conversations", maxsize=settings.CONVERSATION_STORE_SIZE, ttl=settings.CONVERSATION_STORE_TTL)
+        self.supabase = supabase
+        self.persist = settings.CONVERSATION_STORE_PERSIST if persist is None else persist
+
+    async def load(self, agent: str, conversation_id: Optional[str]) -> Optional[List[types.Content]]:
+        """
+        Stored history of a conversation. None if unknown here (new, expired, evicted, or held by
+        another worker without persistence): the client then has to send its own history.
+        """
+        if not conversation_id:
+            return None
+        contents = self._cache.get((agent, conversation_id))
+        if contents is None and self._persistent():
+            try:
+                response = await run_db(
+                    self.supabase.table(CONVERSATIONS_TABLE).select("contents")
+                    .eq("agent", agent).eq("conversation_id", conversation_id).limit(1).execute
+                )
+                if response.data:
+                    contents = [types.Content.model_validate(c) for c in response.data[0]["contents"]]
+                    self._cache.set((agent, conversation_id), contents)
+            except Exception as e:
+                logger.error(f"Conversation store: failed to load {agent}/{conversation_id}: {e}")
+        return list(contents) if contents is not None else None
+
+    async def save(self, agent: str, conversation_id: Optional[str], contents: List[types.Content]):
+        if not conversation_id:
+            return
+        contents = self._trim(contents)
+        self._cache.set((agent, conversation_id), contents)
+        if self._persistent():
+            row = {
+                "agent": agent,
+                "conversation_id": conversation_id,
+                "contents": [c.model_dump(mode="json", exclude_none=True) for c in contents],
+            }
+            try:
+                await run_db(self.supabase.table(CONVERSATIONS_TABLE).upsert(row).execute)
+            except Exception as e:
+                logger.error(f"Conversation store: failed to persist {agent}/{conversation_id}: {e}")
+
+    async def delete(self, conversation_id: str):
+        """
+        Forgets a conversation for every agent.
+        """
+        self._cache.invalidate_matching(lambda key: key[1] == conversation_id)
+        if self._persistent():
+            try:
+                await run_db(self.supabase.table(CONVERSATIONS_TABLE).delete().eq("conversation_id", conversation_id).execute)
+            except Exception as e:
+                logger.error(f"Conversation store: failed to delete {conversation_id}: {e}")
+
+    def _persistent(self) -> bool:
+        if self.persist and self.supabase is None:
+            self.supabase = get_supabase_client()
+        return bool(self.persist and self.supabase)
+
+    @staticmethod
+    def _trim(contents: List[types.Content]) -> List[types.Content]:
+        excess = len(contents) - settings.CONVERSATION_MAX_CONTENTS
+        if excess <= 0:
+            return list(contents)
+        # Cut at the first user message past the excess: never between a call and its response
+        start = next((i for i in range(excess, len(contents)) if starts_turn(contents[i])), len(contents))
+        return list(contents[start:])
+
+
+_conversation_store: Optional[ConversationStore] = None
+
+
+def get_conversation_store() -> ConversationStore:
+    global _conversation_store
+    if _conversation_store is None:
+        _conversation_store = ConversationStore()
+    return _conversation_store
@@ -0,0 +1,48 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# supabase-py is synchronous: every `.execute()` is a blocking HTTP call.
+# Calling it directly inside an `async def` handler freezes the whole event loop
+# (other requests, SSE streams...). All DB work from async code goes through this
+# bounded pool instead, so a slow PostgREST call only occupies one worker thread.
+_db_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    global _db_executor
+    if _db_executor is None:
+        _db_executor = ThreadPoolExecutor(
+            max_workers=settings.DB_POOL_SIZE,
+            thread_name_prefix="supabase"
+        )
+    return _db_executor
+
+
+async def run_db(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Runs a synchronous DB-bound callable (service method, tool...) on the DB pool.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_db_executor(), functools.partial(fn, *args, **kwargs))
+
+
+async def execute_async(query) -> Any:
+    """
+    Awaitable equivalent of `query.execute()` for a supabase-py query builder.
+    """
+    return await run_db(query.execute)
+
+
+def shutdown_db_executor():
+    global _db_executor
+    if _db_executor is not None:
+        _db_executor.shutdown(wait=True)
+        _db_executor = None
+        logger.info("DB executor shut down")
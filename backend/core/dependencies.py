@@ -0,0 +1,60 @@
+import logging
+import threading
+from typing import Any, Callable, Dict
+
+from agents.agronome import AgronomeAgent
+from agents.bastouille_chef import BastouilleChef
+from agents.botanique import BotaniqueAgent
+from agents.culture import CultureAgent
+
+logger = logging.getLogger(__name__)
+
+# Agents are stateless per request (all per-request data is passed as arguments),
+# so each one is built once (LLM providers, Supabase client, services, tools)
+# and shared by every request through FastAPI `Depends`.
+_agents: Dict[str, Any] = {}
+_agents_lock = threading.Lock()
+
+
+def _get_or_create(key: str, factory: Callable[[], Any]) -> Any:
+    agent = _agents.get(key)
+    if agent is None:
+        with _agents_lock:
+            agent = _agents.get(key)
+            if agent is None:
+                agent = factory()
+                _agents[key] = agent
+    return agent
+
+
+def get_botanique_agent() -> BotaniqueAgent:
+    return _get_or_create("botanique", BotaniqueAgent)
+
+
+def get_culture_agent() -> CultureAgent:
+    return _get_or_create("culture", CultureAgent)
+
+
+def get_bastouille_chef() -> BastouilleChef:
+    return _get_or_create("bastouille_chef", BastouilleChef)
+
+
+def get_agronome_agent() -> AgronomeAgent:
+    return _get_or_create("agronome", AgronomeAgent)
+
+
+def init_agents():
+    """
+    Builds all agents at startup. A misconfigured agent (e.g. missing API key)
+    is logged and retried lazily on its first request instead of blocking startup.
+    """
+    for getter in (get_botanique_agent, get_culture_agent, get_bastouille_chef, get_agronome_agent):
+        try:
+            getter()
+        except Exception as e:
+            logger.error(f"Failed to initialize agent via {getter.__name__}: {e}")
+
+
+def reset_agents():
+    with _agents_lock:
+        _agents.clear()
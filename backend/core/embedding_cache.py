@@ -0,0 +1,189 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from cachetools import LRUCache
+
+from core.cache import register_cache
+from core.config import settings
+from core.database import run_db
+
+logger = logging.getLogger(__name__)
+
+
+def embedding_key(model: str, task_type: str, text: str) -> str:
+    """
+    Content address of an embedding: sha256 of (model, task_type, normalized text).
+    Normalization (NFC, collapsed whitespace) doesn't change what the model sees in practice.
+    Model and task names are canonicalized so both SDK spellings share entries
+    ("models/text-embedding-004" / "retrieval_document" == "text-embedding-004" / "RETRIEVAL_DOCUMENT").
+    """
+    normalized = " ".join(unicodedata.normalize("NFC", text or "").split())
+    model = model.removeprefix("models/")
+    task_type = (task_type or "").upper()
+    return hashlib.sha256(f"{model}\x1f{task_type}\x1f{normalized}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Two-level embedding cache: in-memory LRU in front of a local SQLite file.
+    Embeddings are deterministic for a given (model, task_type, text), so entries never expire.
+    Vectors are stored as float32 blobs.
+
+    The SQLite file is opened on first use. Async callers use aget / aset: memory hits are
+    served inline, SQLite reads and writes run on the DB pool instead of the event loop.
+    """
+
+    def __init__(self, name: str = "embeddings", maxsize: int = None, path: Optional[str] = None):
+        self.name = name
+        self._path = path
+        self._memory = LRUCache(maxsize=maxsize or settings.EMBEDDING_CACHE_SIZE)
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._opened = False
+
+        # Metrics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        register_cache(self)
+
+    @property
+    def path(self) -> str:
+        return self._path if self._path is not None else settings.EMBEDDING_CACHE_PATH
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        # Called under self._lock
+        if not self._opened:
+            self._opened = True
+            if self.path:
+                try:
+                    self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                    self._db.execute("PRAGMA journal_mode=WAL")
+                    self._db.execute("""
+                        CREATE TABLE IF NOT EXISTS embeddings (
+                            key TEXT PRIMARY KEY,
+                            model TEXT NOT NULL,
+                            task_type TEXT,
+                            dim INTEGER NOT NULL,
+                            vector BLOB NOT NULL,
+                            created_at REAL NOT NULL
+                        )
+                    """)
+                except sqlite3.Error as e:
+                    logger.error(f"Embedding cache: SQLite unavailable at {self.path}, memory only: {e}")
+                    self._db = None
+        return self._db
+
+    def _on_disk(self, key: Optional[str] = None) -> bool:
+        # True when serving `key` (or writing) may touch SQLite
+        with self._lock:
+            if key is not None and key in self._memory:
+                return False
+            return bool(self._db is not None or (not self._opened and self.path))
+
+    def get(self, model: str, task_type: str, text: str) -> Optional[List[float]]:
+        key = embedding_key(model, task_type, text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self.memory_hits += 1
+                return list(vector)
+
+            db = self._connection()
+            if db is not None:
+                try:
+                    row = db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+                except sqlite3.Error as e:
+                    logger.error(f"Embedding cache read failed: {e}")
+                    row = None
+                if row:
+                    vector = array("f", row[0])
+                    self._memory[key] = vector
+                    self.disk_hits += 1
+                    return list(vector)
+
+            self.misses += 1
+            return None
+
+    def set(self, model: str, task_type: str, text: str, vector: List[float]):
+        if not vector:
+            return
+        key = embedding_key(model, task_type, text)
+        packed = array("f", vector)
+        with self._lock:
+            self._memory[key] = packed
+            db = self._connection()
+            if db is not None:
+                try:
+                    db.execute(
+                        "INSERT OR REPLACE INTO embeddings (key, model, task_type, dim, vector, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                        (key, model, task_type, len(packed), packed.tobytes(), time.time())
+                    )
+                except sqlite3.Error as e:
+                    logger.error(f"Embedding cache write failed: {e}")
+
+    async def aget(self, model: str, task_type: str, text: str) -> Optional[List[float]]:
+        if not self._on_disk(embedding_key(model, task_type, text)):
+            return self.get(model, task_type, text)
+        return await run_db(self.get, model, task_type, text)
+
+    async def aget_many(self, model: str, task_type: str, texts: List[str]) -> List[Optional[List[float]]]:
+        if not any(self._on_disk(embedding_key(model, task_type, t)) for t in texts):
+            return [self.get(model, task_type, t) for t in texts]
+        return await run_db(lambda: [self.get(model, task_type, t) for t in texts])
+
+    async def aset(self, model: str, task_type: str, text: str, vector: List[float]):
+        if not self._on_disk():
+            return self.set(model, task_type, text, vector)
+        await run_db(self.set, model, task_type, text, vector)
+
+    async def aset_many(self, model: str, task_type: str, items: List[Tuple[str, List[float]]]):
+        if not self._on_disk():
+            for text, vector in items:
+                self.set(model, task_type, text, vector)
+            return
+        await run_db(lambda: [self.set(model, task_type, text, vector) for text, vector in items])
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            db = self._connection()
+            if db is not None:
+                db.execute("DELETE FROM embeddings")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            persisted = None
+            if self._db is not None:
+                try:
+                    persisted = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                except sqlite3.Error:
+                    pass
+            return {
+                "name": self.name,
+                "size": len(self._memory),
+                "persisted": persisted,
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 3) if total else 0.0
+            }
+
+
+# Global Accessor
+_embedding_cache = None
+def get_embedding_cache() -> EmbeddingCache:
+    global _embedding_cache
+    if not _embedding_cache:
+        _embedding_cache = EmbeddingCache()
+    return _embedding_cache
@@ -2,17 +2,140 @@ import time
 import logging
 import json
 import asyncio
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, List, Union, AsyncIterator
 from google import genai
 from google.genai import types
 from datetime import datetime
 
 from core.config import settings
-from services.persistence import get_supabase_client
+from core.log_sink import get_llm_log_sink
+from core.embedding_cache import get_embedding_cache, embedding_key
 
 logger = logging.getLogger(__name__)
 
+class GeminiStream:
+    """
+    Streamed generate_content call (see GeminiClient.generate_content_stream).
+
+    Iterating yields parts as they arrive: text deltas and complete function-call parts.
+    Once exhausted, `parts` holds the assembled model turn (consecutive text deltas merged,
+    function calls and thought signatures kept) ready to be appended to the history,
+    and `usage_metadata` the final token counts.
+    The call is logged to llm_logs when the stream ends (completed, failed or closed).
+    """
+
+    def __init__(self, gemini: "GeminiClient", model: str, contents, config, agent_name, trace_id, conversation_id):
+        self._gemini = gemini
+        self.model = model
+        self.contents = contents
+        self.config = config
+        self.agent_name = agent_name
+        self.trace_id = trace_id
+        self.conversation_id = conversation_id
+
+        self.parts: List[types.Part] = []
+        self.usage_metadata: Optional[types.GenerateContentResponseUsageMetadata] = None
+        self.finish_reason = None
+        self.first_token_ms: Optional[int] = None
+        self._iterator = None
+
+    @property
+    def function_calls(self) -> List[types.FunctionCall]:
+        return [part.function_call for part in self.parts if part.function_call]
+
+    @property
+    def text(self) -> str:
+        return "".join(part.text for part in self.parts if part.text and not part.thought)
+
+    def __aiter__(self) -> AsyncIterator[types.Part]:
+        if self._iterator is None:
+            self._iterator = self._iterate()
+        return self._iterator
+
+    async def aclose(self):
+        if self._iterator is not None:
+            await self._iterator.aclose()
+
+    def _assemble(self, part: types.Part):
+        last = self.parts[-1] if self.parts else None
+        if (last is not None and part.text is not None and last.text is not None
+                and not part.function_call and not last.function_call
+                and bool(part.thought) == bool(last.thought)):
+            merged = last.model_copy()
+            merged.text = last.text + part.text
+            merged.thought_signature = part.thought_signature or last.thought_signature
+            self.parts[-1] = merged
+        else:
+            self.parts.append(part)
+
+    async def _iterate(self) -> AsyncIterator[types.Part]:
+        start_time = time.time()
+        error_msg = None
+        stream = None
+        try:
+            stream = await self._gemini.client.aio.models.generate_content_stream(
+                model=self.model,
+                contents=self.contents,
+                config=self.config
+            )
+            async for chunk in stream:
+                if chunk.usage_metadata:
+                    self.usage_metadata = chunk.usage_metadata
+                if not chunk.candidates:
+                    continue
+                candidate = chunk.candidates[0]
+                if candidate.finish_reason:
+                    self.finish_reason = candidate.finish_reason
+                if not candidate.content or not candidate.content.parts:
+                    continue
+
+                for part in candidate.content.parts:
+                    self._assemble(part)
+                    # Signature-only / empty parts are kept for the history but not forwarded
+                    if part.text or part.function_call:
+                        if self.first_token_ms is None:
+                            self.first_token_ms = int((time.time() - start_time) * 1000)
+                        yield part
+
+        except (GeneratorExit, asyncio.CancelledError):
+            # Consumer stopped early (client disconnected)
+            error_msg = "Stream closed before completion"
+            raise
+        except Exception as e:
+            error_msg = str(e)
+            raise e
+        finally:
+            if stream is not None and hasattr(stream, "aclose"):
+                try:
+                    await stream.aclose()
+                except Exception:
+                    pass
+
+            usage = self.usage_metadata
+            self._gemini._log_to_db(
+                agent_name=self.agent_name,
+                trace_id=self.trace_id,
+                conversation_id=self.conversation_id,
+                method="generate_content_stream",
+                duration=int((time.time() - start_time) * 1000),
+                in_tok=(usage.prompt_token_count or 0) if usage else 0,
+                out_tok=(usage.candidates_token_count or 0) if usage else 0,
+                inp={
+                    "contents": str(self.contents)[:5000], # Truncate if huge
+                    "config": str(self.config) if self.config else None
+                },
+                out={
+                    "text": self.text or None,
+                    "function_calls": [fc.name for fc in self.function_calls],
+                    "first_token_ms": self.first_token_ms
+                },
+                err=error_msg,
+                model_used=self.model
+            )
+
+
 class GeminiClient:
+    EMBEDDING_MODEL = "text-embedding-004"
     _instance = None
     
     def __new__(cls):
@@ -31,7 +154,8 @@ class GeminiClient:
         # Initialize Native Client
         self.client = genai.Client(api_key=settings.GEMINI_API_KEY)
         self.model_name = settings.GEMINI_MODEL_NAME or "gemini-2.0-flash-exp" # Default to latest efficient model
-        self.supabase = get_supabase_client()
+        self.log_sink = get_llm_log_sink()
+        self.embedding_cache = get_embedding_cache()
         self._initialized = True
         
         logger.info(f"GeminiClient initialized with model: {self.model_name}")
@@ -105,8 +229,8 @@ class GeminiClient:
                 "config": str(config) if config else None
             }
             
-            # Log synchronously to ensure persistence
-            await self._log_to_db(
+            # Queued on the write-behind sink (no DB round-trip on the turn)
+            self._log_to_db(
                 agent_name=agent_name,
                 trace_id=trace_id,
                 conversation_id=conversation_id,
@@ -120,10 +244,31 @@ class GeminiClient:
                 model_used=effective_model
             )
 
-    async def _log_to_db(self, agent_name, trace_id, conversation_id, method, duration, in_tok, out_tok, inp, out, err, model_used=None):
-        if not self.supabase:
-            return
-            
+    def generate_content_stream(self,
+                                contents: Union[str, List[Any]],
+                                config: Optional[types.GenerateContentConfig] = None,
+                                agent_name: str = "Unknown",
+                                trace_id: Optional[str] = None,
+                                conversation_id: Optional[str] = None,
+                                model: Optional[str] = None) -> GeminiStream:
+        """
+        Streaming counterpart of generate_content (client.aio.models.generate_content_stream).
+        Usage:
+            async with contextlib.aclosing(client.generate_content_stream(...)) as stream:
+                async for part in stream: ...
+            stream.parts / stream.function_calls / stream.usage_metadata
+        """
+        return GeminiStream(
+            self,
+            model=model or self.model_name,
+            contents=contents,
+            config=config,
+            agent_name=agent_name,
+            trace_id=trace_id,
+            conversation_id=conversation_id
+        )
+
+    def _log_to_db(self, agent_name, trace_id, conversation_id, method, duration, in_tok, out_tok, inp, out, err, model_used=None):
         try:
             payload = {
                 "agent_name": agent_name,
@@ -139,35 +284,108 @@ class GeminiClient:
                 "error_message": err,
                 "created_at": datetime.utcnow().isoformat()
             }
-            # We use a separate task, so we await here but it's detached from main flow
-            self.supabase.table("llm_logs").insert(payload).execute()
+            self.log_sink.enqueue(payload)
         except Exception as e:
-            logger.error(f"Failed to write llm_logs: {e}")
+            logger.error(f"Failed to queue llm_logs: {e}")
 
-    async def embed_content(self, text: str) -> List[float]:
+    async def embed_content(self, text: str, task_type: str = "SEMANTIC_SIMILARITY") -> List[float]:
         """
-        Generate embedding for the given text using gemini-embedding-001.
+        Generate embedding for the given text using text-embedding-004.
+        Served from the embedding cache when the same text was already embedded.
         """
+        model = self.EMBEDDING_MODEL
+        cached = await self.embedding_cache.aget(model, task_type, text)
+        if cached is not None:
+            return cached
+
         try:
             # Execute Call
             response = await self.client.aio.models.embed_content(
-                model="text-embedding-004",
+                model=model,
                 contents=text,
                 config=types.EmbedContentConfig(
-                    task_type="SEMANTIC_SIMILARITY"
+                    task_type=task_type
                 )
             )
             
             # Extract embedding vector
             # Response structure has embeddings list
             if response.embeddings:
-                return response.embeddings[0].values
+                vector = response.embeddings[0].values
+                await self.embedding_cache.aset(model, task_type, text, vector)
+                return vector
             return []
             
         except Exception as e:
             logger.error(f"Failed to generate embedding: {e}")
             raise e
 
+    def embed_content_sync(self, text: str, task_type: str = "SEMANTIC_SIMILARITY") -> List[float]:
+        """
+        Blocking variant of embed_content for sync code running on the DB pool (tools, services).
+        Shares the embedding cache.
+        """
+        model = self.EMBEDDING_MODEL
+        cached = self.embedding_cache.get(model, task_type, text)
+        if cached is not None:
+            return cached
+
+        try:
+            response = self.client.models.embed_content(
+                model=model,
+                contents=text,
+                config=types.EmbedContentConfig(
+                    task_type=task_type
+                )
+            )
+            if response.embeddings:
+                vector = response.embeddings[0].values
+                self.embedding_cache.set(model, task_type, text, vector)
+                return vector
+            return []
+
+        except Exception as e:
+            logger.error(f"Failed to generate embedding: {e}")
+            raise e
+
+    async def embed_contents(self, texts: List[str], task_type: str = "SEMANTIC_SIMILARITY") -> List[List[float]]:
+        """
+        Batch version of embed_content: cache misses are embedded in a single API call
+        (at most 100 texts per call). Returns one vector per text, in order.
+        """
+        model = self.EMBEDDING_MODEL
+        vectors: List[Optional[List[float]]] = await self.embedding_cache.aget_many(model, task_type, texts)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if not missing:
+            return vectors
+
+        try:
+            response = await self.client.aio.models.embed_content(
+                model=model,
+                contents=[texts[i] for i in missing],
+                config=types.EmbedContentConfig(
+                    task_type=task_type
+                )
+            )
+        except Exception as e:
+            logger.error(f"Failed to generate embeddings batch ({len(missing)} texts): {e}")
+            raise e
+
+        embeddings = response.embeddings or []
+        if len(embeddings) != len(missing):
+            raise RuntimeError(f"Embedding batch returned {len(embeddings)} vectors for {len(missing)} texts")
+
+        for i, embedding in zip(missing, embeddings):
+            vectors[i] = embedding.values
+        await self.embedding_cache.aset_many(model, task_type, [(texts[i], vectors[i]) for i in missing])
+        return vectors
+
+    def embedding_source_hash(self, text: str, task_type: str = "SEMANTIC_SIMILARITY") -> str:
+        """
+        Hash stored next to a vector column: the row is stale when its text, the model or the task changes.
+        """
+        return embedding_key(self.EMBEDDING_MODEL, task_type, text)
+
 # Global Accessor
 _gemini_client = None
 def get_gemini_client():
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional
+
+from core.config import settings
+from core.database import run_db
+from services.persistence import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class LLMLogSink:
+    """
+    Write-behind sink for the llm_logs table.
+
+    Rows are pushed on a bounded in-memory queue (non-blocking for the caller) and
+    drained by a background asyncio task that bulk-inserts them in batches.
+    A batch is flushed when it reaches `batch_size` rows or when `flush_interval`
+    seconds have elapsed since its first row.
+    Under backpressure (queue full) or when the insert fails, rows are appended to a
+    local JSONL spill file, or dropped if no spill file is configured.
+    """
+
+    def __init__(self,
+                 supabase=None,
+                 max_queue: int = None,
+                 batch_size: int = None,
+                 flush_interval: float = None,
+                 spill_path: Optional[str] = None):
+        self.supabase = supabase
+        self.max_queue = max_queue or settings.LLM_LOG_QUEUE_SIZE
+        self.batch_size = batch_size or settings.LLM_LOG_BATCH_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else settings.LLM_LOG_FLUSH_INTERVAL
+        self.spill_path = spill_path if spill_path is not None else settings.LLM_LOG_SPILL_PATH
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # Metrics
+        self.written = 0
+        self.spilled = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """
+        Starts the background writer on the running event loop (idempotent).
+        """
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._stopping = False
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(f"LLM log sink started (batch={self.batch_size}, interval={self.flush_interval}s)")
+
+    def enqueue(self, row: Dict[str, Any]):
+        """
+        Queues a row for insertion. Never blocks and never raises.
+        """
+        if not self.supabase:
+            return
+
+        if not self.running and not self._stopping:
+            try:
+                self.start()
+            except RuntimeError:
+                # No running loop (sync script): write-through
+                try:
+                    self._insert([row])
+                except Exception as e:
+                    logger.error(f"Failed to write llm_logs: {e}")
+                    self._spill([row])
+                return
+
+        if self._stopping:
+            self._spill([row])
+            return
+
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self._spill([row])
+
+    async def stop(self, timeout: float = 10.0):
+        """
+        Flushes pending rows and stops the background writer (FastAPI shutdown).
+        """
+        if not self.running:
+            return
+        self._stopping = True
+        try:
+            await asyncio.wait_for(self._queue.put(_STOP), timeout)
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logger.error("LLM log sink did not flush in time, spilling pending rows.")
+            self._task.cancel()
+            self._spill(self._drain())
+        logger.info(f"LLM log sink stopped (written={self.written}, spilled={self.spilled}, dropped={self.dropped})")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self._queue.qsize() if self._queue else 0,
+            "written": self.written,
+            "spilled": self.spilled,
+            "dropped": self.dropped
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Dict[str, Any]] = []
+            stop = False
+
+            # Wait (without deadline) for the first row of the batch
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            batch.append(item)
+            deadline = loop.time() + self.flush_interval
+
+            # Fill the batch until size or time limit
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            await self._write(batch)
+            if stop:
+                return
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        try:
+            await run_db(self._insert, batch)
+        except Exception as e:
+            logger.error(f"Failed to write llm_logs batch ({len(batch)} rows): {e}")
+            self._spill(batch)
+
+    def _insert(self, batch: List[Dict[str, Any]]):
+        self.supabase.table("llm_logs").insert(batch).execute()
+        self.written += len(batch)
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        rows = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP:
+                rows.append(item)
+        return rows
+
+    def _spill(self, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+        if not self.spill_path:
+            self.dropped += len(rows)
+            return
+        try:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, default=str, ensure_ascii=False) + "\n")
+            self.spilled += len(rows)
+        except Exception as e:
+            logger.error(f"Failed to spill llm_logs rows: {e}")
+            self.dropped += len(rows)
+
+
+# Global Accessor
+_llm_log_sink = None
+def get_llm_log_sink() -> LLMLogSink:
+    global _llm_log_sink
+    if not _llm_log_sink:
+        _llm_log_sink = LLMLogSink(supabase=get_supabase_client())
+    return _llm_log_sink
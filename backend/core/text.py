@@ -0,0 +1,50 @@
+import re
+import unicodedata
+from typing import List, Set
+
+# Frequent French words that carry no meaning for plant lookup
+STOPWORDS = {
+    "de", "du", "des", "la", "le", "les", "un", "une", "et", "ou", "en", "au", "aux",
+    "a", "d", "l", "j", "ai", "je", "mes", "mon", "ma", "pour", "sur", "avec", "dans"
+}
+
+_LIGATURES = str.maketrans({"œ": "oe", "Œ": "oe", "æ": "ae", "Æ": "ae"})
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def fold(text: str) -> str:
+    """
+    Lowercases and strips accents/ligatures: "Cœur de Bœuf Élégant" -> "coeur de boeuf elegant".
+    """
+    if not text:
+        return ""
+    text = text.translate(_LIGATURES)
+    normalized = unicodedata.normalize("NFD", text)
+    return "".join(c for c in normalized if not unicodedata.combining(c)).lower()
+
+
+def singular(token: str) -> str:
+    """
+    Naive French singular (tomates -> tomate, choux -> chou). Applied to both sides of a match.
+    """
+    if len(token) > 3 and token[-1] in ("s", "x"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Accent-folded, singularized tokens without stopwords.
+    """
+    return [singular(t) for t in _TOKEN_RE.findall(fold(text)) if t not in STOPWORDS]
+
+
+def trigrams(tokens: List[str]) -> Set[str]:
+    """
+    pg_trgm-style character trigrams (each word padded "  word "), for typo tolerant matching.
+    """
+    grams = set()
+    for token in tokens:
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
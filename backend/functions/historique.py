@@ -11,15 +11,10 @@ def historique(tracking_id: Optional[str] = None, limit: int = 10) -> List[Dict[
     
     internal_id = None
     if tracking_id:
-        # Resolve ID from Tracking ID
-        # Optimization: Fetch only ID? service.list_subjects() fetches all. 
-        # Ideally we add get_subject_by_tracking_id to service.
-        # For now reusing pattern:
-        all_subjects = service.list_subjects()
-        target = next((s for s in all_subjects if s.tracking_id == tracking_id), None)
-        if not target:
+        # Resolve ID from Tracking ID (indexed lookup, cached)
+        internal_id = service.resolve_subject_id(tracking_id)
+        if not internal_id:
             return [{"error": f"Sujet '{tracking_id}' introuvable."}]
-        internal_id = target.id
     
     events = service.list_events(limit=limit, subject_id=internal_id)
     
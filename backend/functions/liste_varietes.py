@@ -1,6 +1,7 @@
 from typing import Dict, List, Any
 from google.genai import types
 from services.persistence import get_supabase_client
+from services.catalog_index import get_catalog_index, PLANTS_CATALOG
 
 # -- Tool Implementation --
 def liste_varietes(limit: int = 50) -> List[Dict[str, Any]]:
@@ -8,6 +9,13 @@ def liste_varietes(limit: int = 50) -> List[Dict[str, Any]]:
     Récupère la liste des variétés botaniques disponibles dans le système.
     Utile pour connaître les plantes supportées (Tomates, Radis, etc.).
     """
+    index = get_catalog_index(PLANTS_CATALOG)
+    if index is not None:
+        return [
+            {"id": p["id"], "nom_commun": p["nom_commun"], "variete": p.get("variete"), "espece": p.get("espece")}
+            for p in index.rows(limit=limit, order_by="nom_commun")
+        ]
+
     supabase = get_supabase_client()
     if not supabase:
         return []
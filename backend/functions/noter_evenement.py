@@ -12,8 +12,7 @@ def noter_evenement(tracking_id: str, action: str, observation: str = "", quanti
     service = OperationsService()
     
     # 1. Resolve Subject
-    all_subjects = service.list_subjects()
-    subject = next((s for s in all_subjects if s.tracking_id == tracking_id), None)
+    subject = service.get_subject_by_tracking_id(tracking_id)
     
     if not subject:
         return {"error": f"Sujet introuvable avec ID: {tracking_id}"}
@@ -1,13 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from core.database import shutdown_db_executor
+from core.log_sink import get_llm_log_sink
+from services.persistence import init_supabase_client, close_supabase_client
+from core.dependencies import init_agents
+from services.llm import close_ollama_http_client
+from services.vector_index import start_vector_index_refresher, stop_vector_index_refresher
+from services.catalog_index import start_catalog_index_refresher, stop_catalog_index_refresher
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup
+    init_supabase_client()
+    get_llm_log_sink().start()
+    init_agents()
+    start_vector_index_refresher()
+    start_catalog_index_refresher()
+    yield
+    # Shutdown: flush pending llm_logs rows
+    await get_llm_log_sink().stop()
+    await stop_vector_index_refresher()
+    await stop_catalog_index_refresher()
+    shutdown_db_executor()
+    close_supabase_client()
+    await close_ollama_http_client()
+
 app = FastAPI(
     title="Bastouille Intelligence Service",
     description="Microservice Python pour les tâches à forte valeur cognitive",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 from routers import agents, plantes, admin, referentiel, operations, bastouille, agronome, botanique_fiches
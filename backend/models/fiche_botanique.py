@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from uuid import UUID
@@ -11,7 +11,8 @@ class FicheBotaniqueDB(BaseModel):
     nom: str
     created_at: Optional[datetime]
     updated_at: Optional[datetime]
-    embedding_nom: Optional[List[float]] = None
+    # Internal only: never serialized in API responses (768 floats)
+    embedding_nom: Optional[List[float]] = Field(default=None, exclude=True)
     similarity: Optional[float] = None
     
     model_config = ConfigDict(from_attributes=True)
@@ -1,4 +1,11 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Depends
+from supabase import Client
+from core.cache import get_cache_stats
+from core.conversations import get_conversation_store
+from core.database import execute_async
+from services.agent_config import invalidate_prompt_cache
+from services.persistence import get_db
 from services.traceability import TraceabilityService
 
 router = APIRouter(
@@ -13,24 +20,21 @@ async def get_agent_logs(limit: int = 50, offset: int = 0):
     return await traceability_service.get_logs(limit, offset)
 
 @router.get("/llm_logs")
-async def get_llm_logs(limit: int = 50, offset: int = 0, conversation_id: str = None):
+async def get_llm_logs(limit: int = 50, offset: int = 0, conversation_id: str = None, supabase: Client = Depends(get_db)):
     """
     Récupère les logs techniques (low-level) de la table llm_logs.
     """
-    from services.persistence import get_supabase_client
-    supabase = get_supabase_client()
-    
     query = supabase.table("llm_logs").select("*").order("created_at", desc=True)
     
     if conversation_id:
         query = query.eq("conversation_id", conversation_id)
         
-    res = query.range(offset, offset + limit - 1).execute()
+    res = await execute_async(query.range(offset, offset + limit - 1))
         
     return res.data if res.data else []
 
 @router.get("/conversations")
-async def get_conversations(limit: int = 50):
+async def get_conversations(limit: int = 50, supabase: Client = Depends(get_db)):
     """
     Récupère la liste des conversations uniques depuis les logs.
     Grouping by conversation_id. Note: Supabase doesn't support complex GROUP BY/Aggregation easily via JS client?
@@ -43,16 +47,13 @@ async def get_conversations(limit: int = 50):
     Actually, let's keep it simple: Select conversation_id, created_at from llm_logs order by created_at desc.
     Then deduplicate in Python.
     """
-    from services.persistence import get_supabase_client
-    supabase = get_supabase_client()
-    
     # Fetch recent logs (enough to cover recent sessions)
     # We select specific columns to minimize data transfer
-    res = supabase.table("llm_logs")\
+    query = supabase.table("llm_logs")\
         .select("conversation_id, created_at, method_name, input_tokens, output_tokens")\
         .order("created_at", desc=True)\
-        .limit(500)\
-        .execute()
+        .limit(500)
+    res = await execute_async(query)
         
     logs = res.data if res.data else []
     
@@ -85,14 +86,28 @@ async def get_conversations(limit: int = 50):
     return list(conversations.values())[:limit]
 
 @router.delete("/conversations/{conversation_id}")
-async def delete_conversation(conversation_id: str):
+async def delete_conversation(conversation_id: str, supabase: Client = Depends(get_db)):
     """
-    Supprime tous les logs associés à une conversation.
+    Supprime tous les logs associés à une conversation, et son historique côté serveur.
     """
-    from services.persistence import get_supabase_client
-    supabase = get_supabase_client()
-    
     # Delete all logs with this conversation_id
-    res = supabase.table("llm_logs").delete().eq("conversation_id", conversation_id).execute()
+    res = await execute_async(supabase.table("llm_logs").delete().eq("conversation_id", conversation_id))
+    await get_conversation_store().delete(conversation_id)
     
     return {"status": "success", "deleted": True}
+
+@router.get("/cache/stats")
+async def get_caches_stats():
+    """
+    Statistiques des caches en mémoire (taille, hits, misses, hit rate).
+    """
+    return get_cache_stats()
+
+@router.post("/cache/prompts/invalidate")
+async def invalidate_prompts(agent_key: Optional[str] = None):
+    """
+    Invalide le cache des prompts (un agent ou tous).
+    À appeler après update_prompt.py ou une migration pour une prise en compte immédiate.
+    """
+    invalidate_prompt_cache(agent_key)
+    return {"status": "success", "agent_key": agent_key}
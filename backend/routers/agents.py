@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends, Request
 from pydantic import BaseModel
 from agents.botanique import BotaniqueAgent
+from core.dependencies import get_botanique_agent, get_culture_agent
 from schemas.agent import AgentResponse
 
 router = APIRouter(prefix="/agents", tags=["Agents"])
@@ -9,12 +10,11 @@ class AgentRequest(BaseModel):
     query: str
 
 @router.post("/botanique", response_model=AgentResponse)
-async def ask_botanique(request: AgentRequest):
+async def ask_botanique(request: AgentRequest, agent: BotaniqueAgent = Depends(get_botanique_agent)):
     """
     Interroge l'agent Botanique.
     """
     try:
-        agent = BotaniqueAgent()
         response = await agent.analyze(request.query)
         return response
     except ValueError as e:
@@ -23,6 +23,7 @@ async def ask_botanique(request: AgentRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 from agents.culture import CultureAgent
+from core.conversations import history_required
 from pydantic import BaseModel
 
 # The original router definition is updated to include the new parameters
@@ -37,21 +38,24 @@ from typing import List, Dict, Optional, Any
 
 class ChatRequest(BaseModel):
     query: str
-    history: Optional[List[Dict[str, str]]] = []
+    history: Optional[List[Dict[str, str]]] = None # Kept server-side per X-Conversation-ID; sent on a 409 or [] for a new chat
 
 @router.post("/culture/chat")
-async def chat_culture(request: ChatRequest):
+async def chat_culture(request: ChatRequest, fastapi_request: Request, agent: CultureAgent = Depends(get_culture_agent)):
     """
     Dialogue avec l'agent Chef de Culture (Streaming).
     Retourne un flux SSE (Server-Sent Events) de JSONs.
+    L'historique est conservé côté serveur (X-Conversation-ID) : seul le nouveau message est envoyé.
+    409 si le serveur ne connaît pas la conversation : le client renvoie son historique.
     """
+    conversation_id = fastapi_request.headers.get("X-Conversation-ID")
+    if await history_required(agent.conversation_key, conversation_id, request.history):
+        raise HTTPException(status_code=409, detail="Conversation inconnue : renvoyer l'historique")
     try:
-        agent = CultureAgent()
-        
         from fastapi.responses import StreamingResponse
         # Use chat_stream generator
         return StreamingResponse(
-            agent.chat_stream(request.query, request.history),
+            agent.chat_stream(request.query, request.history, conversation_id=conversation_id),
             media_type="text/event-stream"
         )
     except Exception as e:
@@ -1,8 +1,9 @@
 from typing import Optional
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Request, Depends
 from pydantic import BaseModel
 
 from agents.agronome import AgronomeAgent
+from core.dependencies import get_agronome_agent
 
 router = APIRouter(
     prefix="/agronome",
@@ -15,10 +16,8 @@ class AnalyzeRequestV1(BaseModel):
     question: str
 
 @router.post("/v1/analyze", response_model=FichePlant)
-async def analyze_v1(request: AnalyzeRequestV1, fastapi_request: Request):
-    from agents.agronome import AgronomeAgent
+async def analyze_v1(request: AnalyzeRequestV1, fastapi_request: Request, agent: AgronomeAgent = Depends(get_agronome_agent)):
     conversation_id = fastapi_request.headers.get("X-Conversation-ID")
-    agent = AgronomeAgent()
     try:
         # Returns FichePlant Pydantic model directly
         return await agent.analyze(request.question, conversation_id)
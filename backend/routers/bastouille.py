@@ -1,9 +1,11 @@
-from typing import List, Dict
-from fastapi import APIRouter, HTTPException, Request
+from typing import List, Dict, Optional
+from fastapi import APIRouter, HTTPException, Request, Depends
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from agents.bastouille_chef import BastouilleChef
+from core.conversations import history_required
+from core.dependencies import get_bastouille_chef
 
 router = APIRouter(
     prefix="/bastouille",
@@ -12,19 +14,21 @@ router = APIRouter(
 
 class ChatRequest(BaseModel):
     message: str
-    history: List[Dict[str, str]] = []
+    history: Optional[List[Dict[str, str]]] = None # Kept server-side per X-Conversation-ID; sent on a 409 or [] for a new chat
 
 @router.post("/chat")
-async def chat(request: ChatRequest, fastapi_request: Request):
+async def chat(request: ChatRequest, fastapi_request: Request, agent: BastouilleChef = Depends(get_bastouille_chef)):
     """
     Endpoint natif pour l'agent Baštouille (Gemini V2).
     Retourne un stream SSE (Server-Sent Events).
+    L'historique est conservé côté serveur (X-Conversation-ID) : seul le nouveau message est envoyé.
+    409 si le serveur ne connaît pas la conversation : le client renvoie son historique.
     """
     # Extract Conversation ID from headers (optional)
     conversation_id = fastapi_request.headers.get("X-Conversation-ID")
-    
-    agent = BastouilleChef()
-    
+    if await history_required(agent.conversation_key, conversation_id, request.history):
+        raise HTTPException(status_code=409, detail="Conversation inconnue : renvoyer l'historique")
+
     return StreamingResponse(
         agent.chat_stream(request.message, history=request.history, conversation_id=conversation_id),
         media_type="text/event-stream"
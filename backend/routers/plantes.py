@@ -1,8 +1,15 @@
+import logging
 from fastapi import APIRouter, HTTPException, status
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
+from core.config import settings
+from core.database import run_db
 from services.persistence import BotaniquePersistenceService
 from services.llm import get_llm_provider
+from services.lexical_embedder import embed_or_lexical
+from services.catalog_index import PLANTS_CATALOG
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/botanique",
@@ -36,7 +43,7 @@ async def save_plant(plant_input: Dict[str, Any]):
     """
     try:
         # Note: plant_input est le JSON complet (ReponseBotanique)
-        result = service.save_plant(plant_input)
+        result = await run_db(service.save_plant, plant_input)
         if not result:
             raise HTTPException(status_code=500, detail="Erreur inconnue lors de la sauvegarde (pas de résultat retourné)")
         return result
@@ -50,7 +57,7 @@ async def update_plant(plant_id: str, plant_input: Dict[str, Any]):
     Met à jour une fiche plante existante.
     """
     try:
-        result = service.update_plant(plant_id, plant_input)
+        result = await run_db(service.update_plant, plant_id, plant_input)
         if not result:
             raise HTTPException(status_code=404, detail="Plante non trouvée ou erreur mise à jour")
         return result
@@ -62,14 +69,14 @@ async def list_plants():
     """
     Liste toutes les plantes sauvegardées (résumé).
     """
-    return service.get_all_plants()
+    return await run_db(service.get_all_plants)
 
 @router.get("/plantes/summary")
 async def get_varieties_summary():
     """
     Retourne la liste textuelle formatée des variétés pour inclusion dans un prompt ou autre usage.
     """
-    text = service.get_all_varieties_summary()
+    text = await run_db(service.get_all_varieties_summary)
     return {"summary": text}
 
 @router.get("/plantes/{plant_id}")
@@ -77,7 +84,7 @@ async def get_plant(plant_id: str):
     """
     Récupère la fiche complète d'une plante.
     """
-    plant = service.get_plant_by_id(plant_id)
+    plant = await run_db(service.get_plant_by_id, plant_id)
     if not plant:
         raise HTTPException(status_code=404, detail="Plante non trouvée")
     return plant
@@ -87,7 +94,7 @@ async def delete_plant(plant_id: str):
     """
     Supprime une plante sauvegardée.
     """
-    success = service.delete_plant(plant_id)
+    success = await run_db(service.delete_plant, plant_id)
     if not success:
         raise HTTPException(status_code=404, detail="Plante non trouvée ou erreur suppression")
     return None
@@ -97,14 +104,20 @@ async def search_vector(search: SearchQuery):
     """
     Recherche sémantique par vecteur.
     Transforme la query en embedding (via LLM) puis cherche les plus proches voisins en base.
+    Sans embedding disponible (Ollama, panne API), repli sur des vecteurs lexicaux locaux.
     """
     try:
         # 1. Embed Query
         llm = get_llm_provider()
-        vector = await llm.embed_text(search.query)
+        vector, hits = await embed_or_lexical(
+            None if llm.local_embeddings else llm.embed_text,
+            PLANTS_CATALOG, search.query, search.limit, settings.LEXICAL_MATCH_THRESHOLD
+        )
+        if hits is not None:
+            return [{"id": id, **metadata, "similarity": score} for id, score, metadata in hits]
         
         # 2. Search DB
-        results = service.find_similar_plants_vector(vector, limit=search.limit)
+        results = await run_db(service.find_similar_plants_vector, vector, limit=search.limit)
         return results
         
     except Exception as e:
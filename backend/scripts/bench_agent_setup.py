@@ -0,0 +1,73 @@
+"""
+Benchmark: per-request agent setup overhead.
+
+Compares, for each agent:
+  - per-request: a fresh agent constructed for every request (previous router behaviour)
+  - injected: the long-lived instance resolved through core.dependencies (current behaviour)
+
+No LLM call is made; only construction / resolution is timed.
+Requires GEMINI_API_KEY (any value works, nothing is sent).
+Usage: python scripts/bench_agent_setup.py [--requests 200]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from agents.agronome import AgronomeAgent
+from agents.bastouille_chef import BastouilleChef
+from agents.botanique import BotaniqueAgent
+from agents.culture import CultureAgent
+from core import dependencies
+from services.persistence import init_supabase_client
+
+AGENTS = [
+    ("BotaniqueAgent", BotaniqueAgent, dependencies.get_botanique_agent),
+    ("CultureAgent", CultureAgent, dependencies.get_culture_agent),
+    ("BastouilleChef", BastouilleChef, dependencies.get_bastouille_chef),
+    ("AgronomeAgent", AgronomeAgent, dependencies.get_agronome_agent),
+]
+
+
+def time_calls(fn, n):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def fmt(samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    return f"mean={statistics.mean(samples):9.1f}us  p95={p95:9.1f}us"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    init_supabase_client()
+    dependencies.init_agents()
+
+    print(f"{args.requests} simulated requests per agent\n")
+    for name, factory, getter in AGENTS:
+        factory()  # warm imports / lazy module state
+        before = time_calls(factory, args.requests)
+        after = time_calls(getter, args.requests)
+        speedup = statistics.mean(before) / max(statistics.mean(after), 1e-9)
+        print(f"{name:16s} per-request: {fmt(before)}")
+        print(f"{'':16s} injected:    {fmt(after)}  (x{speedup:,.0f})")
+
+
+if __name__ == "__main__":
+    main()
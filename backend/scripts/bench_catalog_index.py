@@ -0,0 +1,113 @@
+"""
+Benchmark: in-memory CatalogIndex lookups vs the search_plants_trgm RPC.
+
+  - local: synthetic catalog of --rows plants (species x varieties), labelled queries with
+    plurals, missing accents and typos; reports build time, p50/p95 and top-1 accuracy
+  - rpc (--rpc): the labelled query set (scripts/data/plant_search_queries.json) against
+    Supabase, then the same queries on a CatalogIndex synced from the real catalog
+
+Usage: python scripts/bench_catalog_index.py [--rows 5000] [--queries 2000] [--rpc]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from core.config import settings
+from services.catalog_index import CatalogIndex, CatalogIndexSync, PLANTS_CATALOG
+
+SPECIES = ["Tomate", "Carotte", "Radis", "Laitue", "Courgette", "Haricot", "Pomme de terre", "Poivron",
+           "Aubergine", "Fève", "Épinard", "Basilic", "Fraise", "Oignon", "Persil", "Concombre",
+           "Potiron", "Pois", "Poireau", "Betterave", "Chou", "Céleri", "Melon", "Piment"]
+SYLLABLES = ["mar", "man", "de", "bel", "ro", "sa", "ga", "ri", "gue", "tte", "na", "tai", "se", "che",
+             "vre", "lon", "blan", "noi", "reine", "cœur", "bœuf", "dor", "ine", "ville"]
+QUERIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "plant_search_queries.json")
+
+
+def percentiles(samples_ms):
+    samples_ms = sorted(samples_ms)
+    p95 = samples_ms[max(int(len(samples_ms) * 0.95) - 1, 0)]
+    return f"p50={statistics.median(samples_ms):8.3f}ms  p95={p95:8.3f}ms"
+
+
+def synthetic_catalog(rows: int, rng: random.Random):
+    plants = []
+    for i in range(rows):
+        variete = " ".join("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+                           for _ in range(rng.randint(1, 2)))
+        plants.append({"id": str(i), "nom_commun": rng.choice(SPECIES), "variete": variete})
+    return plants
+
+
+def perturb(text: str, rng: random.Random) -> str:
+    # Lowercase, drop accents sometimes, pluralize, duplicate or drop one letter
+    text = text.lower()
+    if rng.random() < 0.5:
+        text = text.replace("é", "e").replace("è", "e").replace("œ", "oe")
+    words = text.split()
+    words[0] += "s" if rng.random() < 0.3 else ""
+    i = rng.randrange(len(words))
+    if len(words[i]) > 4:
+        pos = rng.randrange(1, len(words[i]) - 1)
+        words[i] = words[i][:pos] + (words[i][pos] if rng.random() < 0.5 else "") + words[i][pos + 1:]
+    return " ".join(words)
+
+
+def time_queries(search, queries):
+    samples, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--rpc", action="store_true", help="Also time the search_plants_trgm RPC (needs Supabase)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    plants = synthetic_catalog(args.rows, rng)
+    index = CatalogIndex(PLANTS_CATALOG, ("nom_commun", "variete"))
+    start = time.perf_counter()
+    index.upsert_many(plants)
+    print(f"Built index: {args.rows} plants, {len(index._grams)} trigrams in {time.perf_counter() - start:.2f}s\n")
+
+    targets = [rng.choice(plants) for _ in range(args.queries)]
+    queries = [perturb(f"{p['nom_commun']} {p['variete']}", rng) for p in targets]
+    samples, results = time_queries(
+        lambda q: index.search(q, limit=5, min_similarity=settings.PLANT_SEARCH_MIN_SIMILARITY), queries
+    )
+    top1 = sum(bool(rows) and rows[0]["id"] == p["id"] for rows, p in zip(results, targets)) / len(targets)
+    print(f"local search   {percentiles(samples)}  top1={top1:.3f}")
+
+    if args.rpc:
+        from services.persistence import get_supabase_client
+        supabase = get_supabase_client()
+        with open(QUERIES_PATH, "r", encoding="utf-8") as f:
+            labelled = [case["query"] for case in json.load(f)]
+        params = lambda q: {"query": q, "match_count": 5, "min_similarity": settings.PLANT_SEARCH_MIN_SIMILARITY}
+        samples, _ = time_queries(lambda q: supabase.rpc("search_plants_trgm", params(q)).execute(), labelled)
+        print(f"rpc (trgm)     {percentiles(samples)}")
+
+        sync = CatalogIndexSync(CatalogIndex(PLANTS_CATALOG, ("nom_commun", "variete")), "botanique_plantes",
+                                "id, nom_commun, variete, espece, updated_at", supabase=supabase)
+        sync.refresh()
+        samples, _ = time_queries(lambda q: sync.index.search(q, 5, settings.PLANT_SEARCH_MIN_SIMILARITY), labelled)
+        print(f"local (real)   {percentiles(samples)}  ({len(sync.index)} plants)")
+
+
+if __name__ == "__main__":
+    main()
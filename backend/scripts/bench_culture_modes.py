@@ -0,0 +1,130 @@
+"""
+Benchmark: CultureAgent native function calling vs the text protocol (PENSÉE / RÉPONSE + JSON block).
+
+Replays the recorded prompts (scripts/data/culture_prompts.json) through both modes and reports,
+per task: model turns, tool calls, prompt / completion tokens and end-to-end latency.
+"misses" counts text-mode turns that mention a tool without a parseable tool call, "leaks"
+answers whose chat text shows tool-call JSON (either mode).
+
+Write tools (create_subject, log_event) run as dry runs: nothing is written to the garden.
+Requires GEMINI_API_KEY and Supabase credentials (read tools, agent prompt).
+Usage: python scripts/bench_culture_modes.py [--repeat 1] [--modes native text]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from unittest.mock import patch
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from agents.culture import CultureAgent
+from agents.stream_parser import parse_tool_call
+from core.config import settings
+from services.persistence import init_supabase_client
+
+PROMPTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "culture_prompts.json")
+
+
+class TurnCounter:
+    """Wraps the agent's provider to count model turns (and text-mode parse misses)."""
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.supports_tools = llm.supports_tools
+        self.turns = 0
+        self.parse_misses = 0
+
+    async def generate_stream(self, prompt, system_prompt=None, usage=None):
+        self.turns += 1
+        chunks = []
+        async for chunk in self.llm.generate_stream(prompt, system_prompt=system_prompt, usage=usage):
+            chunks.append(chunk)
+            yield chunk
+        text = "".join(chunks)
+        if '"tool"' in text and parse_tool_call(text) is None:
+            self.parse_misses += 1
+
+    def tool_session(self, *args, **kwargs):
+        session = self.llm.tool_session(*args, **kwargs)
+        stream = session.stream
+
+        def counted_stream(usage=None):
+            self.turns += 1
+            return stream(usage=usage)
+
+        session.stream = counted_stream
+        return session
+
+
+def dry_run(name):
+    return lambda **args: f"Success (dry run): {name} {json.dumps(args, ensure_ascii=False)}"
+
+
+async def run_prompt(agent, case):
+    counter = TurnCounter(agent.llm)
+    agent.llm = counter
+    tool_calls = 0
+    message = []
+    start = time.perf_counter()
+    try:
+        with patch.object(agent.traceability, "log_interaction") as log_interaction:
+            async for line in agent.chat_stream(case["query"], case.get("history", [])):
+                event = json.loads(line) if line else {}
+                if event.get("type") == "step_start":
+                    tool_calls += 1
+                elif event.get("type") == "message_token":
+                    message.append(event["content"])
+    finally:
+        agent.llm = counter.llm
+    trace = log_interaction.call_args.kwargs
+    return {
+        "turns": counter.turns,
+        "tools": tool_calls,
+        "in_tok": trace["input_tokens"],
+        "out_tok": trace["output_tokens"],
+        "ms": (time.perf_counter() - start) * 1000,
+        "misses": counter.parse_misses,
+        "leaks": int("```json" in "".join(message) or parse_tool_call("".join(message)) is not None),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--modes", nargs="+", default=["native", "text"], choices=["native", "text"])
+    args = parser.parse_args()
+
+    init_supabase_client()
+    agent = CultureAgent()
+    agent.tools_map["create_subject"] = dry_run("create_subject")
+    agent.tools_map["log_event"] = dry_run("log_event")
+    with open(PROMPTS_PATH, "r", encoding="utf-8") as f:
+        cases = json.load(f)
+
+    columns = ("turns", "tools", "in_tok", "out_tok", "ms", "misses", "leaks")
+    totals = {}
+    print(f"{'task':18s} {'mode':7s} " + " ".join(f"{c:>8s}" for c in columns))
+    for case in cases:
+        for mode in args.modes:
+            with patch.object(settings, "CULTURE_NATIVE_TOOLS", mode == "native"):
+                runs = [await run_prompt(agent, case) for _ in range(args.repeat)]
+            row = {c: statistics.mean(r[c] for r in runs) for c in columns}
+            for c in columns:
+                totals.setdefault(mode, {}).setdefault(c, []).append(row[c])
+            print(f"{case['task']:18s} {mode:7s} " + " ".join(f"{row[c]:8.1f}" for c in columns))
+
+    print()
+    for mode, values in totals.items():
+        print(f"{'mean':18s} {mode:7s} " + " ".join(f"{statistics.mean(values[c]):8.1f}" for c in columns))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
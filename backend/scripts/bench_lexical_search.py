@@ -0,0 +1,76 @@
+"""
+Benchmark: offline lexical vector search (hashed character n-gram TF-IDF, services/lexical_embedder.py).
+
+Builds a LexicalIndex over a synthetic catalog of --rows plants and times single queries
+(featurization + sparse scoring), reporting p50/p95 and top-1 accuracy on perturbed names
+(lowercase, missing accents, plurals, one typo). No network, no model.
+
+Usage: python scripts/bench_lexical_search.py [--rows 2000] [--queries 2000] [--dim 8192]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from services.lexical_embedder import LexicalEmbedder, LexicalIndex
+
+SPECIES = ["Tomate", "Carotte", "Radis", "Laitue", "Courgette", "Haricot", "Pomme de terre", "Poivron",
+           "Aubergine", "Fève", "Épinard", "Basilic", "Fraise", "Oignon", "Persil", "Concombre"]
+SYLLABLES = ["mar", "man", "de", "bel", "ro", "sa", "ga", "ri", "gue", "tte", "na", "tai", "se", "che",
+             "vre", "lon", "blan", "noi", "reine", "cœur", "bœuf", "dor", "ine", "ville"]
+
+
+def perturb(text: str, rng: random.Random) -> str:
+    text = text.lower().replace("é", "e").replace("è", "e").replace("œ", "oe")
+    words = text.split()
+    words[0] += "s" if rng.random() < 0.3 else ""
+    i = rng.randrange(len(words))
+    if len(words[i]) > 4:
+        pos = rng.randrange(1, len(words[i]) - 1)
+        words[i] = words[i][:pos] + words[i][pos + 1:]
+    return " ".join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=8192)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    plants = []
+    for i in range(args.rows):
+        variete = " ".join("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+                           for _ in range(rng.randint(1, 2)))
+        plants.append((str(i), f"{rng.choice(SPECIES)} {variete}", {}))
+
+    index = LexicalIndex(LexicalEmbedder(dim=args.dim))
+    start = time.perf_counter()
+    index.build(plants)
+    print(f"Built lexical index: {args.rows} rows, dim {args.dim} in {(time.perf_counter() - start) * 1000:.0f}ms\n")
+
+    targets = [rng.choice(plants) for _ in range(args.queries)]
+    queries = [perturb(text, rng) for _, text, _ in targets]
+    samples, hits = [], 0
+    for (id, _, _), query in zip(targets, queries):
+        start = time.perf_counter()
+        results = index.search(query, k=5)
+        samples.append((time.perf_counter() - start) * 1e6)
+        hits += bool(results) and results[0][0] == id
+
+    samples.sort()
+    p95 = samples[max(int(len(samples) * 0.95) - 1, 0)]
+    print(f"search  p50={statistics.median(samples):7.1f}us  p95={p95:7.1f}us  top1={hits / len(targets):.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: plant lookup quality and latency on a labelled query set (real catalog).
+
+  - legacy: first-word ILIKE + Python word-overlap ranking (previous rechercher/search_garden)
+  - trigram: search_plants_trgm RPC (PlantSearchService, lexical only)
+  - hybrid: trigram + embedding rankings fused by reciprocal rank
+
+Reports top-1 accuracy, MRR@5 and p50/p95 latency per strategy.
+Queries: scripts/data/plant_search_queries.json ({"query", "expected": {"nom_commun", "variete"?}}).
+
+Usage: python scripts/bench_plant_search.py [--queries path] [--no-hybrid]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import unicodedata
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from services.persistence import get_supabase_client
+from services.plant_search import PlantSearchService
+
+DEFAULT_QUERIES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "plant_search_queries.json")
+
+
+def fold(value) -> str:
+    value = unicodedata.normalize("NFKD", str(value or "").replace("œ", "oe"))
+    return "".join(c for c in value if not unicodedata.combining(c)).lower().strip()
+
+
+def legacy_search(supabase, q: str, limit: int = 5):
+    words = q.split()
+    rows = supabase.table("botanique_plantes")\
+        .select("id, nom_commun, variete")\
+        .or_(f"nom_commun.ilike.%{words[0]}%,variete.ilike.%{words[0]}%")\
+        .limit(20)\
+        .execute().data or []
+    q_tokens = set(w.lower() for w in words)
+    scored = []
+    for p in rows:
+        full_str = f"{p['nom_commun']} {p['variete'] or ''}".lower()
+        score = len(q_tokens.intersection(full_str.split()))
+        if q.lower() in full_str:
+            score += 5
+        scored.append((score, p))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [p for score, p in scored if score > 0][:limit]
+
+
+def is_expected(row, expected) -> bool:
+    if fold(row.get("nom_commun")) != fold(expected["nom_commun"]):
+        return False
+    return "variete" not in expected or fold(row.get("variete")) == fold(expected["variete"])
+
+
+def evaluate(name, search, cases):
+    hits, reciprocal_ranks, samples = 0, [], []
+    for case in cases:
+        start = time.perf_counter()
+        try:
+            rows = search(case["query"])
+        except Exception as e:
+            print(f"  [{name}] '{case['query']}' failed: {e}")
+            rows = []
+        samples.append((time.perf_counter() - start) * 1000)
+        rank = next((i for i, row in enumerate(rows, start=1) if is_expected(row, case["expected"])), None)
+        hits += rank == 1
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+    samples.sort()
+    p95 = samples[max(int(len(samples) * 0.95) - 1, 0)]
+    print(f"{name:10s} top1={hits / len(cases):6.3f}  mrr@5={statistics.mean(reciprocal_ranks):6.3f}  "
+          f"p50={statistics.median(samples):8.2f}ms  p95={p95:8.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", default=DEFAULT_QUERIES)
+    parser.add_argument("--no-hybrid", action="store_true", help="Skip the hybrid run (no embedding calls)")
+    args = parser.parse_args()
+
+    supabase = get_supabase_client()
+    if not supabase:
+        sys.exit("Supabase client not available")
+    with open(args.queries, "r", encoding="utf-8") as f:
+        cases = json.load(f)
+
+    print(f"{len(cases)} labelled queries\n")
+    evaluate("legacy", lambda q: legacy_search(supabase, q), cases)
+    evaluate("trigram", PlantSearchService(supabase, hybrid=False).search, cases)
+    if not args.no_hybrid:
+        evaluate("hybrid", PlantSearchService(supabase, hybrid=True).search, cases)
+
+
+if __name__ == "__main__":
+    main()
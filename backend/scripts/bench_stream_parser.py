@@ -0,0 +1,135 @@
+"""
+Benchmark: CultureAgent stream routing, legacy per-chunk rescans vs the incremental StreamParser.
+
+The legacy router (reproduced below from the previous CultureAgent.chat_stream) rescans the
+growing response buffer on every chunk ("```json" in buffer, sliding-window regex) and then
+brace-counts from every "{" to find the tool call. StreamParser (agents/stream_parser.py)
+scans each character once. Both route the same synthetic responses: a long thought with
+nested JSON-like notes, a reply, and a fenced tool call, split into --chunk-sized chunks.
+
+Usage: python scripts/bench_stream_parser.py [--sizes 2000 8000 32000] [--chunk 24] [--repeat 20]
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.stream_parser import StreamParser
+
+TOOL_CALL = '{"tool": "log_event", "args": {"tracking_id": "T-42", "type": "Arrosage", "notes": "{sec}"}}'
+
+
+def synthetic_response(size: int) -> str:
+    thought = ["PENSÉE : "]
+    line = "Je vérifie l'historique {arrosage: 2, semis: {date: mars}} de la parcelle nord.\n"
+    while sum(map(len, thought)) < size * 0.6:
+        thought.append(line)
+    reply = ["RÉPONSE : "]
+    while sum(map(len, thought)) + sum(map(len, reply)) < size:
+        reply.append("Les tomates aiment la chaleur, pense au paillage. ")
+    return "".join(thought) + "".join(reply) + f"\n```json\n{TOOL_CALL}\n```"
+
+
+def legacy_parse_tool_call(text):
+    match = re.search(r"```(?:\w+)?\s*(\{.*?\})\s*```", text, re.DOTALL)
+    if match:
+        try:
+            return json.loads(match.group(1))
+        except Exception:
+            try: return ast.literal_eval(match.group(1))
+            except Exception: pass
+    for start_index in [i for i, char in enumerate(text) if char == "{"]:
+        balance = 0
+        for i in range(start_index, len(text)):
+            balance += text[i] == "{"
+            balance -= text[i] == "}"
+            if balance == 0:
+                candidate = text[start_index:i + 1]
+                if '"tool"' in candidate or "'tool'" in candidate:
+                    try: return json.loads(candidate)
+                    except Exception:
+                        try: return ast.literal_eval(candidate)
+                        except Exception: pass
+                break
+    return None
+
+
+def legacy_route(chunks):
+    response_buffer, stream_state, events = "", "START", []
+    for chunk in chunks:
+        response_buffer += chunk
+        if "```json" in response_buffer and stream_state != "TOOL_HIDING":
+            stream_state = "TOOL_HIDING"
+            continue
+        if stream_state == "TOOL_HIDING":
+            continue
+        if stream_state == "START":
+            cleaned_buffer = response_buffer.strip()
+            if cleaned_buffer.upper().startswith("PENSÉE"):
+                stream_state = "THOUGHT"
+            elif response_buffer.upper().strip().startswith("RÉPONSE") or "**RÉPONSE" in response_buffer.upper():
+                stream_state = "MESSAGE"
+            elif len(cleaned_buffer) > 10:
+                stream_state = "MESSAGE"
+        if stream_state == "THOUGHT":
+            combined_check = response_buffer[-(len(chunk) + 25):]
+            trigger_match = re.search(r"(?i)(\*\*|#)?\s*R[ÉE]PONSE\s*(\*\*|#)?\s*:", combined_check)
+            if trigger_match:
+                stream_state = "MESSAGE"
+                split_idx = trigger_match.end() - (len(combined_check) - len(chunk))
+                events.append(("thought_token", chunk[:max(split_idx, 0)]))
+                events.append(("message_token", chunk[max(split_idx, 0):]))
+            elif "\n\n" in chunk:
+                stream_state = "MESSAGE"
+                events.append(("thought_token", chunk))
+            else:
+                events.append(("thought_token", chunk))
+        elif stream_state == "MESSAGE":
+            events.append(("message_token", chunk))
+    return events, legacy_parse_tool_call(response_buffer)
+
+
+def incremental_route(chunks):
+    parser = StreamParser()
+    events = []
+    for chunk in chunks:
+        events += parser.feed(chunk)
+    events += parser.finish()
+    return events, parser.tool_call
+
+
+def timed(route, chunks, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, tool_call = route(chunks)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), tool_call
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 8000, 32000])
+    parser.add_argument("--chunk", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'chars':>7s} {'chunks':>7s} {'legacy ms':>10s} {'parser ms':>10s} {'parser us/char':>15s}")
+    for size in args.sizes:
+        text = synthetic_response(size)
+        chunks = [text[i:i + args.chunk] for i in range(0, len(text), args.chunk)]
+        legacy_ms, legacy_call = timed(legacy_route, chunks, args.repeat)
+        parser_ms, parser_call = timed(incremental_route, chunks, args.repeat)
+        assert legacy_call == parser_call == json.loads(TOOL_CALL)
+        print(f"{len(text):7d} {len(chunks):7d} {legacy_ms:10.2f} {parser_ms:10.2f} {parser_ms * 1000 / len(text):15.3f}")
+
+
+if __name__ == "__main__":
+    main()
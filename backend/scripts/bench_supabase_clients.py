@@ -0,0 +1,96 @@
+"""
+Benchmark: Supabase client constructions and new TCP connections per chat turn.
+
+Replays the DB side of a typical agent turn (tool calls: rechercher, liste_varietes,
+lister_sujets, historique) twice:
+  - legacy: one fresh create_client() per get_supabase_client() call (previous behaviour)
+  - shared: the process-wide pooled client (current behaviour)
+
+Requires SUPABASE_URL / SUPABASE_KEY (local Supabase).
+Usage: python scripts/bench_supabase_clients.py [--turns 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import httpcore._backends.sync as httpcore_sync
+import supabase as supabase_pkg
+import services.persistence as persistence
+import services.operations as operations
+from functions import rechercher, liste_varietes, lister_sujets, historique
+
+PATCHED_MODULES = [persistence, operations, rechercher, liste_varietes]
+
+counters = {"clients": 0, "connections": 0}
+
+# Count client constructions
+_original_create_client = supabase_pkg.create_client
+def counting_create_client(*args, **kwargs):
+    counters["clients"] += 1
+    return _original_create_client(*args, **kwargs)
+persistence.create_client = counting_create_client
+
+# Count new TCP connections (httpcore opens one socket per new connection)
+_original_connect_tcp = httpcore_sync.SyncBackend.connect_tcp
+def counting_connect_tcp(self, *args, **kwargs):
+    counters["connections"] += 1
+    return _original_connect_tcp(self, *args, **kwargs)
+httpcore_sync.SyncBackend.connect_tcp = counting_connect_tcp
+
+
+def legacy_get_supabase_client():
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_KEY")
+    if not url or not key:
+        return None
+    return counting_create_client(url, key)
+
+
+def run_turn():
+    rechercher.rechercher("Tomate")
+    liste_varietes.liste_varietes(limit=10)
+    lister_sujets.lister_sujets()
+    historique.historique(limit=5)
+
+
+def bench(label: str, factory, turns: int):
+    for module in PATCHED_MODULES:
+        module.get_supabase_client = factory
+    persistence.close_supabase_client()
+    counters["clients"] = 0
+    counters["connections"] = 0
+
+    start = time.perf_counter()
+    for _ in range(turns):
+        run_turn()
+    elapsed = time.perf_counter() - start
+
+    print(f"{label:<8} clients/turn={counters['clients'] / turns:6.2f}  "
+          f"tcp_connections/turn={counters['connections'] / turns:6.2f}  "
+          f"latency/turn={elapsed / turns * 1000:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=5)
+    args = parser.parse_args()
+
+    if not os.environ.get("SUPABASE_URL"):
+        print("SUPABASE_URL is not set")
+        return
+
+    # Note: the shared client is built on first use, so its single construction
+    # and handshake are amortized over all turns.
+    bench("legacy", legacy_get_supabase_client, args.turns)
+    bench("shared", persistence.init_supabase_client, args.turns)
+
+
+if __name__ == "__main__":
+    main()
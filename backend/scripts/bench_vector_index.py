@@ -0,0 +1,79 @@
+"""
+Benchmark: local VectorIndex vs match_fiches RPC for top-k cosine search.
+
+  - local: synthetic catalog of --rows 768-d vectors in a VectorIndex (single and batched queries)
+  - rpc (--rpc): the same number of match_fiches calls against Supabase (real catalog)
+
+Usage: python scripts/bench_vector_index.py [--rows 10000] [--queries 200] [--rpc]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import numpy as np
+
+from services.vector_index import VectorIndex
+
+DIM = 768
+
+
+def percentiles(samples_ms):
+    samples_ms = sorted(samples_ms)
+    p95 = samples_ms[max(int(len(samples_ms) * 0.95) - 1, 0)]
+    return f"p50={statistics.median(samples_ms):8.3f}ms  p95={p95:8.3f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--rpc", action="store_true", help="Also time the match_fiches RPC (needs Supabase)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    catalog = rng.normal(size=(args.rows, DIM)).astype(np.float32)
+    queries = rng.normal(size=(args.queries, DIM)).astype(np.float32)
+
+    index = VectorIndex("bench", dim=DIM, directory="")
+    start = time.perf_counter()
+    index.upsert_many((str(i), v, {}) for i, v in enumerate(catalog))
+    print(f"Built index: {args.rows} x {DIM} float32 ({catalog.nbytes / 1e6:.1f} MB) in {time.perf_counter() - start:.2f}s\n")
+
+    samples = []
+    for q in queries:
+        t = time.perf_counter()
+        index.search(q, k=args.k)
+        samples.append((time.perf_counter() - t) * 1000)
+    print(f"local single   {percentiles(samples)}")
+
+    t = time.perf_counter()
+    for i in range(0, len(queries), args.batch):
+        index.search_batch(queries[i:i + args.batch], k=args.k)
+    per_query = (time.perf_counter() - t) * 1000 / len(queries)
+    print(f"local batch{args.batch:<4d}{per_query:8.3f}ms per query")
+
+    if args.rpc:
+        from services.persistence import get_supabase_client
+        supabase = get_supabase_client()
+        samples = []
+        for q in queries:
+            t = time.perf_counter()
+            supabase.rpc("match_fiches", {
+                "query_embedding": q.tolist(), "match_threshold": 0.0, "match_count": args.k
+            }).execute()
+            samples.append((time.perf_counter() - t) * 1000)
+        print(f"rpc            {percentiles(samples)}")
+
+
+if __name__ == "__main__":
+    main()
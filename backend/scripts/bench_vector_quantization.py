@@ -0,0 +1,80 @@
+"""
+Benchmark: quantized VectorIndex (float16 / int8 scan matrix, exact float32 re-rank).
+
+Builds a synthetic clustered catalog of --rows 768-d vectors, then for each precision and
+re-rank depth reports the resident bytes per vector of the scan matrix, single-query
+p50/p95 latency and recall@k against the float32 exact top-k.
+
+The index is saved and reloaded before timing, as in production: the float32 rows used for
+re-ranking are then memory-mapped from disk rather than held in memory.
+
+Usage: python scripts/bench_vector_quantization.py [--rows 10000] [--queries 200] [--k 10]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import numpy as np
+
+from services.vector_index import VectorIndex
+
+DIM = 768
+CONFIGS = [("float32", 0), ("float16", 0), ("float16", 2), ("int8", 0), ("int8", 2), ("int8", 4)]
+
+
+def clustered_vectors(rows: int, seed: int = 0) -> np.ndarray:
+    # Real embeddings are clustered (plant families): neighbours are close, which is what stresses quantization
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(rows // 50, 1), DIM))
+    vectors = centers[rng.integers(0, len(centers), rows)] + rng.normal(scale=0.35, size=(rows, DIM))
+    return vectors.astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    catalog = clustered_vectors(args.rows)
+    rng = np.random.default_rng(1)
+    queries = catalog[rng.integers(0, args.rows, args.queries)] + rng.normal(scale=0.1, size=(args.queries, DIM))
+    items = [(str(i), v, {}) for i, v in enumerate(catalog)]
+
+    truth = None
+    print(f"{args.rows} x {DIM} vectors, {args.queries} queries, recall@{args.k}\n")
+    print(f"{'precision':10s} {'rerank':>6s} {'bytes/vec':>10s} {'p50 ms':>8s} {'p95 ms':>8s} {'recall':>7s}")
+    with tempfile.TemporaryDirectory() as directory:
+        for precision, rerank in CONFIGS:
+            index = VectorIndex(f"bench_{precision}", dim=DIM, directory=directory, precision=precision, rerank=rerank)
+            index.upsert_many(items)
+            index.save()
+            index = VectorIndex(f"bench_{precision}", dim=DIM, directory=directory, precision=precision, rerank=rerank)
+            index.load()
+
+            samples, results = [], []
+            for query in queries:
+                start = time.perf_counter()
+                results.append([hit[0] for hit in index.search(query, k=args.k)])
+                samples.append((time.perf_counter() - start) * 1000)
+            if truth is None:
+                truth = results # float32 first: exact baseline
+            recall = statistics.mean(len(set(r) & set(t)) / len(t) for r, t in zip(results, truth))
+            samples.sort()
+            p95 = samples[max(int(len(samples) * 0.95) - 1, 0)]
+            print(f"{precision:10s} {rerank:6d} {index.memory_per_vector():10d} "
+                  f"{statistics.median(samples):8.3f} {p95:8.3f} {recall:7.3f}")
+
+
+if __name__ == "__main__":
+    main()
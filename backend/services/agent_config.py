@@ -1,20 +1,54 @@
-import os
 import logging
+import os
 from typing import List, Dict, Optional
-from supabase import create_client, Client
+from supabase import Client
+from core.cache import TTLCache
+from core.config import settings
+from services.persistence import get_supabase_client
 
 logger = logging.getLogger(__name__)
 
+# Prompts change rarely (update_prompt.py, migrations): cache them for a short TTL
+# instead of hitting agent_configurations on every request.
+_prompt_cache = TTLCache(name="agent_prompts", maxsize=64, ttl=settings.PROMPT_CACHE_TTL)
+_examples_cache = TTLCache(name="agent_few_shot_examples", maxsize=64, ttl=settings.PROMPT_CACHE_TTL)
+_prompt_file_cache = TTLCache(name="agent_prompt_files", maxsize=16, ttl=settings.PROMPT_CACHE_TTL)
+
+
+def invalidate_prompt_cache(agent_key: Optional[str] = None):
+    """
+    Drops cached prompts/examples for one agent (or all agents).
+    """
+    if agent_key is None:
+        _prompt_cache.invalidate()
+        _examples_cache.invalidate()
+        _prompt_file_cache.invalidate()
+        return
+    _prompt_cache.invalidate(agent_key)
+    _examples_cache.invalidate_matching(lambda key: key[0] == agent_key)
+
+
+def read_prompt_file(path: str) -> Optional[str]:
+    """
+    Reads a prompt stored as a file (TTL-cached). Returns None if the file does not exist.
+    """
+    cached = _prompt_file_cache.get(path)
+    if cached is not None:
+        return cached
+
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        content = f.read()
+    _prompt_file_cache.set(path, content)
+    return content
+
+
 class AgentConfigService:
-    def __init__(self):
-        url: str = os.environ.get("SUPABASE_URL")
-        key: str = os.environ.get("SUPABASE_KEY")
-        
-        if not url or not key:
+    def __init__(self, supabase: Optional[Client] = None):
+        self.supabase: Optional[Client] = supabase or get_supabase_client()
+        if not self.supabase:
             logger.warning("Supabase credentials not found in env. AgentConfigService will fail.")
-            self.supabase: Optional[Client] = None
-        else:
-            self.supabase: Client = create_client(url, key)
 
     def get_system_prompt(self, agent_key: str) -> str:
         """
@@ -24,6 +58,10 @@ class AgentConfigService:
         if not self.supabase:
             return ""
 
+        cached = _prompt_cache.get(agent_key)
+        if cached is not None:
+            return cached
+
         try:
             response = self.supabase.table("agent_configurations")\
                 .select("system_prompt")\
@@ -32,11 +70,14 @@ class AgentConfigService:
                 .execute()
             
             if response.data and len(response.data) > 0:
-                return response.data[0]["system_prompt"]
+                prompt = response.data[0]["system_prompt"]
             else:
                 logger.warning(f"No active system prompt found for agent: {agent_key}")
-                return ""
+                prompt = ""
+            _prompt_cache.set(agent_key, prompt)
+            return prompt
         except Exception as e:
+            # Errors are not cached: next request retries
             logger.error(f"Error fetching system prompt for {agent_key}: {e}")
             return ""
 
@@ -47,6 +88,10 @@ class AgentConfigService:
         if not self.supabase:
             return []
 
+        cached = _examples_cache.get((agent_key, limit))
+        if cached is not None:
+            return cached
+
         try:
             # Random selection is not native easily in simple select without RPC, 
             # so we just take the latest ones or simple selection for now.
@@ -57,7 +102,9 @@ class AgentConfigService:
                 .limit(limit)\
                 .execute()
             
-            return response.data if response.data else []
+            examples = response.data if response.data else []
+            _examples_cache.set((agent_key, limit), examples)
+            return examples
         except Exception as e:
             logger.error(f"Error fetching examples for {agent_key}: {e}")
             return []
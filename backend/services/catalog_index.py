@@ -0,0 +1,220 @@
+import heapq
+import logging
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+from core.config import settings
+from core.text import fold, tokenize, trigrams
+from services.table_sync import SyncedIndexes, TableSync
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ("row", "text", "haystack", "tokens", "grams")
+
+    def __init__(self, row: Dict[str, Any], text: str, haystack: tuple):
+        self.row = row
+        self.text = text # Accent-folded name ("nom variete")
+        self.haystack = haystack # Accent-folded search fields (substring lookup)
+        self.tokens = set(tokenize(text))
+        self.grams = trigrams(sorted(self.tokens))
+
+
+class CatalogIndex:
+    """
+    In-process lookup index over a small catalog table (plants, fiches).
+
+    Each row's name fields are accent-folded and tokenized (core.text). Two inverted
+    indexes map tokens and character trigrams to row ids: exact tokens rank first,
+    shared trigrams give typo tolerance ("tomatte" ~ "tomate"). The similarity is the
+    share of query trigrams found in the row, like pg_trgm word_similarity.
+    """
+
+    def __init__(self, name: str, text_fields: Sequence[str], search_fields: Optional[Sequence[str]] = None):
+        self.name = name
+        self.text_fields = tuple(text_fields) # Ranked lookup ("nom variete")
+        self.search_fields = tuple(search_fields or text_fields) # Substring lookup
+        self._lock = threading.RLock()
+        self._entries: Dict[str, _Entry] = {}
+        self._tokens: Dict[str, set] = {}
+        self._grams: Dict[str, set] = {}
+        self.version = 0 # Bumped on every change (derived indexes rebuild when it moves)
+
+        self.synced_at: Optional[str] = None # Max updated_at seen during sync
+        self.ready = False # Set once a DB sync completed: until then callers query the DB
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, id: str) -> bool:
+        return str(id) in self._entries
+
+    def upsert_many(self, rows: List[Dict[str, Any]]):
+        with self._lock:
+            for row in rows:
+                id = str(row["id"])
+                self._unlink(id)
+                text = fold(" ".join(str(row.get(f) or "") for f in self.text_fields))
+                haystack = tuple(fold(str(row.get(f) or "")) for f in self.search_fields)
+                entry = _Entry(dict(row), text, haystack)
+                self._entries[id] = entry
+                for token in entry.tokens:
+                    self._tokens.setdefault(token, set()).add(id)
+                for gram in entry.grams:
+                    self._grams.setdefault(gram, set()).add(id)
+            self.version += 1
+
+    def upsert(self, row: Dict[str, Any]):
+        self.upsert_many([row])
+
+    def remove(self, id: str):
+        with self._lock:
+            self._unlink(str(id))
+
+    def retain(self, ids: Sequence[str]):
+        """
+        Removes every id not in `ids` (rows deleted in the DB).
+        """
+        keep = {str(i) for i in ids}
+        with self._lock:
+            for id in [i for i in self._entries if i not in keep]:
+                self._unlink(id)
+
+    def _unlink(self, id: str):
+        entry = self._entries.pop(id, None)
+        if entry is None:
+            return
+        self.version += 1
+        for postings, keys in ((self._tokens, entry.tokens), (self._grams, entry.grams)):
+            for key in keys:
+                ids = postings.get(key)
+                if ids is not None:
+                    ids.discard(id)
+                    if not ids:
+                        del postings[key]
+
+    def search(self, query: str, limit: int = 5, min_similarity: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Best rows for the query (row fields + similarity), best first.
+        Ties are broken by exact token matches, then by the shortest name.
+        """
+        query_tokens = set(tokenize(query))
+        query_grams = trigrams(sorted(query_tokens))
+        if not query_grams:
+            return []
+
+        with self._lock:
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(self._grams.get(gram, ()))
+            exact = Counter()
+            for token in query_tokens:
+                exact.update(self._tokens.get(token, ()))
+
+            scored = []
+            for id, count in shared.items():
+                similarity = count / len(query_grams)
+                if similarity < min_similarity:
+                    continue
+                entry = self._entries[id]
+                precision = count / len(entry.grams)
+                scored.append((round(similarity, 3), exact[id], precision, -len(entry.text), id))
+
+            return [
+                {**self._entries[item[-1]].row, "similarity": item[0]}
+                for item in heapq.nlargest(limit, scored)
+            ]
+
+    def contains(self, query: str) -> List[Dict[str, Any]]:
+        """
+        Rows where any search field contains the query (accent and case insensitive, like ILIKE %q%).
+        """
+        needle = fold(query).strip()
+        if not needle:
+            return []
+        with self._lock:
+            return [
+                dict(entry.row) for entry in self._entries.values()
+                if any(needle in value for value in entry.haystack)
+            ]
+
+    def rows(self, limit: Optional[int] = None, order_by: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = [dict(entry.row) for entry in self._entries.values()]
+        if order_by:
+            rows.sort(key=lambda row: fold(str(row.get(order_by) or "")))
+        return rows[:limit] if limit is not None else rows
+
+
+class CatalogIndexSync(TableSync):
+    """
+    Keeps a CatalogIndex in sync with its table (services.table_sync).
+    """
+
+    def _apply(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.index.upsert_many(rows)
+        return rows
+
+
+PLANTS_CATALOG = "botanique_plantes"
+FICHES_CATALOG = "fiches_botanique"
+
+
+def _build_sync(name: str) -> CatalogIndexSync:
+    if name == PLANTS_CATALOG:
+        return CatalogIndexSync(CatalogIndex(PLANTS_CATALOG, ("nom_commun", "variete")),
+                                "botanique_plantes", "id, nom_commun, variete, espece, updated_at")
+    if name == FICHES_CATALOG:
+        return CatalogIndexSync(CatalogIndex(FICHES_CATALOG, ("nom", "variete"), ("nom", "variete", "espece")),
+                                "fiches_botanique", "id, nom, variete, espece, created_at, updated_at")
+    raise ValueError(f"Unknown catalog index: {name}")
+
+
+# Synced indexes (only when CATALOG_INDEX_ENABLED)
+_catalogs = SyncedIndexes(
+    "Catalog index", (PLANTS_CATALOG, FICHES_CATALOG), _build_sync,
+    enabled=lambda: settings.CATALOG_INDEX_ENABLED,
+    interval=lambda: settings.CATALOG_INDEX_REFRESH_INTERVAL,
+)
+
+
+def get_catalog_index(name: str) -> Optional[CatalogIndex]:
+    """
+    The local index if enabled and synced, else None (callers query the DB).
+    """
+    return _catalogs.get_index(name)
+
+
+def catalog_upsert(name: str, row: Optional[Dict[str, Any]]):
+    """
+    Applies a local write immediately (the periodic refresh catches writes from other processes).
+    """
+    index = get_catalog_index(name)
+    if index is not None and row and row.get("id"):
+        # Same projection as the sync (write responses carry the full row, `data` included)
+        fields = [column.strip() for column in _catalogs.get_sync(name).columns.split(",")]
+        index.upsert({field: row.get(field) for field in fields})
+
+
+def catalog_remove(name: str, id: str):
+    index = get_catalog_index(name)
+    if index is not None:
+        index.remove(id)
+
+
+async def refresh_catalog_indexes():
+    await _catalogs.refresh()
+
+
+def start_catalog_index_refresher():
+    """
+    Initial build + periodic delta refresh in the background (FastAPI startup).
+    Lookups query the DB until the first sync completes.
+    """
+    _catalogs.start()
+
+
+async def stop_catalog_index_refresher():
+    await _catalogs.stop()
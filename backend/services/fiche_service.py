@@ -3,16 +3,25 @@ from typing import List, Dict, Any, Optional
 from uuid import UUID
 from datetime import datetime
 
+from core.config import settings
+from core.database import execute_async
 from core.gemini import get_gemini_client
-from services.persistence import get_supabase_client
+from services.persistence import get_supabase_client, match_tuning_params
+from services.vector_index import get_vector_index, FICHES_INDEX
+from services.catalog_index import get_catalog_index, catalog_upsert, FICHES_CATALOG
+from services.lexical_embedder import embed_or_lexical
 from models.agronome import FichePlant
 from models.fiche_botanique import FicheBotaniqueDB, FicheBotaniqueSummary
 
 logger = logging.getLogger(__name__)
 
+# Explicit projections: never select embedding_nom (768 floats) for API responses
+FICHE_COLUMNS = "id, data, variete, espece, nom, created_at, updated_at"
+FICHE_SUMMARY_COLUMNS = "id, nom, variete, espece, created_at, updated_at"
+
 class FicheService:
-    def __init__(self):
-        self.supabase = get_supabase_client()
+    def __init__(self, supabase=None):
+        self.supabase = supabase or get_supabase_client()
         self.gemini = get_gemini_client()
 
     async def create_fiche(self, fiche_data: FichePlant) -> Optional[FicheBotaniqueDB]:
@@ -36,14 +45,17 @@ class FicheService:
                 "variete": variete,
                 "espece": espece,
                 "nom": nom,
-                "embedding_nom": embedding
+                "embedding_nom": embedding,
+                "embedding_nom_source_hash": self.gemini.embedding_source_hash(nom)
             }
             
-            response = self.supabase.table("fiches_botanique").insert(payload).execute()
+            response = await execute_async(self.supabase.table("fiches_botanique").insert(payload))
             
             if response.data:
                 # We return the DB object. embedding_nom might be large, FicheBotaniqueDB includes it.
-                return FicheBotaniqueDB(**response.data[0])
+                fiche = FicheBotaniqueDB(**response.data[0])
+                self._index_fiche(fiche, embedding)
+                return fiche
             return None
 
         except Exception as e:
@@ -68,24 +80,40 @@ class FicheService:
                 "espece": espece,
                 "nom": nom,
                 "embedding_nom": embedding,
+                "embedding_nom_source_hash": self.gemini.embedding_source_hash(nom),
                 "updated_at": datetime.utcnow().isoformat()
             }
             
-            response = self.supabase.table("fiches_botanique").update(payload).eq("id", fiche_id).execute()
+            response = await execute_async(self.supabase.table("fiches_botanique").update(payload).eq("id", fiche_id))
             
             if response.data:
-                return FicheBotaniqueDB(**response.data[0])
+                fiche = FicheBotaniqueDB(**response.data[0])
+                self._index_fiche(fiche, embedding)
+                return fiche
             return None
             
         except Exception as e:
             logger.error(f"Error updating fiche: {e}")
             raise e
 
+    def _index_fiche(self, fiche: FicheBotaniqueDB, embedding: List[float]):
+        """
+        Keeps the local vector and catalog indexes (if enabled) in sync without waiting for the next refresh.
+        """
+        catalog_upsert(FICHES_CATALOG, fiche.model_dump(
+            mode="json", include={"id", "nom", "variete", "espece", "created_at", "updated_at"}
+        ))
+        index = get_vector_index(FICHES_INDEX)
+        if index is not None and embedding:
+            index.upsert(str(fiche.id), embedding, fiche.model_dump(
+                mode="json", include={"nom", "variete", "espece", "created_at", "updated_at"}
+            ))
+
     async def get_fiche_by_id(self, fiche_id: str) -> Optional[FicheBotaniqueDB]:
         if not self.supabase:
             return None
         try:
-            response = self.supabase.table("fiches_botanique").select("*").eq("id", fiche_id).execute()
+            response = await execute_async(self.supabase.table("fiches_botanique").select(FICHE_COLUMNS).eq("id", fiche_id))
             if response.data:
                 return FicheBotaniqueDB(**response.data[0])
             return None
@@ -104,10 +132,10 @@ class FicheService:
             # Using OR filter
             or_filter = f"nom.ilike.%{query}%,variete.ilike.%{query}%,espece.ilike.%{query}%"
             
-            response = self.supabase.table("fiches_botanique")\
-                .select("*")\
-                .or_(or_filter)\
-                .execute()
+            query_builder = self.supabase.table("fiches_botanique")\
+                .select(FICHE_COLUMNS)\
+                .or_(or_filter)
+            response = await execute_async(query_builder)
                 
             return [FicheBotaniqueDB(**item) for item in response.data]
             
@@ -118,7 +146,12 @@ class FicheService:
     async def search_exact_summary(self, query: str) -> List[FicheBotaniqueSummary]:
         """
         Summary version of exact search.
+        Served from the local catalog index once synced (no DB round-trip).
         """
+        index = get_catalog_index(FICHES_CATALOG)
+        if index is not None:
+            return [FicheBotaniqueSummary(**item) for item in index.contains(query)]
+
         if not self.supabase:
             return []
             
@@ -126,10 +159,10 @@ class FicheService:
             or_filter = f"nom.ilike.%{query}%,variete.ilike.%{query}%,espece.ilike.%{query}%"
             
             # Select only necessary fields
-            response = self.supabase.table("fiches_botanique")\
-                .select("id, nom, variete, espece, created_at, updated_at")\
-                .or_(or_filter)\
-                .execute()
+            query_builder = self.supabase.table("fiches_botanique")\
+                .select(FICHE_SUMMARY_COLUMNS)\
+                .or_(or_filter)
+            response = await execute_async(query_builder)
                 
             return [FicheBotaniqueSummary(**item) for item in response.data]
             
@@ -147,7 +180,12 @@ class FicheService:
             
         try:
             # Generate query embedding
-            embedding = await self.gemini.embed_content(query)
+            embedding, hits = await embed_or_lexical(
+                self.gemini.embed_content, FICHES_CATALOG, query, limit,
+                0.0 if verbose else settings.LEXICAL_MATCH_THRESHOLD, self.supabase
+            )
+            if hits is not None:
+                return await self._fetch_hits(hits)
             
             # Determine threshold
             # If verbose, we want everything, so threshold -1 (similarity is -1 to 1 or 0 to 1) -> 0 is safe for cosine distance 1-dist
@@ -155,15 +193,21 @@ class FicheService:
             threshold = 0.85
             if verbose:
                 threshold = 0.0
+
+            index = get_vector_index(FICHES_INDEX)
+            if index is not None:
+                # Local top-k, then a primary-key lookup for the full rows
+                return await self._fetch_hits(index.search(embedding, k=limit, threshold=threshold))
             
             params = {
                 "query_embedding": embedding,
                 "match_threshold": threshold,
-                "match_count": limit
+                "match_count": limit,
+                **match_tuning_params()
             }
             
             # RPC call
-            response = self.supabase.rpc("match_fiches", params).execute()
+            response = await execute_async(self.supabase.rpc("match_fiches", params))
             
             results = []
             for item in response.data:
@@ -175,6 +219,21 @@ class FicheService:
             logger.error(f"Error searching fiches (vector): {e}")
             return []
 
+    async def _fetch_hits(self, hits) -> List[FicheBotaniqueDB]:
+        """
+        Full rows for local index hits (id, score, metadata), in hit order: one primary-key lookup.
+        """
+        if not hits:
+            return []
+        response = await execute_async(
+            self.supabase.table("fiches_botanique").select(FICHE_COLUMNS).in_("id", [hit[0] for hit in hits])
+        )
+        rows = {str(item["id"]): item for item in response.data}
+        return [
+            FicheBotaniqueDB(**{**rows[id], "similarity": score})
+            for id, score, _ in hits if id in rows
+        ]
+
     async def search_vector_summary(self, query: str) -> List[FicheBotaniqueSummary]:
         """
         Search by vector similarity on nom and return summary.
@@ -185,33 +244,30 @@ class FicheService:
             
         try:
             # Generate query embedding
-            embedding = await self.gemini.embed_content(query)
+            embedding, hits = await embed_or_lexical(self.gemini.embed_content, FICHES_CATALOG, query, 1000, 0.0, self.supabase)
+            if hits is not None:
+                return [FicheBotaniqueSummary(id=id, similarity=score, **metadata) for id, score, metadata in hits]
             
+            index = get_vector_index(FICHES_INDEX)
+            if index is not None:
+                # Served entirely from the local index (summary fields are kept as metadata)
+                return [
+                    FicheBotaniqueSummary(id=id, similarity=score, **metadata)
+                    for id, score, metadata in index.search(embedding, k=1000, threshold=0.0)
+                ]
+
             # Strict threshold 0.8, high limit
             params = {
                 "query_embedding": embedding,
                 "match_threshold": 0.0,
-                "match_count": 1000  # "No limit" practically
+                "match_count": 1000,  # "No limit" practically
+                **match_tuning_params()
             }
             
-            # RPC call
-            response = self.supabase.rpc("match_fiches", params).execute()
-            
-            results = []
-            for item in response.data:
-                # Map to summary
-                summary = FicheBotaniqueSummary(
-                    id=item['id'],
-                    nom=item['nom'],
-                    variete=item.get('variete'),
-                    espece=item.get('espece'),
-                    created_at=item['created_at'],
-                    updated_at=item['updated_at'],
-                    similarity=item.get('similarity')
-                )
-                results.append(summary)
+            # Summary projection: no `data` payload for up to 1000 rows
+            response = await execute_async(self.supabase.rpc("match_fiches_summary", params))
             
-            return results
+            return [FicheBotaniqueSummary(**item) for item in response.data]
             
         except Exception as e:
             logger.error(f"Error searching fiches summary: {e}")
@@ -225,11 +281,11 @@ class FicheService:
             return []
             
         try:
-            response = self.supabase.table("fiches_botanique")\
-                .select("id, nom, variete, espece, created_at, updated_at")\
+            query_builder = self.supabase.table("fiches_botanique")\
+                .select(FICHE_SUMMARY_COLUMNS)\
                 .range(offset, offset + limit - 1)\
-                .order("updated_at", desc=True)\
-                .execute()
+                .order("updated_at", desc=True)
+            response = await execute_async(query_builder)
                 
             return [FicheBotaniqueSummary(**item) for item in response.data]
             
@@ -0,0 +1,238 @@
+import logging
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.config import settings
+from core.database import run_db
+from core.text import fold
+from services.catalog_index import get_catalog_index, PLANTS_CATALOG, FICHES_CATALOG
+from services.persistence import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+Hit = Tuple[str, float, Dict[str, Any]]
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class LexicalEmbedder:
+    """
+    Offline embedding backend: hashed character n-gram TF-IDF vectors (no model, no network).
+
+    Features are the accent-folded words and their padded character n-grams ("<tomate>" ->
+    "<to", "tom", ..., "te>"), hashed into `dim` buckets. Weights are sublinear tf * idf,
+    with document frequencies taken from the indexed catalog, then L2-normalized.
+    Same `embed_text` interface as LLMProvider, but its own dimension and vector space:
+    lexical vectors are only comparable with a LexicalIndex, never with Gemini vectors.
+    """
+
+    def __init__(self, dim: int = None, ngram_range: Tuple[int, int] = (3, 4)):
+        self.dim = dim or settings.LEXICAL_EMBEDDING_DIM
+        self.ngram_range = ngram_range
+        self.idf = np.ones(self.dim, dtype=np.float32) # Features never seen in the catalog keep the max idf
+        # Queries reuse a small vocabulary: hash each word's n-grams once
+        self._word_buckets = lru_cache(maxsize=20000)(self._hash_word)
+
+    def features(self, text: str) -> Counter:
+        """
+        Hashed feature counts of a text.
+        """
+        counts = Counter()
+        for word in _WORD_RE.findall(fold(text)):
+            counts.update(self._word_buckets(word))
+        return counts
+
+    def _hash_word(self, word: str) -> Tuple[int, ...]:
+        # crc32: stable across processes (unlike hash())
+        low, high = self.ngram_range
+        padded = f"<{word}>"
+        grams = [word] + [padded[i:i + n] for n in range(low, high + 1) for i in range(len(padded) - n + 1)]
+        return tuple(zlib.crc32(gram.encode("utf-8")) % self.dim for gram in grams)
+
+    def fit(self, documents: Sequence[Counter]):
+        """
+        Learns idf = ln((1 + N) / (1 + df)) + 1 from the documents' features.
+        """
+        df = np.zeros(self.dim, dtype=np.float64)
+        for features in documents:
+            df[np.fromiter(features.keys(), dtype=np.int64, count=len(features))] += 1
+        n = len(documents)
+        self.idf = (np.log((1 + n) / (1 + df)) + 1.0).astype(np.float32)
+
+    def weights(self, features: Counter) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sparse L2-normalized tf-idf vector: (buckets, weights).
+        """
+        buckets = np.fromiter(features.keys(), dtype=np.int64, count=len(features))
+        counts = np.fromiter(features.values(), dtype=np.float32, count=len(features))
+        weights = (1.0 + np.log(counts)) * self.idf[buckets]
+        norm = float(np.linalg.norm(weights)) or 1.0
+        return buckets, weights / norm
+
+    async def embed_text(self, text: str) -> list[float]:
+        """
+        Dense form of the vector (`dim` floats), for callers of the LLMProvider interface.
+        """
+        vector = np.zeros(self.dim, dtype=np.float32)
+        buckets, weights = self.weights(self.features(text))
+        vector[buckets] = weights
+        return vector.tolist()
+
+
+class LexicalIndex:
+    """
+    Sparse cosine index over LexicalEmbedder vectors, stored column-wise (CSC): the posting
+    list of bucket b is _rows/_weights[_offsets[b]:_offsets[b + 1]]. A query gathers the
+    posting lists of its own features in one vectorized pass and scores them with np.bincount.
+    """
+
+    def __init__(self, embedder: Optional[LexicalEmbedder] = None):
+        self.embedder = embedder or LexicalEmbedder()
+        self._ids: List[str] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._offsets = np.zeros(self.embedder.dim + 1, dtype=np.int64)
+        self._rows = np.zeros(0, dtype=np.int32)
+        self._weights = np.zeros(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def build(self, documents: Sequence[Tuple[str, str, Dict[str, Any]]]):
+        """
+        (Re)builds the index from (id, text, metadata) documents; idf is refitted on them.
+        """
+        features = [self.embedder.features(text) for _, text, _ in documents]
+        self.embedder.fit(features)
+        vectors = [self.embedder.weights(doc_features) for doc_features in features]
+        buckets = np.concatenate([b for b, _ in vectors] or [np.zeros(0, dtype=np.int64)])
+        rows = np.repeat(np.arange(len(vectors), dtype=np.int32), [len(b) for b, _ in vectors])
+        weights = np.concatenate([w for _, w in vectors] or [np.zeros(0, dtype=np.float32)])
+        order = np.argsort(buckets, kind="stable")
+        self._rows = rows[order]
+        self._weights = weights[order].astype(np.float32)
+        counts = np.bincount(buckets, minlength=self.embedder.dim)
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+        self._ids = [str(id) for id, _, _ in documents]
+        self._metadata = [metadata for _, _, metadata in documents]
+
+    def search(self, query: str, k: int = 5, threshold: Optional[float] = None) -> List[Hit]:
+        """
+        Top-k (id, cosine similarity, metadata), best first. Only similarities > threshold are kept.
+        """
+        n = len(self._ids)
+        buckets, query_weights = self.embedder.weights(self.embedder.features(query))
+        if not n or not len(buckets) or k <= 0:
+            return []
+        starts = self._offsets[buckets]
+        lengths = self._offsets[buckets + 1] - starts
+        total = int(lengths.sum())
+        if not total:
+            return []
+        # Positions of every posting entry of the query buckets, without a Python loop
+        positions = np.arange(total) + np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        query_column = np.repeat(query_weights, lengths)
+        scores = np.bincount(self._rows[positions], weights=self._weights[positions] * query_column, minlength=n)
+
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k] if k < n else np.arange(n)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            (self._ids[i], float(scores[i]), self._metadata[i])
+            for i in top
+            if scores[i] > 0 and (threshold is None or scores[i] > threshold)
+        ]
+
+
+# Catalog sources: table columns and the text embedded per row
+_SOURCES = {
+    PLANTS_CATALOG: ("botanique_plantes", "id, nom_commun, variete, espece", ("nom_commun", "variete", "espece")),
+    FICHES_CATALOG: ("fiches_botanique", "id, nom, variete, espece, created_at, updated_at", ("nom", "variete", "espece")),
+}
+
+_indexes: Dict[str, Tuple[Any, LexicalIndex, float]] = {} # name -> (source version, index, built at)
+_indexes_lock = threading.Lock()
+_PAGE_SIZE = 1000 # PostgREST max-rows default
+
+
+def _table_rows(supabase, table: str, columns: str) -> List[Dict[str, Any]]:
+    # Paginated: a single select is silently cut at PostgREST max-rows
+    rows, offset = [], 0
+    while True:
+        page = supabase.table(table).select(columns).order("id")\
+            .range(offset, offset + _PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < _PAGE_SIZE:
+            return rows
+        offset += _PAGE_SIZE
+
+
+def get_lexical_index(name: str, supabase=None) -> Optional[LexicalIndex]:
+    """
+    Lexical index over a catalog table, rebuilt when the in-memory catalog index changes.
+    Without a synced catalog index, it is built from the table and rebuilt every
+    LEXICAL_INDEX_TTL seconds (blocking: run on the DB pool).
+    """
+    table, columns, text_fields = _SOURCES[name]
+    catalog = get_catalog_index(name)
+    version = (id(catalog), catalog.version) if catalog is not None else "db"
+    with _indexes_lock:
+        cached = _indexes.get(name)
+        if cached and cached[0] == version and (
+            version != "db" or time.monotonic() - cached[2] < settings.LEXICAL_INDEX_TTL
+        ):
+            return cached[1]
+
+    if catalog is not None:
+        rows = catalog.rows()
+    else:
+        supabase = supabase or get_supabase_client()
+        if not supabase:
+            return None
+        try:
+            rows = _table_rows(supabase, table, columns)
+        except Exception as e:
+            logger.error(f"[{name}] Lexical index build failed: {e}")
+            return None
+
+    index = LexicalIndex()
+    index.build([
+        (row["id"], " ".join(str(row.get(f) or "") for f in text_fields),
+         {k: v for k, v in row.items() if k not in ("id", "similarity")})
+        for row in rows
+    ])
+    with _indexes_lock:
+        _indexes[name] = (version, index, time.monotonic())
+    logger.info(f"[{name}] Lexical index built ({len(index)} rows)")
+    return index
+
+
+def lexical_search(name: str, query: str, k: int = 5, threshold: Optional[float] = None, supabase=None) -> List[Hit]:
+    """
+    Offline semantic-search fallback: lexical cosine top-k over a catalog (no embedding call).
+    """
+    index = get_lexical_index(name, supabase)
+    if index is None:
+        return []
+    return index.search(query, k=k, threshold=threshold)
+
+
+async def embed_or_lexical(embed: Optional[Callable[[str], Awaitable[List[float]]]], name: str, query: str, k: int = 5,
+                           threshold: Optional[float] = None, supabase=None) -> Tuple[Optional[List[float]], Optional[List[Hit]]]:
+    """
+    Query embedding for a vector search over a catalog, or its lexical hits when there is no
+    remote embedding: `embed` is None (local embedding provider) or fails (offline, API outage).
+    Returns (embedding, None) or (None, hits).
+    """
+    if embed is not None:
+        try:
+            return await embed(query), None
+        except Exception as e:
+            logger.warning(f"Embedding unavailable ({e}), using the lexical vector fallback")
+    return None, await run_db(lexical_search, name, query, k, threshold, supabase)
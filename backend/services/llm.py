@@ -1,18 +1,69 @@
+import asyncio
 import google.generativeai as genai
 import httpx
 import json
+import logging
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+from google.genai import types
 from core.config import settings
+from core.context_budget import ContextBudget, estimate_tokens
+from core.conversations import History, to_contents
+from core.embedding_cache import get_embedding_cache
+from core.gemini import get_gemini_client
+from services.lexical_embedder import LexicalEmbedder
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class TextDelta:
+    text: str
+    thought: bool = False
+
+@dataclass
+class ToolCall:
+    name: str
+    args: Dict[str, Any]
+    native: bool = True # False: parsed from a JSON block in the text, its result is sent back as text
+
+class ToolSession(ABC):
+    """
+    Native function-calling conversation, held in the provider's own format
+    (e.g. Gemini contents with thought signatures).
+    """
+
+    @abstractmethod
+    def stream(self, usage: Optional[Dict[str, int]] = None) -> AsyncIterator[Union[TextDelta, ToolCall]]:
+        """
+        Runs one model turn: yields text deltas and complete tool calls as they arrive.
+        The turn is appended to the conversation once the stream ends; `usage` is filled then.
+        """
+        pass
+
+    @abstractmethod
+    def add_tool_results(self, results: List[Tuple[ToolCall, Any]]):
+        """Appends the results of the last turn's tool calls, in call order."""
+        pass
+
+    @property
+    @abstractmethod
+    def exchange(self) -> List[Any]:
+        """This exchange in the provider's format (user message, model turns, tool results), for the conversation store."""
+        pass
 
 class LLMProvider(ABC):
+    supports_tools: bool = False # Native function calling (tool_session)
+    local_embeddings: bool = False # embed_text vectors are lexical (services.lexical_embedder), not the DB's vector space
+
     @abstractmethod
     async def generate(self, prompt: str, system_prompt: Optional[str] = None) -> tuple[str, Dict[str, int]]:
         pass
 
     @abstractmethod
-    async def generate_stream(self, prompt: str, system_prompt: Optional[str] = None):
-        """Yields chunks of text"""
+    async def generate_stream(self, prompt: str, system_prompt: Optional[str] = None, usage: Optional[Dict[str, int]] = None):
+        """Yields chunks of text. If `usage` is given, it is filled with token counts once the stream ends."""
         pass
 
     @abstractmethod
@@ -20,7 +71,84 @@ class LLMProvider(ABC):
         """Embeds text into a vector"""
         pass
 
+    def tool_session(self, system_prompt: str, tools: List[Dict[str, Any]], history: History,
+                     user_message: str, agent_name: str = "Unknown", budget: Optional[ContextBudget] = None) -> ToolSession:
+        """
+        Starts a function-calling conversation. `tools` are declarations
+        {"name", "description", "parameters": JSON Schema}; `history` is client messages
+        [{"role", "content"}] or stored contents (core.conversations).
+        With a ContextBudget (core.context_budget), each turn's prompt is compacted to its budget.
+        """
+        raise NotImplementedError(f"{type(self).__name__} has no native tool support")
+
+class GeminiToolSession(ToolSession):
+    """
+    Function calling on the google-genai client (core.gemini): model turns are replayed
+    from the streamed parts, thought signatures included, as Gemini requires.
+    """
+
+    def __init__(self, system_prompt: str, tools: List[Dict[str, Any]], history: History,
+                 user_message: str, agent_name: str, budget: Optional[ContextBudget] = None):
+        self.client = get_gemini_client()
+        self.agent_name = agent_name
+        self.budget = budget
+        self.pinned_tokens = estimate_tokens(system_prompt + json.dumps(tools, ensure_ascii=False))
+        self.config = types.GenerateContentConfig(
+            tools=[types.Tool(function_declarations=[
+                types.FunctionDeclaration(
+                    name=tool["name"],
+                    description=tool.get("description"),
+                    parameters_json_schema=tool.get("parameters")
+                )
+                for tool in tools
+            ])],
+            temperature=0.2,
+            system_instruction=system_prompt
+        )
+        self.history = list(history) # Client messages or stored contents (core.conversations)
+        # Current exchange: the user message, then model turns and function responses
+        self._exchange = [types.Content(role="user", parts=[types.Part(text=user_message)])]
+
+    @property
+    def exchange(self) -> List[Any]:
+        return self._exchange
+
+    @property
+    def contents(self) -> List[Any]:
+        if self.budget is not None:
+            return self.budget.compact_contents(self.history, self._exchange, self.pinned_tokens)
+        return to_contents(self.history) + self._exchange
+
+    async def stream(self, usage: Optional[Dict[str, int]] = None):
+        async with aclosing(self.client.generate_content_stream(
+            contents=self.contents, config=self.config, agent_name=self.agent_name
+        )) as stream:
+            async for part in stream:
+                if part.function_call:
+                    yield ToolCall(name=part.function_call.name, args=dict(part.function_call.args or {}))
+                elif part.text:
+                    yield TextDelta(part.text, thought=bool(part.thought))
+
+        if stream.parts:
+            self._exchange.append(types.Content(role="model", parts=stream.parts))
+        if usage is not None and stream.usage_metadata:
+            usage.update({
+                "prompt_tokens": stream.usage_metadata.prompt_token_count or 0,
+                "completion_tokens": stream.usage_metadata.candidates_token_count or 0,
+                "total_tokens": stream.usage_metadata.total_token_count or 0
+            })
+
+    def add_tool_results(self, results: List[Tuple[ToolCall, Any]]):
+        self._exchange.append(types.Content(role="user", parts=[
+            types.Part(function_response=types.FunctionResponse(name=call.name, response={"result": result}))
+            if call.native else
+            types.Part(text=f"Résultat de l'outil {call.name} : {json.dumps(result, ensure_ascii=False, default=str)}")
+            for call, result in results
+        ]))
+
 class GeminiProvider(LLMProvider):
+    supports_tools = True
+
     def __init__(self):
         if not settings.GEMINI_API_KEY:
             raise ValueError("GEMINI_API_KEY is not set")
@@ -55,7 +183,7 @@ class GeminiProvider(LLMProvider):
             
         return response.text, usage
 
-    async def generate_stream(self, prompt: str, system_prompt: Optional[str] = None):
+    async def generate_stream(self, prompt: str, system_prompt: Optional[str] = None, usage: Optional[Dict[str, int]] = None):
         full_prompt = prompt
         if system_prompt:
             full_prompt = f"System Instruction: {system_prompt}\n\nUser Query: {prompt}"
@@ -72,25 +200,83 @@ class GeminiProvider(LLMProvider):
                 # Accessing chunk.text raises if the response is blocked or empty (finish_reason)
                 continue
 
+        # Usage metadata is complete on the last chunk
+        if usage is not None and getattr(response, "usage_metadata", None):
+            usage.update({
+                "prompt_tokens": response.usage_metadata.prompt_token_count,
+                "completion_tokens": response.usage_metadata.candidates_token_count,
+                "total_tokens": response.usage_metadata.total_token_count
+            })
+
     async def embed_text(self, text: str) -> list[float]:
         """
         Embeds a single string using models/text-embedding-004.
-        Returns a list of floats (768 dim).
+        Returns a list of floats (768 dim). Served from the embedding cache when possible.
         """
+        model = "models/text-embedding-004"
+        task_type = "retrieval_document" # Optimized for storage
+        cache = get_embedding_cache()
+        cached = await cache.aget(model, task_type, text)
+        if cached is not None:
+            return cached
+
         try:
             result = await genai.embed_content_async(
-                model="models/text-embedding-004",
+                model=model,
                 content=text,
-                task_type="retrieval_document" # Optimized for storage
+                task_type=task_type
             )
+            await cache.aset(model, task_type, text, result["embedding"])
             return result["embedding"]
         except Exception as e:
             raise RuntimeError(f"Gemini Embed failed: {e}")
 
+    def tool_session(self, system_prompt: str, tools: List[Dict[str, Any]], history: History,
+                     user_message: str, agent_name: str = "Unknown", budget: Optional[ContextBudget] = None) -> ToolSession:
+        return GeminiToolSession(system_prompt, tools, history, user_message, agent_name, budget)
+
+# Shared Ollama HTTP client (keep-alive pool), bound to the event loop that created it
+_ollama_client: Optional[httpx.AsyncClient] = None
+_ollama_client_loop = None
+
+def get_ollama_http_client() -> httpx.AsyncClient:
+    global _ollama_client, _ollama_client_loop
+    loop = asyncio.get_running_loop()
+    if _ollama_client is None or _ollama_client.is_closed or _ollama_client_loop is not loop:
+        # Pooled connections can't be reused across event loops (scripts, tests)
+        _ollama_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.OLLAMA_TIMEOUT, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OLLAMA_MAX_CONNECTIONS
+            )
+        )
+        _ollama_client_loop = loop
+    return _ollama_client
+
+async def close_ollama_http_client():
+    global _ollama_client, _ollama_client_loop
+    if _ollama_client is not None:
+        await _ollama_client.aclose()
+        _ollama_client = None
+        _ollama_client_loop = None
+
+def _ollama_usage(data: Dict[str, Any]) -> Dict[str, int]:
+    prompt_tokens = data.get("prompt_eval_count", 0)
+    completion_tokens = data.get("eval_count", 0)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens
+    }
+
 class OllamaProvider(LLMProvider):
+    local_embeddings = True
+
     def __init__(self):
         self.base_url = settings.OLLAMA_BASE_URL
         self.model_name = settings.OLLAMA_MODEL_NAME or "mistral"
+        self.embedder = LexicalEmbedder()
 
     async def generate(self, prompt: str, system_prompt: Optional[str] = None) -> tuple[str, Dict[str, int]]:
         url = f"{self.base_url}/api/generate"
@@ -103,29 +289,65 @@ class OllamaProvider(LLMProvider):
             "format": "json" # Force JSON output for Ollama if needed, but we handle it via schema usually
         }
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(url, json=payload, timeout=60.0)
-                response.raise_for_status()
-                data = response.json()
-                
-                usage = {
-                    "prompt_tokens": data.get("prompt_eval_count", 0),
-                    "completion_tokens": data.get("eval_count", 0),
-                    "total_tokens": data.get("prompt_eval_count", 0) + data.get("eval_count", 0)
-                }
-                
-                return data.get("response", ""), usage
-            except Exception as e:
-                raise RuntimeError(f"Ollama call failed: {str(e)}")
-
-    async def generate_stream(self, prompt: str, system_prompt: Optional[str] = None):
-        # Implementation for Ollama Stream if needed later
-        yield "Not implemented"
+        client = get_ollama_http_client()
+        try:
+            response = await client.post(url, json=payload, timeout=60.0)
+            response.raise_for_status()
+            data = response.json()
+            return data.get("response", ""), _ollama_usage(data)
+        except Exception as e:
+            raise RuntimeError(f"Ollama call failed: {str(e)}")
+
+    async def generate_stream(self, prompt: str, system_prompt: Optional[str] = None, usage: Optional[Dict[str, int]] = None):
+        """
+        Streams /api/generate (NDJSON: one {"response": "...", "done": false} object per line,
+        the final {"done": true} line carries the token counts).
+        If the consumer stops early (SSE client disconnected), the response is closed,
+        which drops the connection and makes Ollama abort the generation.
+        """
+        url = f"{self.base_url}/api/generate"
+        payload = {
+            "model": self.model_name,
+            "prompt": prompt,
+            "stream": True,
+            "system": system_prompt if system_prompt else ""
+        }
+
+        client = get_ollama_http_client()
+        try:
+            async with client.stream("POST", url, json=payload) as response:
+                if response.is_error:
+                    await response.aread()
+                    raise RuntimeError(f"Ollama stream failed: HTTP {response.status_code} {response.text[:200]}")
+
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    data = json.loads(line)
+                    if data.get("error"):
+                        raise RuntimeError(f"Ollama stream failed: {data['error']}")
+
+                    token = data.get("response")
+                    if token:
+                        yield token
+
+                    if data.get("done"):
+                        if usage is not None:
+                            usage.update(_ollama_usage(data))
+                        break
+        except (GeneratorExit, asyncio.CancelledError):
+            # Leaving the `async with` closes the response before it is fully read
+            logger.info("Ollama stream cancelled by the consumer, connection closed")
+            raise
+        except httpx.HTTPError as e:
+            raise RuntimeError(f"Ollama stream failed: {str(e)}")
 
     async def embed_text(self, text: str) -> list[float]:
-        # TODO: Implement using /api/embeddings or similar
-        raise NotImplementedError("Vector search not yet supported with Ollama provider")
+        """
+        Local lexical vector (LEXICAL_EMBEDDING_DIM floats): no embedding model, no network.
+        Only comparable with a LexicalIndex: searches go through embed_or_lexical.
+        """
+        return await self.embedder.embed_text(text)
 
 def get_llm_provider() -> LLMProvider:
     provider = settings.LLM_PROVIDER.lower()
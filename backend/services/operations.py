@@ -2,6 +2,7 @@ import logging
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from supabase import Client
+from core.cache import TTLCache
 from core.config import settings
 from services.persistence import get_supabase_client, BotaniquePersistenceService
 from schemas.operations import (
@@ -12,10 +13,20 @@ from schemas.operations import (
 
 logger = logging.getLogger(__name__)
 
+SUJET_SUMMARY_SELECT = "*, botanique_plantes(nom_commun, variete)"
+
+# tracking_id -> subject UUID. Tracking IDs are immutable once generated,
+# so the TTL only bounds staleness for deleted subjects.
+_tracking_id_cache = TTLCache(
+    name="tracking_ids",
+    maxsize=settings.TRACKING_ID_CACHE_SIZE,
+    ttl=settings.TRACKING_ID_CACHE_TTL
+)
+
 class OperationsService:
-    def __init__(self):
-        self.supabase = get_supabase_client()
-        self.persistence = BotaniquePersistenceService()
+    def __init__(self, supabase: Optional[Client] = None):
+        self.supabase = supabase or get_supabase_client()
+        self.persistence = BotaniquePersistenceService(self.supabase)
 
     # --- SAISONS ---
     def get_active_season(self) -> Optional[Saison]:
@@ -43,7 +54,7 @@ class OperationsService:
         Better: List all subjects linked to this season via Lifecycle? 
         Simplified V1: List ALL subjects that are NOT 'TERMINE' + created in this season or Vivace.
         """
-        query = self.supabase.table("sujets").select("*, botanique_plantes(nom_commun, variete)")
+        query = self.supabase.table("sujets").select(SUJET_SUMMARY_SELECT)
         
         # TODO: Implement complex filter (Active Season OR Vivace)
         # For V1, just list all non-terminated
@@ -51,26 +62,73 @@ class OperationsService:
         
         res = query.order("created_at", desc=True).execute()
         
-        summary_list = []
+        return [self._to_summary(item) for item in res.data]
+
+    def get_subject_by_tracking_id(self, tracking_id: str) -> Optional[SujetSummary]:
+        """
+        Direct lookup of a subject by its Tracking ID (unique index on sujets.tracking_id).
+        """
+        return self.get_subjects_by_tracking_ids([tracking_id]).get(tracking_id)
+
+    def get_subjects_by_tracking_ids(self, tracking_ids: List[str]) -> Dict[str, SujetSummary]:
+        """
+        Batched lookup: one query for any number of Tracking IDs.
+        Returns a dict tracking_id -> SujetSummary (unknown IDs are absent).
+        """
+        unique_ids = list(dict.fromkeys(t for t in tracking_ids if t))
+        if not unique_ids:
+            return {}
+
+        res = self.supabase.table("sujets")\
+            .select(SUJET_SUMMARY_SELECT)\
+            .in_("tracking_id", unique_ids)\
+            .execute()
+
+        subjects = {}
         for item in res.data:
-            # Enrich with plant name
-            plant_data = item.get("botanique_plantes")
-            plant_name = "Inconnu"
-            if plant_data:
-                plant_name = f"{plant_data.get('nom_commun')} {plant_data.get('variete') or ''}".strip()
-            elif item.get("nom"):
-                 plant_name = item.get("nom")
-
-            summary_list.append(SujetSummary(
-                id=item["id"],
-                tracking_id=item["tracking_id"],
-                nom=plant_name,
-                quantite=item["quantite"],
-                unite=item["unite"],
-                stade=item["stade"],
-                variete_nom=plant_name
-            ))
-        return summary_list
+            summary = self._to_summary(item)
+            subjects[summary.tracking_id] = summary
+            _tracking_id_cache.set(summary.tracking_id, summary.id)
+        return subjects
+
+    def resolve_subject_id(self, tracking_id: str) -> Optional[str]:
+        """
+        Resolves a Tracking ID to the subject UUID (TTL-cached).
+        """
+        subject_id = _tracking_id_cache.get(tracking_id)
+        if subject_id:
+            return subject_id
+
+        res = self.supabase.table("sujets")\
+            .select("id")\
+            .eq("tracking_id", tracking_id)\
+            .limit(1)\
+            .execute()
+        if not res.data:
+            return None
+
+        subject_id = res.data[0]["id"]
+        _tracking_id_cache.set(tracking_id, subject_id)
+        return subject_id
+
+    def _to_summary(self, item: Dict[str, Any]) -> SujetSummary:
+        # Enrich with plant name
+        plant_data = item.get("botanique_plantes")
+        plant_name = "Inconnu"
+        if plant_data:
+            plant_name = f"{plant_data.get('nom_commun')} {plant_data.get('variete') or ''}".strip()
+        elif item.get("nom"):
+             plant_name = item.get("nom")
+
+        return SujetSummary(
+            id=item["id"],
+            tracking_id=item["tracking_id"],
+            nom=plant_name,
+            quantite=item["quantite"],
+            unite=item["unite"],
+            stade=item["stade"],
+            variete_nom=plant_name
+        )
 
     def create_subject(self, subject: SujetCreate, initial_event_data: Dict[str, Any] = {}) -> Sujet:
         # Generate Tracking ID
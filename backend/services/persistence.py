@@ -1,27 +1,123 @@
 import logging
 import os
+import threading
+import time
+import httpx
 from typing import List, Optional, Dict, Any
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
 from datetime import datetime
 from core.config import settings
+from core.text import tokenize
 
 logger = logging.getLogger(__name__)
 
+# --- Shared Client Registry ---
+# A single process-wide Supabase client backed by one pooled keep-alive HTTP session.
+# Services, tools and agents all reuse it instead of paying a create_client()
+# (new HTTP session + TCP/TLS handshake) on every instantiation.
+_supabase_client: Optional[Client] = None
+_http_client: Optional[httpx.Client] = None
+_client_lock = threading.Lock()
+
+
+def init_supabase_client() -> Optional[Client]:
+    """
+    Creates the shared client (called at FastAPI startup, or lazily on first use).
+    """
+    global _supabase_client, _http_client
+    with _client_lock:
+        if _supabase_client is not None:
+            return _supabase_client
+
+        url: str = os.environ.get("SUPABASE_URL")
+        key: str = os.environ.get("SUPABASE_KEY")
+        if not url or not key:
+            return None
+        try:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=settings.SUPABASE_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.SUPABASE_MAX_CONNECTIONS,
+                    keepalive_expiry=settings.SUPABASE_KEEPALIVE_EXPIRY
+                ),
+                timeout=settings.SUPABASE_TIMEOUT,
+                follow_redirects=True,
+                http2=True
+            )
+            _supabase_client = create_client(url, key, options=ClientOptions(httpx_client=_http_client))
+            logger.info("Shared Supabase client initialized")
+            return _supabase_client
+        except Exception as e:
+            logger.error(f"Failed to create Supabase client: {e}")
+            return None
+
 
 def get_supabase_client() -> Optional[Client]:
-    url: str = os.environ.get("SUPABASE_URL")
-    key: str = os.environ.get("SUPABASE_KEY")
-    if not url or not key:
-        return None
-    try:
-        return create_client(url, key)
-    except Exception as e:
-        logger.error(f"Failed to create Supabase client: {e}")
-        return None
+    """
+    Returns the shared Supabase client (None if not configured).
+    """
+    if _supabase_client is not None:
+        return _supabase_client
+    return init_supabase_client()
+
+
+def close_supabase_client():
+    """
+    Closes the pooled HTTP session (called at FastAPI shutdown).
+    """
+    global _supabase_client, _http_client
+    with _client_lock:
+        if _http_client is not None:
+            _http_client.close()
+        _supabase_client = None
+        _http_client = None
+
+
+def get_db() -> Optional[Client]:
+    """
+    FastAPI dependency: `supabase: Client = Depends(get_db)`.
+    """
+    return get_supabase_client()
+
+
+def match_tuning_params() -> Dict[str, Optional[int]]:
+    """
+    ANN recall/latency knobs accepted by the match_fiches / match_botanique RPCs.
+    """
+    params = {"probes": settings.MATCH_PROBES, "ef_search": settings.MATCH_EF_SEARCH}
+    if settings.MATCH_RERANK is not None:
+        params["rerank"] = settings.MATCH_RERANK
+    return params
+
+
+# --- Varieties Summary Cache ---
+# Catalog projection used as CultureAgent prompt context. Rebuilt only when the
+# catalog version (row count + max(updated_at)) changes; local writes invalidate it.
+_varieties_cache: Dict[str, Any] = {"version": None, "rows": [], "text": "", "checked_at": 0.0}
+_varieties_lock = threading.Lock()
+
+
+def invalidate_varieties_cache():
+    with _varieties_lock:
+        _varieties_cache["version"] = None
+        _varieties_cache["checked_at"] = 0.0
+
+
+def _sync_plant_catalog(row: Optional[Dict[str, Any]] = None, deleted_id: Optional[str] = None):
+    """
+    Applies a local botanique_plantes write to the in-memory catalog index and prompt cache.
+    """
+    from services.catalog_index import catalog_upsert, catalog_remove, PLANTS_CATALOG
+    invalidate_varieties_cache()
+    if deleted_id:
+        catalog_remove(PLANTS_CATALOG, deleted_id)
+    else:
+        catalog_upsert(PLANTS_CATALOG, row)
+
 
 class BotaniquePersistenceService:
-    def __init__(self):
-        self.supabase = get_supabase_client()
+    def __init__(self, supabase: Optional[Client] = None):
+        self.supabase = supabase or get_supabase_client()
 
 
     def save_plant(self, plant_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -46,6 +142,7 @@ class BotaniquePersistenceService:
             }
 
             response = self.supabase.table("botanique_plantes").insert(payload).execute()
+            _sync_plant_catalog(response.data[0] if response.data else None)
             
             # Debug log
             logger.info(f"Supabase Insert Response: {response}")
@@ -84,6 +181,7 @@ class BotaniquePersistenceService:
             }
 
             response = self.supabase.table("botanique_plantes").update(payload).eq("id", plant_id).execute()
+            _sync_plant_catalog(response.data[0] if response.data else None)
             
             if response.data and len(response.data) > 0:
                 return response.data[0]
@@ -164,6 +262,7 @@ class BotaniquePersistenceService:
 
         try:
             self.supabase.table("botanique_plantes").delete().eq("id", plant_id).execute()
+            _sync_plant_catalog(deleted_id=plant_id)
             return True
         except Exception as e:
             logger.error(f"Error deleting plant {plant_id}: {e}")
@@ -171,58 +270,13 @@ class BotaniquePersistenceService:
     def find_best_match(self, query: str) -> Optional[Dict[str, Any]]:
         """
         Attempts to find a plant matching the query string (Name + Variety).
-        Improvement: Token-based search + Python Scoring.
+        Delegates to the shared plant search (trigram, optionally fused with vectors).
         """
-        if not self.supabase or not query:
+        if not query:
             return None
 
-        try:
-            # 1. Broad candidate search using the first meaningful word
-            # We assume the user query starts with the plant name (e.g. "Tomate ...", "Carotte ...")
-            words = query.strip().split()
-            if not words:
-                return None
-            
-            first_word = words[0]
-            # Strip punctuation if needed? Let's keep it simple.
-            
-            response = self.supabase.table("botanique_plantes")\
-                .select("id, nom_commun, variete")\
-                .or_(f"nom_commun.ilike.%{first_word}%,variete.ilike.%{first_word}%")\
-                .execute()
-            
-            candidates = response.data
-            if not candidates:
-                return None
-
-            # 2. Python Scoring: Word Intersection
-            # We want the candidate whose (Nom + Variete) shares the most words with Query.
-            best_c = None
-            best_score = -1 
-            
-            query_tokens = set(q.lower() for q in words)
-            
-            for c in candidates:
-                c_tokens = set(f"{c['nom_commun']} {c.get('variete') or ''}".lower().split())
-                
-                # Score = Intersection count
-                common = query_tokens.intersection(c_tokens)
-                score = len(common)
-                
-                # Bonus for exact full string match? (Optional)
-                
-                if score > best_score:
-                    best_score = score
-                    best_c = c
-            
-            # Threshold? If score is 0, maybe filter out?
-            # But since we filtered with first_word, score is likely at least 1.
-            
-            return best_c
-
-        except Exception as e:
-            logger.error(f"Error searching plant for query '{query}': {e}")
-            return None
+        from services.plant_search import PlantSearchService
+        return PlantSearchService(self.supabase).best_match(query)
 
     def find_similar_plants_vector(self, vector: list[float], limit: int = 5) -> List[Dict[str, Any]]:
         """
@@ -247,10 +301,21 @@ class BotaniquePersistenceService:
             # Wait, user asked to "not modify existing methods".
             # I will implement this method assuming the SQL function `match_botanique` exists (I will add it to the SQL file).
             
+            # Local in-process index when enabled and synced (same columns as match_botanique)
+            from services.vector_index import get_vector_index, PLANTS_INDEX
+            index = get_vector_index(PLANTS_INDEX)
+            if index is not None:
+                return [
+                    {"id": id, "nom_commun": metadata.get("nom_commun"), "variete": metadata.get("variete"),
+                     "espece": metadata.get("espece"), "similarity": score}
+                    for id, score, metadata in index.search(vector, k=limit, threshold=0.5)
+                ]
+
             params = {
                 "query_embedding": vector,
                 "match_threshold": 0.5, # Minimum similarity
-                "match_count": limit
+                "match_count": limit,
+                **match_tuning_params()
             }
             
             response = self.supabase.rpc("match_botanique", params).execute()
@@ -261,38 +326,86 @@ class BotaniquePersistenceService:
             logger.error(f"Error in vector search: {e}")
             return []
 
-    def get_all_varieties_summary(self) -> str:
+    def get_all_varieties_summary(self, query: Optional[str] = None) -> str:
         """
         Returns a formatted text list of all available varieties.
         Format: "- [Nom Commun] [Variété] (Catégorie: X, Cycle: Y)"
+        If a query is given and the catalog exceeds VARIETIES_CONTEXT_MAX_ROWS,
+        only the varieties relevant to the query are listed (retrieval mode).
         """
         if not self.supabase:
             return "Référentiel botanique indisponible."
         
         try:
-            # Fetch minimal needed fields
-            response = self.supabase.table("botanique_plantes")\
-                .select("nom_commun, variete, data")\
-                .order("nom_commun", desc=False)\
-                .execute()
+            rows, text = self._get_varieties_catalog()
 
-            lines = []
-            for item in response.data:
-                nom = item.get("nom_commun", "Inconnu")
-                variete = item.get("variete") or ""
-                data = item.get("data") or {}
-                
-                cat = data.get("categorisation", {}).get("categorie", "Inconnu")
-                cycle = data.get("cycle_vie", {}).get("type", "Inconnu")
-                
-                line = f"- {nom} {variete}".strip() + f" [Catégorie: {cat}, Cycle: {cycle}]"
-                lines.append(line)
-            
-            if not lines:
+            if not rows:
                 return "Aucune variété définie dans le référentiel."
+
+            if query and len(rows) > settings.VARIETIES_CONTEXT_MAX_ROWS:
+                return self._relevant_varieties_summary(rows, query)
                 
-            return "\n".join(lines)
+            return text
 
         except Exception as e:
             logger.error(f"Error getting varieties summary: {e}")
             return "Erreur lors de la récupération du référentiel."
+
+    def _catalog_version(self) -> str:
+        """
+        Cheap catalog fingerprint: row count + max(updated_at) (single indexed row).
+        """
+        response = self.supabase.table("botanique_plantes")\
+            .select("updated_at", count="exact")\
+            .order("updated_at", desc=True)\
+            .limit(1)\
+            .execute()
+        max_updated_at = response.data[0]["updated_at"] if response.data else None
+        return f"{response.count}:{max_updated_at}"
+
+    def _get_varieties_catalog(self) -> tuple[List[Dict[str, Any]], str]:
+        now = time.monotonic()
+        with _varieties_lock:
+            if _varieties_cache["version"] is not None and \
+                    now - _varieties_cache["checked_at"] < settings.VARIETIES_CACHE_CHECK_INTERVAL:
+                return _varieties_cache["rows"], _varieties_cache["text"]
+
+        version = self._catalog_version()
+        with _varieties_lock:
+            if version == _varieties_cache["version"]:
+                _varieties_cache["checked_at"] = now
+                return _varieties_cache["rows"], _varieties_cache["text"]
+
+        # Project only the needed JSON fields (never the full `data` JSONB)
+        response = self.supabase.table("botanique_plantes")\
+            .select("nom_commun, variete, categorie:data->categorisation->>categorie, cycle:data->cycle_vie->>type")\
+            .order("nom_commun", desc=False)\
+            .execute()
+
+        rows = []
+        for item in response.data:
+            nom = item.get("nom_commun") or "Inconnu"
+            variete = item.get("variete") or ""
+            cat = item.get("categorie") or "Inconnu"
+            cycle = item.get("cycle") or "Inconnu"
+            rows.append({
+                "line": f"- {nom} {variete}".strip() + f" [Catégorie: {cat}, Cycle: {cycle}]",
+                "tokens": frozenset(tokenize(f"{nom} {variete}"))
+            })
+        text = "\n".join(row["line"] for row in rows)
+
+        with _varieties_lock:
+            _varieties_cache.update({"version": version, "rows": rows, "text": text, "checked_at": now})
+        logger.info(f"Varieties summary cache rebuilt ({len(rows)} varieties, version {version})")
+        return rows, text
+
+    def _relevant_varieties_summary(self, rows: List[Dict[str, Any]], query: str) -> str:
+        query_tokens = set(tokenize(query))
+        matches = [row["line"] for row in rows if row["tokens"] & query_tokens]
+        matches = matches[:settings.VARIETIES_CONTEXT_MAX_ROWS]
+
+        if not matches:
+            return f"Aucune variété du référentiel ({len(rows)} au total) ne correspond directement à la demande. Utilise `search_garden` pour vérifier."
+
+        header = f"(Extrait : {len(matches)} variétés pertinentes sur {len(rows)}. Utilise `search_garden` pour les autres.)"
+        return header + "\n" + "\n".join(matches)
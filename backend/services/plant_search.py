@@ -0,0 +1,138 @@
+import logging
+from typing import Any, Dict, List, Optional
+
+from core.config import settings
+from core.gemini import get_gemini_client
+from services.catalog_index import get_catalog_index, PLANTS_CATALOG
+from services.persistence import get_supabase_client, BotaniquePersistenceService
+
+logger = logging.getLogger(__name__)
+
+
+def reciprocal_rank_fusion(rankings: List[List[Dict[str, Any]]], k: int = 60) -> List[Dict[str, Any]]:
+    """
+    Merges ranked result lists: score(row) = sum over lists of 1 / (k + rank).
+    Rows are identified by "id"; fields from every list are merged.
+    """
+    scores: Dict[str, float] = {}
+    rows: Dict[str, Dict[str, Any]] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            key = str(row["id"])
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            rows[key] = {**rows.get(key, {}), **row}
+    ordered = sorted(scores, key=lambda key: scores[key], reverse=True)
+    return [{**rows[key], "score": round(scores[key], 6)} for key in ordered]
+
+
+class PlantSearchService:
+    """
+    Single entry point for plant lookup (rechercher, search_garden, find_best_match).
+
+    Lexical: trigram similarity on the accent-folded "nom variete", tolerant to plurals,
+    accents and typos. Served by the in-memory catalog index once synced, else by the
+    search_plants_trgm RPC (GIN index).
+    Hybrid (PLANT_SEARCH_HYBRID): lexical and embedding rankings are fused by reciprocal rank.
+    Blocking (PostgREST / embedding calls): run it on the DB pool from async code.
+    """
+
+    def __init__(self, supabase=None, hybrid: Optional[bool] = None):
+        self.supabase = supabase or get_supabase_client()
+        self.hybrid = settings.PLANT_SEARCH_HYBRID if hybrid is None else hybrid
+
+    def lexical(self, query: str, limit: int = None) -> List[Dict[str, Any]]:
+        index = get_catalog_index(PLANTS_CATALOG)
+        if index is not None:
+            rows = index.search(query, limit or settings.PLANT_SEARCH_CANDIDATES, settings.PLANT_SEARCH_MIN_SIMILARITY)
+            return [self._lexical_row(r) for r in rows]
+        if not self.supabase:
+            return []
+        try:
+            response = self.supabase.rpc("search_plants_trgm", {
+                "query": query,
+                "match_count": limit or settings.PLANT_SEARCH_CANDIDATES,
+                "min_similarity": settings.PLANT_SEARCH_MIN_SIMILARITY
+            }).execute()
+        except Exception as e:
+            logger.error(f"Trigram plant search failed for '{query}': {e}")
+            return []
+        return [self._lexical_row(r) for r in response.data or []]
+
+    @staticmethod
+    def _lexical_row(r: Dict[str, Any]) -> Dict[str, Any]:
+        return {"id": r["id"], "nom_commun": r["nom_commun"], "variete": r.get("variete"),
+                "espece": r.get("espece"), "lexical_similarity": round(r["similarity"], 3)}
+
+    def semantic(self, query: str, limit: int = None) -> List[Dict[str, Any]]:
+        try:
+            # Same task as the stored botanique_plantes vectors (see services/reindex.py)
+            vector = get_gemini_client().embed_content_sync(query, task_type="RETRIEVAL_DOCUMENT")
+        except Exception as e:
+            logger.error(f"Query embedding failed for '{query}': {e}")
+            return []
+        rows = BotaniquePersistenceService(self.supabase).find_similar_plants_vector(
+            vector, limit=limit or settings.PLANT_SEARCH_CANDIDATES
+        )
+        return [
+            {"id": r["id"], "nom_commun": r["nom_commun"], "variete": r.get("variete"),
+             "espece": r.get("espece"), "vector_similarity": round(r["similarity"], 3)}
+            for r in rows
+        ]
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Best plants for the query, best first (id, nom_commun, variete, espece, score...).
+        """
+        q = (query or "").strip()
+        if not q:
+            return []
+
+        lexical = self.lexical(q)
+        if not self.hybrid:
+            return [{**row, "score": row["lexical_similarity"]} for row in lexical[:limit]]
+
+        return reciprocal_rank_fusion([lexical, self.semantic(q)])[:limit]
+
+    def search_garden(self, query: str, limit: int = 5) -> Dict[str, Any]:
+        """
+        Catalog matches + active subjects (linked to a match or matching by name)
+        in one search_garden RPC call. Plants already resolvable locally (catalog
+        index, hybrid ranking) are passed as plant_ids, else the RPC looks them up.
+        On failure, "error" is set and subjects are empty.
+        """
+        q = (query or "").strip()
+        if not q:
+            return {"plants": [], "subjects": []}
+
+        plants = None
+        if self.hybrid or get_catalog_index(PLANTS_CATALOG) is not None:
+            plants = self.search(q, limit=limit)
+        if not self.supabase:
+            return {"plants": plants or [], "subjects": [], "error": "DB Connection failed"}
+
+        try:
+            response = self.supabase.rpc("search_garden", {
+                "query": q,
+                "plant_ids": [p["id"] for p in plants] if plants is not None else None,
+                "match_count": limit,
+                "min_similarity": settings.PLANT_SEARCH_MIN_SIMILARITY
+            }).execute()
+        except Exception as e:
+            logger.error(f"Garden search failed for '{q}': {e}")
+            return {"plants": plants or [], "subjects": [], "error": str(e)}
+
+        data = response.data or {}
+        if plants is None:
+            plants = [{**row, "score": row["lexical_similarity"]}
+                      for row in (self._lexical_row(r) for r in data.get("plants") or [])]
+        return {"plants": plants, "subjects": data.get("subjects") or []}
+
+    def best_match(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        The plant the query most likely designates, or None.
+        A purely semantic neighbour must be very close: "Tomate" must not resolve to "Poivron".
+        """
+        for row in self.search(query, limit=3):
+            if "lexical_similarity" in row or row.get("vector_similarity", 0.0) >= settings.PLANT_MATCH_MIN_VECTOR_SIMILARITY:
+                return row
+        return None
@@ -1,12 +1,13 @@
 import logging
 from typing import List, Optional, Dict, Any
+from core.database import execute_async
 from services.persistence import BotaniquePersistenceService
 
 logger = logging.getLogger(__name__)
 
 class ReferentielService:
-    def __init__(self):
-        self.persistence = BotaniquePersistenceService()
+    def __init__(self, supabase=None):
+        self.persistence = BotaniquePersistenceService(supabase)
         self.supabase = self.persistence.supabase
 
     async def get_gestes(self, famille: Optional[str] = None) -> List[Dict[str, Any]]:
@@ -19,7 +20,7 @@ class ReferentielService:
             if famille:
                 query = query.eq("famille", famille)
                 
-            response = query.order("famille").order("verbe").execute()
+            response = await execute_async(query.order("famille").order("verbe"))
             return response.data
         except Exception as e:
             logger.error(f"Failed to fetch gestes: {e}")
@@ -34,7 +35,7 @@ class ReferentielService:
             # but let's try .select('famille').
             # Or just fetch all and dedup in python if small dataset (28 items).
             # For scalability, RPC is better, but here Python dedup is fine.
-            response = self.supabase.table("referentiel_gestes").select("famille").execute()
+            response = await execute_async(self.supabase.table("referentiel_gestes").select("famille"))
             familles = sorted(list(set(item['famille'] for item in response.data)))
             return familles
         except Exception as e:
@@ -0,0 +1,238 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from core.config import settings
+from core.database import execute_async
+from core.gemini import get_gemini_client
+from services.persistence import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+
+class ReindexTarget:
+    """
+    A vector column to keep in sync with the text it is computed from.
+    """
+
+    def __init__(self, name: str, table: str, columns: str, hash_column: str,
+                 build_text: Callable[[Dict[str, Any]], str], task_type: str, update_rpc: str):
+        self.name = name
+        self.table = table
+        self.columns = columns # Text source columns (never the vector itself)
+        self.hash_column = hash_column
+        self.build_text = build_text
+        self.task_type = task_type
+        self.update_rpc = update_rpc
+
+
+def plant_text(row: Dict[str, Any]) -> str:
+    # "Tomate Coeur de Boeuf (Solanum lycopersicum)"
+    return f"{row.get('nom_commun') or ''} {row.get('variete') or ''} ({row.get('espece') or ''})".strip()
+
+
+TARGETS = {
+    "botanique_plantes": ReindexTarget(
+        name="botanique_plantes",
+        table="botanique_plantes",
+        columns="id, nom_commun, espece, variete",
+        hash_column="embedding_source_hash",
+        build_text=plant_text,
+        task_type="RETRIEVAL_DOCUMENT", # Same vectors as GeminiProvider.embed_text (search_vector)
+        update_rpc="bulk_update_botanique_embeddings"
+    ),
+    "fiches_botanique": ReindexTarget(
+        name="fiches_botanique",
+        table="fiches_botanique",
+        columns="id, nom",
+        hash_column="embedding_nom_source_hash",
+        build_text=lambda row: row.get("nom") or "",
+        task_type="SEMANTIC_SIMILARITY", # Same vectors as FicheService (embed_content)
+        update_rpc="bulk_update_fiches_embeddings"
+    ),
+}
+
+
+class RateLimiter:
+    """
+    Spaces out calls to at most `per_minute` per minute (shared by concurrent workers).
+    """
+
+    def __init__(self, per_minute: int):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class Checkpoint:
+    """
+    Last fully processed id per target, in a small JSON file.
+    Rows are scanned in id order, so a crashed run resumes after that id.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+
+    def _read(self) -> Dict[str, str]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Unreadable reindex checkpoint {self.path}, starting over: {e}")
+            return {}
+
+    def _write(self, data: Dict[str, str]):
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path) # Atomic: a crash never leaves a half-written file
+
+    def load(self, target: str) -> Optional[str]:
+        return self._read().get(target)
+
+    def save(self, target: str, last_id: str):
+        data = self._read()
+        data[target] = last_id
+        self._write(data)
+
+    def clear(self, target: str):
+        data = self._read()
+        if data.pop(target, None) is not None:
+            self._write(data)
+
+
+class ReindexPipeline:
+    """
+    Re-embeds the rows of a target whose vector is missing or stale.
+
+    Rows are scanned by pages in id order (text columns + source hash only). Stale rows are
+    embedded in multi-text batches by up to `concurrency` workers behind a shared rate limiter,
+    and written back with one bulk RPC per batch. The last id of each completed page is
+    checkpointed; the checkpoint is cleared once the whole table has been scanned.
+    """
+
+    def __init__(self, target: ReindexTarget, supabase=None, gemini=None,
+                 batch_size: int = None, concurrency: int = None, rate_per_minute: int = None,
+                 page_size: int = None, checkpoint_path: Optional[str] = None,
+                 force: bool = False, max_retries: int = 3):
+        self.target = target
+        self.supabase = supabase or get_supabase_client()
+        self.gemini = gemini or get_gemini_client()
+        self.batch_size = min(batch_size or settings.EMBED_BATCH_SIZE, 100) # API limit per call
+        self.concurrency = concurrency or settings.EMBED_CONCURRENCY
+        self.rate_limiter = RateLimiter(rate_per_minute if rate_per_minute is not None else settings.EMBED_RATE_LIMIT_RPM)
+        self.page_size = page_size or settings.REINDEX_PAGE_SIZE
+        self.checkpoint = Checkpoint(checkpoint_path if checkpoint_path is not None else settings.REINDEX_CHECKPOINT_PATH)
+        self.force = force
+        self.max_retries = max_retries
+
+        self.stats = {"scanned": 0, "stale": 0, "written": 0, "errors": 0}
+
+    async def run(self) -> Dict[str, Any]:
+        if not self.supabase:
+            raise RuntimeError("Supabase client not available")
+
+        start = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        last_id = self.checkpoint.load(self.target.name)
+        if last_id:
+            logger.info(f"[{self.target.name}] Resuming after id {last_id}")
+
+        while True:
+            rows = await self._fetch_page(last_id)
+            if not rows:
+                break
+            self.stats["scanned"] += len(rows)
+
+            stale = self._stale_rows(rows)
+            self.stats["stale"] += len(stale)
+            batches = [stale[i:i + self.batch_size] for i in range(0, len(stale), self.batch_size)]
+            await asyncio.gather(*(self._process_batch(batch, semaphore) for batch in batches))
+
+            last_id = rows[-1]["id"]
+            self.checkpoint.save(self.target.name, last_id)
+            self._log_progress(start)
+
+            if len(rows) < self.page_size:
+                break
+
+        self.checkpoint.clear(self.target.name)
+        return self._report(start)
+
+    async def _fetch_page(self, after_id: Optional[str]) -> List[Dict[str, Any]]:
+        query = self.supabase.table(self.target.table)\
+            .select(f"{self.target.columns}, {self.target.hash_column}")\
+            .order("id")\
+            .limit(self.page_size)
+        if after_id:
+            query = query.gt("id", after_id)
+        response = await execute_async(query)
+        return response.data or []
+
+    def _stale_rows(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        stale = []
+        for row in rows:
+            text = self.target.build_text(row)
+            if not text:
+                continue
+            source_hash = self.gemini.embedding_source_hash(text, self.target.task_type)
+            if self.force or row.get(self.target.hash_column) != source_hash:
+                stale.append({"id": row["id"], "text": text, "source_hash": source_hash})
+        return stale
+
+    async def _process_batch(self, batch: List[Dict[str, Any]], semaphore: asyncio.Semaphore):
+        async with semaphore:
+            for attempt in range(1, self.max_retries + 1):
+                try:
+                    await self.rate_limiter.acquire()
+                    vectors = await self.gemini.embed_contents([row["text"] for row in batch], self.target.task_type)
+                    payload = [
+                        {"id": row["id"], "embedding": vector, "source_hash": row["source_hash"]}
+                        for row, vector in zip(batch, vectors)
+                    ]
+                    await execute_async(self.supabase.rpc(self.target.update_rpc, {"rows": payload}))
+                    self.stats["written"] += len(batch)
+                    return
+                except Exception as e:
+                    if attempt == self.max_retries:
+                        # Rows keep their old hash: picked up again by the next run
+                        logger.error(f"[{self.target.name}] Batch of {len(batch)} rows failed after {attempt} attempts: {e}")
+                        self.stats["errors"] += len(batch)
+                        return
+                    delay = 2 ** attempt
+                    logger.warning(f"[{self.target.name}] Batch failed ({e}), retrying in {delay}s")
+                    await asyncio.sleep(delay)
+
+    def _log_progress(self, start: float):
+        elapsed = time.perf_counter() - start
+        rate = self.stats["written"] / elapsed if elapsed else 0.0
+        logger.info(
+            f"[{self.target.name}] scanned={self.stats['scanned']} stale={self.stats['stale']} "
+            f"written={self.stats['written']} errors={self.stats['errors']} ({rate:.1f} rows/s)"
+        )
+
+    def _report(self, start: float) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - start
+        return {
+            "target": self.target.name,
+            **self.stats,
+            "elapsed_s": round(elapsed, 2),
+            "rows_per_sec": round(self.stats["written"] / elapsed, 1) if elapsed else 0.0
+        }
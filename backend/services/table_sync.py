@@ -0,0 +1,163 @@
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from core.database import run_db
+from services.persistence import get_supabase_client
+
+logger = logging.getLogger(__name__)
+
+
+class TableSync:
+    """
+    Keeps an in-process index in sync with a table: rows changed since the last sync
+    (updated_at >= synced_at) are fetched page by page and applied; when the row count
+    differs from the index size, ids are reconciled to drop deleted rows.
+
+    The index provides `synced_at`, `ready`, `retain(ids)` and `__len__`. Subclasses
+    apply the fetched rows (`_apply`) and may restrict the synced rows (`_filter`).
+    """
+
+    def __init__(self, index, table: str, columns: str, supabase=None, page_size: int = 1000):
+        self.index = index
+        self.table = table
+        self.columns = columns # Must include id and updated_at
+        self.supabase = supabase or get_supabase_client()
+        self.page_size = page_size
+
+    @property
+    def select_columns(self) -> str:
+        return self.columns
+
+    def _filter(self, query):
+        # Rows of the table that belong in the index
+        return query
+
+    def _apply(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Applies a page of changed rows to the index; returns the rows it holds now.
+        """
+        raise NotImplementedError
+
+    def refresh(self) -> int:
+        """
+        Blocking (PostgREST calls): run it on the DB pool from async code.
+        Returns the number of upserted rows.
+        """
+        if not self.supabase:
+            return 0
+
+        upserted = 0
+        synced_at = self.index.synced_at
+        offset = 0
+        while True:
+            query = self.supabase.table(self.table)\
+                .select(self.select_columns)\
+                .order("updated_at")\
+                .order("id")\
+                .range(offset, offset + self.page_size - 1)
+            if self.index.synced_at:
+                query = query.gte("updated_at", self.index.synced_at)
+            rows = query.execute().data or []
+
+            applied = self._apply(rows)
+            upserted += len(applied)
+            for row in applied:
+                if row.get("updated_at") and (synced_at is None or row["updated_at"] > synced_at):
+                    synced_at = row["updated_at"]
+
+            if len(rows) < self.page_size:
+                break
+            offset += self.page_size
+
+        count = self._filter(self.supabase.table(self.table).select("id", count="exact")).limit(1).execute().count
+        if count is not None and count != len(self.index):
+            self.index.retain([row["id"] for row in self._all_ids()])
+
+        self.index.synced_at = synced_at
+        self.index.ready = True
+        return upserted
+
+    def close(self):
+        """
+        Called when the refresher stops (e.g. to persist the index).
+        """
+
+    def _all_ids(self) -> List[Dict[str, Any]]:
+        rows, offset = [], 0
+        while True:
+            page = self._filter(self.supabase.table(self.table).select("id")).order("id")\
+                .range(offset, offset + 999).execute().data or []
+            rows.extend(page)
+            if len(page) < 1000:
+                return rows
+            offset += 1000
+
+
+class SyncedIndexes:
+    """
+    Registry of table-synced indexes of one kind, built on first use, and their
+    background refresher (initial sync + periodic delta refresh).
+    """
+
+    def __init__(self, kind: str, names: Sequence[str], build: Callable[[str], TableSync],
+                 enabled: Callable[[], bool], interval: Callable[[], float]):
+        self.kind = kind # "Vector index", "Catalog index" (logs)
+        self.names = tuple(names) # Refreshed in this order
+        self._build = build # Name -> TableSync (raises ValueError for an unknown name)
+        self._enabled = enabled # Settings are read at call time
+        self._interval = interval
+        self._syncs: Dict[str, TableSync] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def get_sync(self, name: str) -> Optional[TableSync]:
+        if not self._enabled():
+            return None
+        with self._lock:
+            if name not in self._syncs:
+                self._syncs[name] = self._build(name)
+            return self._syncs[name]
+
+    def get_index(self, name: str):
+        """
+        The local index if enabled and synced, else None (callers query the DB).
+        """
+        sync = self.get_sync(name)
+        if sync is None or not sync.index.ready:
+            return None
+        return sync.index
+
+    async def refresh(self):
+        for name in self.names:
+            sync = self.get_sync(name)
+            if sync is None:
+                continue
+            try:
+                upserted = await run_db(sync.refresh)
+                if upserted:
+                    logger.info(f"[{name}] {self.kind} refreshed: {upserted} rows, {len(sync.index)} total")
+            except Exception as e:
+                logger.error(f"[{name}] {self.kind} refresh failed: {e}")
+
+    async def _refresh_loop(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self._interval())
+
+    def start(self):
+        if not self._enabled() or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for sync in self._syncs.values():
+            sync.close()
@@ -1,13 +1,14 @@
 import logging
 from datetime import datetime
+from core.database import execute_async
 from services.persistence import BotaniquePersistenceService
 from typing import Optional
 
 logger = logging.getLogger(__name__)
 
 class TraceabilityService:
-    def __init__(self):
-        self.persistence = BotaniquePersistenceService()
+    def __init__(self, supabase=None):
+        self.persistence = BotaniquePersistenceService(supabase)
         self.supabase = self.persistence.supabase
 
     async def log_interaction(self, 
@@ -37,8 +38,8 @@ class TraceabilityService:
                 "created_at": datetime.utcnow().isoformat()
             }
             
-            # Fire and forget - or await if we want to be sure
-            response = self.supabase.table("agent_trace_logs").insert(payload).execute()
+            # Offloaded to the DB pool so the event loop keeps serving other requests
+            response = await execute_async(self.supabase.table("agent_trace_logs").insert(payload))
             logger.info(f"Logged interaction for {agent_name} (Duration: {duration_ms}ms)")
             return response
         except Exception as e:
@@ -48,11 +49,11 @@ class TraceabilityService:
 
     async def get_logs(self, limit: int = 50, offset: int = 0):
         try:
-            response = self.supabase.table("agent_trace_logs")\
+            query = self.supabase.table("agent_trace_logs")\
                 .select("*")\
                 .order("created_at", desc=True)\
-                .range(offset, offset + limit - 1)\
-                .execute()
+                .range(offset, offset + limit - 1)
+            response = await execute_async(query)
             return response.data
         except Exception as e:
             logger.error(f"Failed to fetch logs: {str(e)}")
@@ -0,0 +1,399 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from core.config import settings
+from services.table_sync import SyncedIndexes, TableSync
+
+logger = logging.getLogger(__name__)
+
+Hit = Tuple[str, float, Dict[str, Any]]
+
+
+def parse_vector(vector: Any) -> np.ndarray:
+    """
+    Accepts a list of floats or the pgvector text form returned by PostgREST ("[0.1,0.2,...]").
+    """
+    if isinstance(vector, str):
+        vector = json.loads(vector)
+    return np.asarray(vector, dtype=np.float32)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+# Scan matrix storage: bytes per dimension 4 / 2 / 1 (+ a float32 scale per int8 row)
+PRECISIONS = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+_SCAN_BLOCK = 4096 # Rows upcast to float32 at a time when scanning a quantized matrix
+
+
+def quantize(rows: np.ndarray, precision: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Normalized float32 rows -> (codes, per-row scales).
+    int8 is symmetric scalar quantization per row (value ~ code * scale); other precisions have no scale.
+    """
+    if precision == "int8":
+        scales = np.abs(rows).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        return np.rint(rows / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+    return rows.astype(PRECISIONS[precision]), None
+
+
+class VectorIndex:
+    """
+    In-process cosine similarity index.
+
+    Vectors are L2-normalized and stored in one contiguous scan matrix (one row per id),
+    so a top-k query is a single matrix-vector product. Row metadata is kept alongside.
+    Persisted as `<name>.f32` (raw float32 matrix, memory-mapped on load) + `<name>.json` (ids, metadata).
+
+    precision float16/int8 (VECTOR_INDEX_PRECISION) quantizes the scan matrix (1/2 or 1/4 of the
+    memory); the top k * rerank candidates are then re-scored exactly against the float32 rows,
+    which stay on disk (memory-mapped, only candidate pages are read) once the index is saved.
+    """
+
+    def __init__(self, name: str, dim: int = 768, directory: Optional[str] = None,
+                 precision: Optional[str] = None, rerank: Optional[int] = None):
+        self.name = name
+        self.dim = dim
+        self.directory = directory if directory is not None else settings.VECTOR_INDEX_DIR
+        self.precision = precision or settings.VECTOR_INDEX_PRECISION
+        if self.precision not in PRECISIONS:
+            raise ValueError(f"Unknown vector index precision: {self.precision}")
+        self.rerank = settings.VECTOR_INDEX_RERANK if rerank is None else rerank # 0 = quantized scores only
+        self._lock = threading.RLock()
+        self._matrix = np.zeros((0, dim), dtype=PRECISIONS[self.precision])
+        self._scales = np.zeros(0, dtype=np.float32) # int8 only
+        self._size = 0
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._metadata: List[Dict[str, Any]] = []
+        # Exact float32 rows of a quantized index: saved file (memory-mapped) + rows changed since
+        self._exact_file: Optional[np.ndarray] = None
+        self._exact_file_positions: Dict[str, int] = {}
+        self._exact: Dict[str, np.ndarray] = {}
+
+        self.synced_at: Optional[str] = None # Max updated_at seen during sync
+        self.ready = False # Set once a DB sync completed: until then callers use the RPC path
+        self.dirty = False
+
+    @property
+    def quantized(self) -> bool:
+        return self.precision != "float32"
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, id: str) -> bool:
+        return id in self._positions
+
+    def memory_per_vector(self) -> int:
+        """
+        Resident bytes per vector of the scan matrix (exact rows of a saved quantized index stay on disk).
+        """
+        return self.dim * np.dtype(PRECISIONS[self.precision]).itemsize + (4 if self.precision == "int8" else 0)
+
+    def upsert(self, id: str, vector: Any, metadata: Optional[Dict[str, Any]] = None):
+        self.upsert_many([(id, vector, metadata)])
+
+    def upsert_many(self, items: Iterable[Tuple[str, Any, Optional[Dict[str, Any]]]]):
+        with self._lock:
+            for id, vector, metadata in items:
+                id = str(id)
+                row = parse_vector(vector)
+                if row.shape != (self.dim,):
+                    logger.warning(f"[{self.name}] Skipping {id}: vector shape {row.shape} != ({self.dim},)")
+                    continue
+                pos = self._positions.get(id)
+                if pos is None:
+                    pos = self._size
+                    self._ensure_capacity(pos + 1)
+                    self._size += 1
+                    self._ids.append(id)
+                    self._metadata.append({})
+                    self._positions[id] = pos
+                row = _normalize(row[None, :])
+                codes, scales = quantize(row, self.precision)
+                self._matrix[pos] = codes[0]
+                if scales is not None:
+                    self._scales[pos] = scales[0]
+                if self.quantized:
+                    self._exact[id] = row[0]
+                self._metadata[pos] = metadata or {}
+            self.dirty = True
+
+    def remove(self, id: str):
+        with self._lock:
+            pos = self._positions.pop(str(id), None)
+            if pos is None:
+                return
+            self._exact.pop(str(id), None)
+            # Swap with the last row to keep the matrix contiguous
+            last = self._size - 1
+            if pos != last:
+                self._matrix[pos] = self._matrix[last]
+                self._scales[pos:pos + 1] = self._scales[last:last + 1]
+                self._ids[pos] = self._ids[last]
+                self._metadata[pos] = self._metadata[last]
+                self._positions[self._ids[pos]] = pos
+            self._ids.pop()
+            self._metadata.pop()
+            self._size -= 1
+            self.dirty = True
+
+    def retain(self, ids: Iterable[str]):
+        """
+        Removes every id not in `ids` (rows deleted in the DB).
+        """
+        keep = {str(i) for i in ids}
+        with self._lock:
+            for id in [i for i in self._ids if i not in keep]:
+                self.remove(id)
+
+    def search(self, vector: Any, k: int = 5, threshold: Optional[float] = None) -> List[Hit]:
+        """
+        Top-k (id, cosine similarity, metadata), best first. Only similarities > threshold are kept.
+        """
+        return self.search_batch([vector], k, threshold)[0]
+
+    def search_batch(self, vectors: Sequence[Any], k: int = 5, threshold: Optional[float] = None) -> List[List[Hit]]:
+        queries = _normalize(np.stack([parse_vector(v) for v in vectors]))
+        with self._lock:
+            n = self._size
+            if n == 0 or k <= 0:
+                return [[] for _ in range(len(queries))]
+            scores = self._scan(queries, n) # (queries, rows)
+            k = min(k, n)
+            rerank = self.quantized and self.rerank > 0
+            depth = min(k * self.rerank, n) if rerank else k
+            if depth < n:
+                top = np.argpartition(-scores, depth - 1, axis=1)[:, :depth]
+            else:
+                top = np.broadcast_to(np.arange(n), (len(queries), n))
+
+            results = []
+            for query, row_scores, candidates in zip(queries, scores, top):
+                candidate_scores = self._exact_rows(candidates) @ query if rerank else row_scores[candidates]
+                order = np.argsort(-candidate_scores, kind="stable")[:k]
+                results.append([
+                    (self._ids[candidates[i]], float(candidate_scores[i]), self._metadata[candidates[i]])
+                    for i in order
+                    if threshold is None or candidate_scores[i] > threshold
+                ])
+            return results
+
+    def _scan(self, queries: np.ndarray, n: int) -> np.ndarray:
+        if not self.quantized:
+            return queries @ self._matrix[:n].T
+        # No BLAS kernel for float16/int8: upcast block by block (bounded temporary memory)
+        scores = np.empty((len(queries), n), dtype=np.float32)
+        for start in range(0, n, _SCAN_BLOCK):
+            end = min(start + _SCAN_BLOCK, n)
+            scores[:, start:end] = queries @ self._matrix[start:end].astype(np.float32).T
+        if self.precision == "int8":
+            scores *= self._scales[:n]
+        return scores
+
+    def _exact_rows(self, positions: Iterable[int]) -> np.ndarray:
+        rows = []
+        for pos in positions:
+            id = self._ids[pos]
+            row = self._exact.get(id)
+            if row is None and id in self._exact_file_positions:
+                row = self._exact_file[self._exact_file_positions[id]]
+            if row is None: # Not expected: fall back to the dequantized row
+                row = self._matrix[pos].astype(np.float32) * (self._scales[pos] if self.precision == "int8" else 1.0)
+            rows.append(row)
+        return np.stack(rows).astype(np.float32, copy=False)
+
+    def _ensure_capacity(self, n: int):
+        capacity = self._matrix.shape[0]
+        if n <= capacity:
+            return
+        capacity = max(n, capacity * 2, 64)
+        grown = np.zeros((capacity, self.dim), dtype=self._matrix.dtype)
+        grown[:self._size] = self._matrix[:self._size]
+        self._matrix = grown
+        if self.precision == "int8":
+            scales = np.ones(capacity, dtype=np.float32)
+            scales[:self._size] = self._scales[:self._size]
+            self._scales = scales
+
+    # Persistence
+
+    def _paths(self) -> Tuple[str, str]:
+        base = os.path.join(self.directory, self.name)
+        return f"{base}.f32", f"{base}.json"
+
+    def save(self):
+        if not self.directory:
+            return
+        matrix_path, meta_path = self._paths()
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            # Atomic replace: a reader never sees a half-written index
+            if self.quantized:
+                with open(f"{matrix_path}.tmp", "wb") as f:
+                    for start in range(0, self._size, _SCAN_BLOCK):
+                        self._exact_rows(range(start, min(start + _SCAN_BLOCK, self._size))).tofile(f)
+            else:
+                self._matrix[:self._size].tofile(f"{matrix_path}.tmp")
+            with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+                json.dump({
+                    "dim": self.dim,
+                    "ids": self._ids,
+                    "metadata": self._metadata,
+                    "synced_at": self.synced_at
+                }, f, default=str)
+            os.replace(f"{matrix_path}.tmp", matrix_path)
+            os.replace(f"{meta_path}.tmp", meta_path)
+            if self.quantized:
+                # Exact rows now live in the file: drop the in-memory copies
+                self._map_exact_file(matrix_path, list(self._ids))
+            self.dirty = False
+
+    def _map_exact_file(self, matrix_path: str, ids: List[str]):
+        self._exact_file = np.memmap(matrix_path, dtype=np.float32, mode="r", shape=(len(ids), self.dim)) if ids else None
+        self._exact_file_positions = {id: i for i, id in enumerate(ids)}
+        self._exact = {}
+
+    def load(self) -> bool:
+        """
+        Maps a saved index (copy-on-write: pages are read lazily, updates stay in memory).
+        A quantized index is built from the file in blocks; the float32 rows stay mapped for re-ranking.
+        The index is not `ready` until the next DB sync catches up from `synced_at`.
+        """
+        if not self.directory:
+            return False
+        matrix_path, meta_path = self._paths()
+        if not (os.path.exists(matrix_path) and os.path.exists(meta_path)):
+            return False
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            ids = meta["ids"]
+            if meta["dim"] != self.dim:
+                raise ValueError(f"dimension {meta['dim']} != {self.dim}")
+            matrix = np.memmap(matrix_path, dtype=np.float32, mode="c", shape=(len(ids), self.dim)) if ids \
+                else np.zeros((0, self.dim), dtype=np.float32)
+        except Exception as e:
+            logger.error(f"[{self.name}] Failed to load vector index, rebuilding: {e}")
+            return False
+
+        with self._lock:
+            if self.quantized:
+                self._map_exact_file(matrix_path, ids)
+                codes = np.zeros((len(ids), self.dim), dtype=PRECISIONS[self.precision])
+                scales = np.ones(len(ids), dtype=np.float32)
+                for start in range(0, len(ids), _SCAN_BLOCK):
+                    block_codes, block_scales = quantize(np.asarray(matrix[start:start + _SCAN_BLOCK]), self.precision)
+                    codes[start:start + len(block_codes)] = block_codes
+                    if block_scales is not None:
+                        scales[start:start + len(block_scales)] = block_scales
+                self._matrix, self._scales = codes, scales
+            else:
+                self._matrix = matrix
+            self._size = len(ids)
+            self._ids = ids
+            self._positions = {id: i for i, id in enumerate(ids)}
+            self._metadata = meta["metadata"]
+            self.synced_at = meta.get("synced_at")
+            self.dirty = False
+        logger.info(f"[{self.name}] Loaded {self._size} vectors ({self.precision}) from {matrix_path}")
+        return True
+
+
+class VectorIndexSync(TableSync):
+    """
+    Keeps a VectorIndex in sync with its table (services.table_sync): rows are fetched
+    with their vector, rows without one are left out of the index.
+    """
+
+    def __init__(self, index: VectorIndex, table: str, vector_column: str, columns: str,
+                 supabase=None, page_size: int = 500):
+        super().__init__(index, table, columns, supabase=supabase, page_size=page_size)
+        self.vector_column = vector_column
+
+    @property
+    def select_columns(self) -> str:
+        return f"{self.columns}, {self.vector_column}"
+
+    def _filter(self, query):
+        return query.not_.is_(self.vector_column, "null")
+
+    def _apply(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        items, applied = [], []
+        for row in rows:
+            vector = row.pop(self.vector_column, None)
+            if vector is None:
+                self.index.remove(row["id"])
+                continue
+            items.append((row["id"], vector, {k: v for k, v in row.items() if k != "id"}))
+            applied.append(row)
+        self.index.upsert_many(items)
+        return applied
+
+    def refresh(self) -> int:
+        upserted = super().refresh()
+        if self.index.dirty:
+            self.index.save()
+        return upserted
+
+    def close(self):
+        if self.index.dirty:
+            self.index.save()
+
+
+FICHES_INDEX = "fiches_botanique"
+PLANTS_INDEX = "botanique_plantes"
+
+
+def _build_sync(name: str) -> VectorIndexSync:
+    if name == FICHES_INDEX:
+        sync = VectorIndexSync(VectorIndex(FICHES_INDEX), "fiches_botanique", "embedding_nom",
+                               "id, nom, variete, espece, created_at, updated_at")
+    elif name == PLANTS_INDEX:
+        sync = VectorIndexSync(VectorIndex(PLANTS_INDEX), "botanique_plantes", "embedding",
+                               "id, nom_commun, variete, espece, updated_at")
+    else:
+        raise ValueError(f"Unknown vector index: {name}")
+    sync.index.load()
+    return sync
+
+
+# Synced indexes (only when VECTOR_INDEX_ENABLED)
+_vector_indexes = SyncedIndexes(
+    "Vector index", (FICHES_INDEX, PLANTS_INDEX), _build_sync,
+    enabled=lambda: settings.VECTOR_INDEX_ENABLED,
+    interval=lambda: settings.VECTOR_INDEX_REFRESH_INTERVAL,
+)
+
+
+def get_vector_index(name: str) -> Optional[VectorIndex]:
+    """
+    The local index if enabled and synced, else None (callers fall back to the match_* RPC).
+    """
+    return _vector_indexes.get_index(name)
+
+
+async def refresh_vector_indexes():
+    await _vector_indexes.refresh()
+
+
+def start_vector_index_refresher():
+    """
+    Initial sync + periodic delta refresh in the background (FastAPI startup).
+    Searches use the RPC path until the first sync completes.
+    """
+    _vector_indexes.start()
+
+
+async def stop_vector_index_refresher():
+    await _vector_indexes.stop()
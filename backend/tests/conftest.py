@@ -0,0 +1,52 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from google.genai import types
+
+from core.config import settings
+from core.gemini import GeminiStream
+
+
+@pytest.fixture(autouse=True, scope="session")
+def embedding_cache_path(tmp_path_factory):
+    """
+    The shared embedding cache writes its SQLite layer under a temporary directory,
+    not next to the sources (the file is opened on first use, after this fixture).
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(settings, "EMBEDDING_CACHE_PATH", str(tmp_path_factory.mktemp("embeddings") / "embedding_cache.sqlite3"))
+        yield
+
+
+def model_response(parts):
+    return types.GenerateContentResponse(candidates=[
+        types.Candidate(content=types.Content(role="model", parts=parts))
+    ])
+
+
+def chunk_stream(*chunks):
+    """
+    Fake SDK stream. Each chunk is a GenerateContentResponse, or a Part streamed alone.
+    """
+    async def stream():
+        for chunk in chunks:
+            yield model_response([chunk]) if isinstance(chunk, types.Part) else chunk
+    return stream()
+
+
+def fake_gemini(*turns):
+    """
+    GeminiClient double whose streams are real GeminiStream objects over a fake SDK.
+    Each turn is the list of chunks streamed for one model call.
+    """
+    gemini = MagicMock()
+    gemini.client.aio.models.generate_content_stream = AsyncMock(
+        side_effect=[chunk_stream(*chunks) for chunks in turns]
+    )
+    gemini.generate_content_stream = lambda **kwargs: GeminiStream(
+        gemini, model="gemini-test",
+        contents=kwargs["contents"], config=kwargs.get("config"),
+        agent_name=kwargs.get("agent_name"), trace_id=kwargs.get("trace_id"),
+        conversation_id=kwargs.get("conversation_id")
+    )
+    return gemini
@@ -0,0 +1,37 @@
+import pytest
+from unittest.mock import MagicMock
+from services.agent_config import AgentConfigService, invalidate_prompt_cache, _prompt_cache
+
+@pytest.fixture
+def service():
+    invalidate_prompt_cache()
+    mock_supabase = MagicMock()
+    query = mock_supabase.table.return_value.select.return_value.eq.return_value.eq.return_value
+    query.execute.return_value.data = [{"system_prompt": "Tu es le Chef de Culture."}]
+    yield AgentConfigService(supabase=mock_supabase)
+    invalidate_prompt_cache()
+
+def prompt_query(service):
+    return service.supabase.table.return_value.select.return_value.eq.return_value.eq.return_value
+
+def test_system_prompt_is_cached(service):
+    hits_before = _prompt_cache.hits
+
+    assert service.get_system_prompt("culture_v1") == "Tu es le Chef de Culture."
+    assert service.get_system_prompt("culture_v1") == "Tu es le Chef de Culture."
+
+    prompt_query(service).execute.assert_called_once()
+    assert _prompt_cache.hits == hits_before + 1
+
+def test_invalidation_forces_refetch(service):
+    service.get_system_prompt("culture_v1")
+    invalidate_prompt_cache("culture_v1")
+    service.get_system_prompt("culture_v1")
+
+    assert prompt_query(service).execute.call_count == 2
+
+def test_errors_are_not_cached(service):
+    prompt_query(service).execute.side_effect = [Exception("DB down"), MagicMock(data=[{"system_prompt": "OK"}])]
+
+    assert service.get_system_prompt("culture_v1") == ""
+    assert service.get_system_prompt("culture_v1") == "OK"
@@ -0,0 +1,124 @@
+import json
+import time
+import pytest
+from unittest.mock import patch
+from google.genai import types
+
+from agents.bastouille_chef import BastouilleChef
+from conftest import chunk_stream, fake_gemini, model_response
+from core.conversations import ConversationStore
+
+TOOL_LATENCIES = {"A": 0.3, "B": 0.1, "C": 0.2}
+
+
+def slow_historique(tracking_id=None, limit=10):
+    time.sleep(TOOL_LATENCIES[tracking_id])
+    return [{"sujet": tracking_id}]
+
+
+@pytest.fixture
+def chef():
+    mock_client = fake_gemini(
+        [model_response([
+            types.Part(function_call=types.FunctionCall(name="historique", args={"tracking_id": tid}))
+            for tid in TOOL_LATENCIES
+        ])],
+        [model_response([types.Part(text="Voici ")]), model_response([types.Part(text="l'historique.")])]
+    )
+    with patch("agents.bastouille_chef.get_gemini_client", return_value=mock_client):
+        chef = BastouilleChef()
+    chef.available_tools_logic["historique"] = slow_historique
+    # Lazy one-time pydantic schema builds of the SDK types must not count in the timed turn
+    types.GenerateContentConfig(tools=chef.tool_declarations, system_instruction=chef.system_prompt)
+    types.Part(function_response=types.FunctionResponse(name="historique", response={"result": []}))
+    return chef
+
+
+@pytest.mark.asyncio
+async def test_parallel_tool_calls(chef):
+    start = time.perf_counter()
+    events = [json.loads(line) async for line in chef.chat_stream("Historique de A, B et C")]
+    elapsed = time.perf_counter() - start
+
+    # Turn latency is the slowest tool, not the sum
+    assert elapsed < sum(TOOL_LATENCIES.values()) * 0.8
+
+    # step_end events stream in completion order
+    step_ends = [json.loads(e["result"])[0]["sujet"] for e in events if e["type"] == "step_end"]
+    assert step_ends == ["B", "C", "A"]
+
+    # Function responses are appended to history in call order
+    second_call_contents = chef.client.client.aio.models.generate_content_stream.call_args_list[1].kwargs["contents"]
+    responses = second_call_contents[2].parts
+    assert [p.function_response.response["result"][0]["sujet"] for p in responses] == ["A", "B", "C"]
+
+    # A short answer is held until the turn ends without function calls
+    assert events[-1:] == [{"type": "message_token", "content": "Voici l'historique."}]
+
+
+@pytest.mark.asyncio
+async def test_preamble_before_function_call_is_a_thought(chef):
+    long_answer = "Le semis de B date de mars. " * 10
+    chef.client.client.aio.models.generate_content_stream.side_effect = [
+        chunk_stream(
+            model_response([types.Part(text="Je vérifie ")]),
+            model_response([types.Part(text="l'historique de B.")]),
+            model_response([types.Part(function_call=types.FunctionCall(name="historique", args={"tracking_id": "B"}))]),
+        ),
+        chunk_stream(*[model_response([types.Part(text=long_answer[i:i + 50])]) for i in range(0, len(long_answer), 50)]),
+    ]
+
+    events = [json.loads(line) async for line in chef.chat_stream("Historique de B")]
+
+    assert events[0] == {"type": "thought_token", "content": "Je vérifie l'historique de B."}
+    answer = [e["content"] for e in events if e["type"] == "message_token"]
+    # A long answer streams once it outgrows a preamble
+    assert "".join(answer) == long_answer and len(answer) > 1
+
+
+@pytest.mark.asyncio
+async def test_history_is_kept_server_side(chef):
+    store = ConversationStore(persist=False)
+    gemini_calls = chef.client.client.aio.models.generate_content_stream
+    gemini_calls.side_effect = [
+        chunk_stream(model_response([types.Part(function_call=types.FunctionCall(name="historique", args={"tracking_id": "B"}))])),
+        chunk_stream(model_response([types.Part(text="B a été semé.")])),
+        chunk_stream(model_response([types.Part(text="Oui.")])),
+    ]
+
+    with patch("agents.bastouille_chef.get_conversation_store", return_value=store):
+        [line async for line in chef.chat_stream("Historique de B", conversation_id="conv-1")]
+        # Next message alone: the stored native history (incl. tool call and result) is replayed
+        [line async for line in chef.chat_stream("Et C ?", conversation_id="conv-1")]
+
+    contents = gemini_calls.call_args_list[2].kwargs["contents"]
+    assert [c.role for c in contents] == ["user", "model", "user", "model", "user"]
+    assert contents[1].parts[0].function_call.name == "historique"
+    assert contents[2].parts[0].function_response.response == {"result": [{"sujet": "B"}]}
+    assert contents[3].parts[0].text == "B a été semé."
+    assert contents[4].parts[0].text == "Et C ?"
+    assert len(await store.load("Baštouille.Chef", "conv-1")) == 6
+
+
+@pytest.mark.asyncio
+async def test_exchange_is_stored_on_every_exit(chef):
+    store = ConversationStore(persist=False)
+    gemini_calls = chef.client.client.aio.models.generate_content_stream
+    gemini_calls.side_effect = [
+        chunk_stream(),
+        chunk_stream(model_response([types.Part(function_call=types.FunctionCall(name="historique", args={"tracking_id": "B"}))])),
+    ]
+
+    with patch("agents.bastouille_chef.get_conversation_store", return_value=store):
+        # Empty model response: the question is still part of the conversation
+        [line async for line in chef.chat_stream("Historique de A", conversation_id="conv-1")]
+        assert [c.parts[0].text for c in await store.load("Baštouille.Chef", "conv-1")] == ["Historique de A"]
+
+        # Client gone while the tool runs: the unanswered call is not stored
+        stream = chef.chat_stream("Historique de B", conversation_id="conv-1")
+        assert json.loads(await stream.__anext__())["type"] == "step_start"
+        await stream.aclose()
+
+    stored = await store.load("Baštouille.Chef", "conv-1")
+    assert [c.role for c in stored] == ["user", "user"]
+    assert stored[-1].parts[0].text == "Historique de B"
@@ -0,0 +1,92 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from services.catalog_index import CatalogIndex, CatalogIndexSync, PLANTS_CATALOG
+from services.plant_search import PlantSearchService
+from functions.liste_varietes import liste_varietes
+
+PLANTS = [
+    {"id": "1", "nom_commun": "Tomate", "variete": "Coeur de Bœuf", "espece": "Solanum lycopersicum", "updated_at": "2026-01-19T10:00:00"},
+    {"id": "2", "nom_commun": "Tomate", "variete": "Marmande", "espece": "Solanum lycopersicum", "updated_at": "2026-01-19T10:00:01"},
+    {"id": "3", "nom_commun": "Carotte", "variete": "Nantaise", "espece": "Daucus carota", "updated_at": "2026-01-19T10:00:02"},
+    {"id": "4", "nom_commun": "Épinard", "variete": None, "espece": "Spinacia oleracea", "updated_at": "2026-01-19T10:00:03"},
+    {"id": "5", "nom_commun": "Radis", "variete": "18 jours", "espece": "Raphanus sativus", "updated_at": "2026-01-19T10:00:04"},
+]
+
+
+@pytest.fixture
+def index():
+    index = CatalogIndex(PLANTS_CATALOG, ("nom_commun", "variete"), ("nom_commun", "variete", "espece"))
+    index.upsert_many(PLANTS)
+    return index
+
+
+def top_id(index, query):
+    rows = index.search(query, limit=1, min_similarity=0.3)
+    return rows[0]["id"] if rows else None
+
+
+def test_search_tolerates_accents_plurals_and_typos(index):
+    assert top_id(index, "tomates coeur de boeuf") == "1"
+    assert top_id(index, "tomatte marmande") == "2"
+    assert top_id(index, "carottes nantaises") == "3"
+    assert top_id(index, "epinards") == "4"
+    assert top_id(index, "poivron") is None
+
+
+def test_search_prefers_shortest_name_on_ties(index):
+    index.upsert({"id": "6", "nom_commun": "Radis", "variete": "Noir gros long d'hiver"})
+    assert top_id(index, "radis") == "5"
+
+
+def test_upsert_replaces_and_remove_unlinks(index):
+    index.upsert({"id": "2", "nom_commun": "Tomate", "variete": "Cerise"})
+    assert index.search("marmande", min_similarity=0.5) == []
+    assert top_id(index, "tomate cerise") == "2"
+
+    index.remove("2")
+    assert "2" not in index and len(index) == 4
+    assert "cerise" not in index._tokens
+    assert not any("2" in ids for ids in index._grams.values())
+
+
+def test_contains_is_accent_insensitive(index):
+    assert [row["id"] for row in index.contains("boeuf")] == ["1"]
+    assert [row["id"] for row in index.contains("solanum")] == ["1", "2"]
+
+
+def test_sync_upserts_changes_and_drops_deleted_rows():
+    supabase = MagicMock()
+    pages = supabase.table.return_value.select.return_value.order.return_value.order.return_value.range.return_value
+    pages.execute.return_value = MagicMock(data=[dict(p) for p in PLANTS])
+    sync = CatalogIndexSync(CatalogIndex(PLANTS_CATALOG, ("nom_commun", "variete")), "botanique_plantes",
+                            "id, nom_commun, variete, espece, updated_at", supabase=supabase)
+    supabase.table.return_value.select.return_value.limit.return_value.execute.return_value = MagicMock(count=5)
+
+    assert sync.refresh() == 5
+    assert sync.index.ready and sync.index.synced_at == "2026-01-19T10:00:04"
+
+    # Next refresh: only rows changed since synced_at, one row deleted
+    pages.gte.return_value.execute.return_value = MagicMock(data=[])
+    supabase.table.return_value.select.return_value.limit.return_value.execute.return_value = MagicMock(count=4)
+    supabase.table.return_value.select.return_value.order.return_value.range.return_value.execute.return_value = \
+        MagicMock(data=[{"id": p["id"]} for p in PLANTS if p["id"] != "3"])
+
+    assert sync.refresh() == 0
+    pages.gte.assert_called_with("updated_at", "2026-01-19T10:00:04")
+    assert "3" not in sync.index and len(sync.index) == 4
+
+
+def test_ready_index_serves_plant_search_and_liste_varietes_without_db(index):
+    index.ready = True
+    supabase = MagicMock()
+    with patch("services.plant_search.get_catalog_index", return_value=index), \
+         patch("functions.liste_varietes.get_catalog_index", return_value=index):
+        match = PlantSearchService(supabase, hybrid=False).best_match("Tomate Marmande")
+        varietes = liste_varietes(limit=2)
+
+    assert match["id"] == "2" and match["lexical_similarity"] == 1.0
+    assert [v["nom_commun"] for v in varietes] == ["Carotte", "Épinard"]
+    supabase.rpc.assert_not_called()
+    supabase.table.assert_not_called()
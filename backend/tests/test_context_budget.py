@@ -0,0 +1,101 @@
+from unittest.mock import patch
+
+from google.genai import types
+
+from core.context_budget import (
+    HISTORY_SUMMARY_HEADER,
+    ContextBudget,
+    clip_lines,
+    clip_text,
+    compact_result,
+    estimate_tokens,
+)
+
+SYSTEM_PROMPT = "Tu es Baštouille, le Chef de Culture. " * 20
+
+
+def conversation(n_messages, words=60):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i} " + "tomate " * words}
+        for i in range(n_messages)
+    ]
+
+
+def big_result(n=300):
+    return [{"id": i, "nom": f"Tomate {i}", "notes": "Arrosage du matin, paillage épais. " * 3} for i in range(n)]
+
+
+def test_clip_text_and_lines():
+    assert clip_text("court", 10) == "court"
+    clipped = clip_text("x" * 1000, 10)
+    assert clipped.startswith("x" * 40) and "960 caractères omis" in clipped
+
+    lines = "\n".join(f"Variété {i}" for i in range(500))
+    clipped = clip_lines(lines, 100)
+    assert estimate_tokens(clipped) <= 110
+    assert clipped.splitlines()[0] == "Variété 0" and clipped.endswith("lignes omises)")
+
+
+def test_compact_result_keeps_leading_items():
+    assert compact_result({"ok": True}, 10) == {"ok": True}
+    compacted = compact_result(big_result(), 500)
+    assert compacted["total"] == 300 and compacted["omitted"] == 300 - len(compacted["items"])
+    assert compacted["items"][0]["id"] == 0
+    assert isinstance(compact_result({"text": "x" * 5000}, 50), str)
+
+
+def test_fit_history_summarizes_older_turns():
+    budget = ContextBudget("Test")
+    history = conversation(20)
+    assert budget.fit_history(history, 10_000) == history
+
+    fitted = budget.fit_history(history, 800)
+    # Recent turns verbatim, older ones folded into the first (user) message
+    assert fitted[-1] == history[-1]
+    assert fitted[0]["role"] == "user" and fitted[0]["content"].startswith(HISTORY_SUMMARY_HEADER)
+    assert "USER: message 0 tomate" in fitted[0]["content"]
+    assert sum(estimate_tokens(m["content"]) for m in fitted) <= 800
+    # Not even room for the summary
+    assert budget.fit_history(history, 200) == []
+
+
+def test_compact_contents_merges_summary_into_exchange():
+    budget = ContextBudget("Test", max_tokens=500)
+    exchange = [types.Content(role="user", parts=[types.Part(text="Et mes radis ?")])]
+    contents = budget.compact_contents(conversation(4), exchange, pinned_tokens=100)
+
+    assert [c.role for c in contents] == ["user"]
+    assert contents[0].parts[0].text.startswith(HISTORY_SUMMARY_HEADER)
+    assert contents[0].parts[-1].text == "Et mes radis ?"
+
+
+def test_long_session_stays_within_budget():
+    """
+    Simulated session: growing client history and one large tool result per turn.
+    Prompt size stays under the budget and flattens instead of growing with the session;
+    only earlier tool results are compacted, the latest one is sent in full.
+    """
+    with patch("core.context_budget.settings.AGENT_CONTEXT_MAX_TOKENS", 6000):
+        budget = ContextBudget("Test")
+    history = []
+    sizes = []
+    for request in range(15):
+        exchange = [types.Content(role="user", parts=[types.Part(text=f"Question {request}")])]
+        for turn in range(3):
+            contents = budget.compact_contents(history, exchange, pinned_tokens=estimate_tokens(SYSTEM_PROMPT))
+            if turn:
+                assert contents[-1].parts[0].function_response.response == {"result": big_result(100)}
+            exchange.append(types.Content(role="model", parts=[
+                types.Part(function_call=types.FunctionCall(name="rechercher", args={"query": "tomate"}))
+            ]))
+            exchange.append(types.Content(role="user", parts=[
+                types.Part(function_response=types.FunctionResponse(name="rechercher", response={"result": big_result(100)}))
+            ]))
+        budget.compact_contents(history, exchange, pinned_tokens=estimate_tokens(SYSTEM_PROMPT))
+        sizes.append(budget.turn_tokens[-1])
+        history += [{"role": "user", "content": f"Question {request}"}, {"role": "assistant", "content": "Réponse " * 400}]
+
+    assert max(budget.turn_tokens) <= 6000
+    # Uncompacted, each tool result alone is most of the budget
+    assert estimate_tokens(str(big_result(100))) > 3000
+    assert max(sizes[-5:]) - min(sizes[-5:]) < 600
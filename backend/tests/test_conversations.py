@@ -0,0 +1,160 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from google.genai import types
+
+from core import dependencies
+from core.conversations import ConversationStore, to_contents, to_messages
+from main import app
+
+
+class FakeTable:
+    """In-memory stand-in for the agent_conversations table (upsert / select / delete)."""
+
+    def __init__(self):
+        self.rows = {}
+        self._filters = {}
+        self._op = None
+
+    def table(self, name):
+        assert name == "agent_conversations"
+        self._filters, self._op = {}, None
+        return self
+
+    def upsert(self, row):
+        self._op = ("upsert", row)
+        return self
+
+    def select(self, columns):
+        self._op = ("select", columns)
+        return self
+
+    def delete(self):
+        self._op = ("delete", None)
+        return self
+
+    def eq(self, column, value):
+        self._filters[column] = value
+        return self
+
+    def limit(self, n):
+        return self
+
+    def execute(self):
+        op, arg = self._op
+        if op == "upsert":
+            self.rows[(arg["agent"], arg["conversation_id"])] = arg
+            return FakeResponse([arg])
+        matches = [k for k, row in self.rows.items() if all(row[c] == v for c, v in self._filters.items())]
+        if op == "delete":
+            for key in matches:
+                del self.rows[key]
+            return FakeResponse([])
+        return FakeResponse([{"contents": self.rows[k]["contents"]} for k in matches])
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+def exchange(question, answer):
+    return [
+        types.Content(role="user", parts=[types.Part(text=question)]),
+        types.Content(role="model", parts=[
+            types.Part(text="Je cherche.", thought=True),
+            types.Part(function_call=types.FunctionCall(name="rechercher", args={"query": question}), thought_signature=b"\xffsig"),
+        ]),
+        types.Content(role="user", parts=[
+            types.Part(function_response=types.FunctionResponse(name="rechercher", response={"result": [1, 2]}))
+        ]),
+        types.Content(role="model", parts=[types.Part(text=answer)]),
+    ]
+
+
+def test_history_conversions():
+    contents = to_contents([{"role": "user", "content": "Salut"}, {"role": "assistant", "content": "Bonjour"}])
+    assert [(c.role, c.parts[0].text) for c in contents] == [("user", "Salut"), ("model", "Bonjour")]
+
+    # Thoughts and tool-only turns have no text message
+    assert to_messages(exchange("Tomates ?", "3 tomates.")) == [
+        {"role": "user", "content": "Tomates ?"}, {"role": "assistant", "content": "3 tomates."}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_memory_store():
+    store = ConversationStore(persist=False)
+    assert await store.load("Chef", "c1") is None
+
+    await store.save("Chef", "c1", exchange("A ?", "A."))
+    loaded = await store.load("Chef", "c1")
+    assert loaded == exchange("A ?", "A.")
+    # Copies: callers can append to the loaded history
+    loaded.append(types.Content(role="user", parts=[types.Part(text="x")]))
+    assert len(await store.load("Chef", "c1")) == 4
+    # Keyed by agent too; no conversation ID: nothing stored
+    assert await store.load("Culture", "c1") is None
+    await store.save("Chef", None, exchange("B ?", "B."))
+
+    await store.delete("c1")
+    assert await store.load("Chef", "c1") is None
+
+
+@pytest.mark.asyncio
+async def test_trim_keeps_whole_exchanges():
+    store = ConversationStore(persist=False)
+    contents = exchange("A ?", "A.") + exchange("B ?", "B.") + exchange("C ?", "C.")
+
+    with patch("core.conversations.settings.CONVERSATION_MAX_CONTENTS", 6):
+        await store.save("Chef", "c1", contents)
+
+    # Cutting at 6 would leave an orphan function response: the whole "B" exchange goes too
+    assert await store.load("Chef", "c1") == exchange("C ?", "C.")
+
+
+@pytest.mark.asyncio
+async def test_persistent_store_survives_restart():
+    table = FakeTable()
+    await ConversationStore(supabase=table, persist=True).save("Chef", "c1", exchange("A ?", "A."))
+
+    restarted = ConversationStore(supabase=table, persist=True)
+    loaded = await restarted.load("Chef", "c1")
+    # Function calls, responses and thought signatures round-trip through JSON
+    assert loaded == exchange("A ?", "A.")
+    assert loaded[1].parts[1].thought_signature == b"\xffsig"
+
+    await restarted.delete("c1")
+    assert table.rows == {}
+    assert await ConversationStore(supabase=table, persist=True).load("Chef", "c1") is None
+
+
+def test_router_asks_for_the_history_on_a_store_miss():
+    store = ConversationStore(persist=False)
+    received = []
+
+    async def fake_stream(message, history=None, conversation_id=None):
+        received.append(history)
+        yield "{}\n"
+
+    agent = MagicMock(conversation_key="Baštouille.Chef", chat_stream=fake_stream)
+    app.dependency_overrides[dependencies.get_bastouille_chef] = lambda: agent
+    client = TestClient(app)
+    headers = {"X-Conversation-ID": "c1"}
+    history = [{"role": "user", "content": "Salut"}, {"role": "assistant", "content": "Bonjour"}]
+    try:
+        with patch("core.conversations.get_conversation_store", return_value=store):
+            # Unknown here (restart, expired, other worker): the client resends its history
+            assert client.post("/bastouille/chat", json={"message": "Et C ?"}, headers=headers).status_code == 409
+            assert client.post("/bastouille/chat", json={"message": "Et C ?", "history": history}, headers=headers).status_code == 200
+            # New conversation: empty history, nothing to recover
+            assert client.post("/bastouille/chat", json={"message": "Salut", "history": []}, headers={"X-Conversation-ID": "c2"}).status_code == 200
+
+            asyncio.run(store.save("Baštouille.Chef", "c1", to_contents(history)))
+            assert client.post("/bastouille/chat", json={"message": "Et D ?"}, headers=headers).status_code == 200
+    finally:
+        app.dependency_overrides.clear()
+
+    assert received == [history, [], None]
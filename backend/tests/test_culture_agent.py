@@ -0,0 +1,248 @@
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from google.genai import types
+
+from agents.culture import CultureAgent, TOOL_DECLARATIONS
+from conftest import fake_gemini
+from core.context_budget import estimate_tokens
+from core.conversations import ConversationStore
+from services.llm import GeminiToolSession
+
+CHUNK_DELAY = 0.05
+TOOL_TURN = [
+    "PENSÉE : Je vérifie le jardin.\n```json\n",
+    '{"tool": "search_garden", ',
+    '"args": {"query": "tomate"}}',
+    "\n```\n",
+    # Tail the model keeps generating after the tool block
+    *["Je vais maintenant chercher... "] * 10,
+]
+FINAL_TURN = ["RÉPONSE : ", "Tu as 3 tomates."]
+
+
+class FakeLLM:
+    supports_tools = False
+
+    def __init__(self, *turns):
+        self.turns = list(turns)
+        self.prompts = []
+        self.sent = []
+        self.closed = []
+
+    async def generate_stream(self, prompt, system_prompt=None, usage=None):
+        self.prompts.append(prompt)
+        sent = []
+        self.sent.append(sent)
+        try:
+            for chunk in self.turns.pop(0):
+                await asyncio.sleep(CHUNK_DELAY)
+                sent.append(chunk)
+                yield chunk
+            if usage is not None:
+                usage.update({"prompt_tokens": 10, "completion_tokens": len(sent)})
+        except GeneratorExit:
+            self.closed.append(len(self.sent) - 1)
+            raise
+
+
+@pytest.fixture
+def agent():
+    with patch("agents.culture.get_llm_provider"), \
+         patch("agents.culture.get_supabase_client"), \
+         patch("agents.culture.BotaniquePersistenceService"), \
+         patch("agents.culture.TraceabilityService"), \
+         patch("agents.culture.AgentConfigService"), \
+         patch("agents.culture.CultureTools"), \
+         patch("agents.culture.CultureSearchTool"):
+        agent = CultureAgent()
+    agent.config_service.get_system_prompt.return_value = "Tu es le Chef de Culture."
+    agent.persistence.get_all_varieties_summary.return_value = ""
+    agent.traceability.log_interaction = AsyncMock()
+    return agent
+
+
+async def run(agent, llm, search_garden):
+    agent.llm = llm
+    agent.tools_map["search_garden"] = search_garden
+    return [json.loads(line) async for line in agent.chat_stream("Combien de tomates ?") if line]
+
+
+@pytest.mark.asyncio
+async def test_tool_starts_when_block_closes_and_generation_is_cancelled(agent):
+    llm = FakeLLM(TOOL_TURN, FINAL_TURN)
+    calls = []
+    search_garden = MagicMock(side_effect=lambda **args: calls.append((args, len(llm.sent[0]))) or {"subjects": 3})
+
+    start = time.perf_counter()
+    events = await run(agent, llm, search_garden)
+    elapsed = time.perf_counter() - start
+
+    # Dispatched right after the chunk closing the JSON object; the tail was never generated
+    assert calls == [({"query": "tomate"}, 3)]
+    assert llm.closed == [0]
+    assert elapsed < CHUNK_DELAY * len(TOOL_TURN)
+
+    assert [e["type"] for e in events] == ["thought_token", "step_start", "step_end", "message_token", "message_token"]
+    assert json.loads(events[2]["result"]) == {"subjects": 3}
+    # Next prompt carries the tool output
+    assert 'Résultat de l\'outil : {"subjects": 3}' in llm.prompts[1]
+
+
+@pytest.mark.asyncio
+async def test_tool_runs_during_tail_generation_without_cancel(agent):
+    llm = FakeLLM(TOOL_TURN, FINAL_TURN)
+    calls = []
+    search_garden = MagicMock(side_effect=lambda **args: calls.append(len(llm.sent[0])) or [])
+
+    with patch("agents.culture.settings.CULTURE_EARLY_TOOL_CANCEL", False):
+        events = await run(agent, llm, search_garden)
+
+    # Started before the tail, which is still consumed (and hidden) until the stream ends
+    assert calls == [3]
+    assert llm.closed == [] and len(llm.sent[0]) == len(TOOL_TURN)
+    assert [e["type"] for e in events if e["type"].startswith("step")] == ["step_start", "step_end"]
+    assert "".join(e["content"] for e in events if e["type"] == "message_token") == "RÉPONSE : Tu as 3 tomates."
+
+
+def test_tool_declarations_are_generated_from_signatures():
+    declarations = {d["name"]: d for d in TOOL_DECLARATIONS}
+
+    assert set(declarations) == {"create_subject", "log_event", "list_my_subjects", "list_garden_events", "search_garden"}
+    log_event = declarations["log_event"]
+    assert log_event["description"] == "Logs an event on a subject."
+    assert log_event["parameters"]["required"] == ["subject_tracking_id", "action_type"]
+    properties = log_event["parameters"]["properties"]
+    assert properties["quantity_final"]["type"] == "integer" # Optional[int]
+    assert properties["data"]["type"] == "object"
+    assert properties["subject_tracking_id"]["description"].startswith("The exact tracking ID")
+    assert declarations["search_garden"]["parameters"]["required"] == ["query"]
+
+
+@pytest.mark.asyncio
+async def test_native_function_calling_mode(agent):
+    gemini = fake_gemini(
+        [types.Part(text="Je regarde.", thought=True),
+         types.Part(function_call=types.FunctionCall(name="search_garden", args={"query": "tomate"}))],
+        [types.Part(text="Tu as "), types.Part(text="3 tomates.")]
+    )
+    agent.llm = MagicMock(supports_tools=True)
+    agent.llm.tool_session = lambda *args, **kwargs: GeminiToolSession(*args, **kwargs)
+    search_garden = MagicMock(return_value={"subjects": 3})
+    agent.tools_map["search_garden"] = search_garden
+
+    with patch("services.llm.get_gemini_client", return_value=gemini):
+        events = [json.loads(line) async for line in agent.chat_stream("Combien de tomates ?", [
+            {"role": "user", "content": "Salut"}, {"role": "assistant", "content": "Bonjour !"}
+        ]) if line]
+
+    search_garden.assert_called_once_with(query="tomate")
+    assert [e["type"] for e in events] == ["thought_token", "step_start", "step_end", "message_token"]
+    assert "".join(e["content"] for e in events if e["type"] == "message_token") == "Tu as 3 tomates."
+
+    calls = gemini.client.aio.models.generate_content_stream.call_args_list
+    config = calls[0].kwargs["config"]
+    assert {f.name for f in config.tools[0].function_declarations} == {d["name"] for d in TOOL_DECLARATIONS}
+    # No text protocol in the native prompt
+    assert "USER_QUERY" not in config.system_instruction and "```json" not in config.system_instruction
+    # Second turn replays history, the model turn (function call) and the function response
+    contents = calls[1].kwargs["contents"]
+    assert [c.role for c in contents] == ["user", "model", "user", "model", "user"]
+    assert contents[3].parts[-1].function_call.name == "search_garden"
+    assert contents[4].parts[0].function_response.response == {"result": {"subjects": 3}}
+    assert agent.traceability.log_interaction.call_args.kwargs["agent_version"] == "v1.6-native-tools"
+
+
+@pytest.mark.asyncio
+async def test_text_mode_prompt_is_compacted_to_budget(agent):
+    llm = FakeLLM(TOOL_TURN, FINAL_TURN)
+    agent.llm = llm
+    agent.tools_map["search_garden"] = MagicMock(return_value=[{"id": i, "nom": f"Tomate {i}" * 20} for i in range(500)])
+    history = [{"role": "user" if i % 2 == 0 else "assistant", "content": f"Message {i} " + "paillage " * 200} for i in range(60)]
+
+    with patch("core.context_budget.settings.AGENT_CONTEXT_MAX_TOKENS", 4000):
+        events = [json.loads(line) async for line in agent.chat_stream("Combien de tomates ?", history) if line]
+
+    assert estimate_tokens(llm.prompts[0]) <= 4000
+    assert "[RÉSUMÉ DES ÉCHANGES PRÉCÉDENTS]" in llm.prompts[0] and "Message 59 paillage" in llm.prompts[0]
+    # The model answers from the latest tool result: sent in full, history gives way
+    assert '"omitted":' not in llm.prompts[1] and '"Tomate 499' in llm.prompts[1]
+    # The UI still receives the full tool result
+    assert len(json.loads(next(e for e in events if e["type"] == "step_end")["result"])) == 500
+
+
+@pytest.mark.asyncio
+async def test_native_mode_catches_a_stray_json_tool_block(agent):
+    gemini = fake_gemini(
+        [types.Part(text="Je vérifie.\n```json\n"), types.Part(text='{"tool": "search_garden", "args": {"query": "tomate"}}\n```')],
+        [types.Part(text="Tu as 3 tomates.")]
+    )
+    agent.llm = MagicMock(supports_tools=True)
+    agent.llm.tool_session = lambda *args, **kwargs: GeminiToolSession(*args, **kwargs)
+    search_garden = MagicMock(return_value={"subjects": 3})
+    agent.tools_map["search_garden"] = search_garden
+
+    with patch("services.llm.get_gemini_client", return_value=gemini):
+        events = [json.loads(line) async for line in agent.chat_stream("Combien de tomates ?") if line]
+
+    # The JSON never reaches the chat, and the tool still runs
+    search_garden.assert_called_once_with(query="tomate")
+    assert not any("```" in e.get("content", "") or '"tool"' in e.get("content", "") for e in events)
+    assert [e["type"] for e in events] == ["message_token", "step_start", "step_end", "message_token"]
+    # Its result goes back as text (no function call to answer)
+    contents = gemini.client.aio.models.generate_content_stream.call_args_list[1].kwargs["contents"]
+    assert contents[-1].parts[0].text == 'Résultat de l\'outil search_garden : {"subjects": 3}'
+    # The native-mode prompt is requested
+    agent.config_service.get_system_prompt.assert_called_with("culture_native_v1")
+
+
+@pytest.mark.asyncio
+async def test_exchange_is_stored_after_max_turns(agent):
+    store = ConversationStore(persist=False)
+    tool_call = types.Part(function_call=types.FunctionCall(name="search_garden", args={"query": "tomate"}))
+    gemini = fake_gemini(*[[tool_call]] * 5)
+    agent.llm = MagicMock(supports_tools=True)
+    agent.llm.tool_session = lambda *args, **kwargs: GeminiToolSession(*args, **kwargs)
+    agent.tools_map["search_garden"] = MagicMock(return_value={"subjects": 3})
+
+    with patch("services.llm.get_gemini_client", return_value=gemini), \
+         patch("agents.culture.get_conversation_store", return_value=store):
+        [line async for line in agent.chat_stream("Combien de tomates ?", conversation_id="conv-1")]
+
+        # Native: every call and its response, replayable as is
+        stored = await store.load("Culture", "conv-1")
+        assert [c.role for c in stored] == ["user"] + ["model", "user"] * 5
+        assert stored[-1].parts[0].function_response.response == {"result": {"subjects": 3}}
+
+        # Text protocol: the question is kept even without a final answer
+        agent.llm = FakeLLM(*[TOOL_TURN] * 5)
+        [line async for line in agent.chat_stream("Et mes radis ?", conversation_id="conv-2")]
+        assert [(c.role, c.parts[0].text) for c in await store.load("Culture", "conv-2")] == [("user", "Et mes radis ?")]
+
+
+@pytest.mark.asyncio
+async def test_next_prompt_is_prepared_while_the_tool_runs(agent):
+    llm = FakeLLM(TOOL_TURN, FINAL_TURN)
+    tool_done = []
+    prepared_during_tool = []
+
+    def search_garden(query):
+        time.sleep(0.2)
+        tool_done.append(True)
+        return {"subjects": 3}
+
+    prepare = agent._prepare_text_prompt
+    def spy(*args):
+        prepared_during_tool.append(not tool_done)
+        return prepare(*args)
+
+    with patch.object(agent, "_prepare_text_prompt", side_effect=spy):
+        await run(agent, llm, search_garden)
+
+    # First prompt, then the next one, prepared before the tool finished (and not redone after)
+    assert prepared_during_tool == [True, True]
+    assert 'Résultat de l\'outil : {"subjects": 3}' in llm.prompts[1]
+    assert llm.prompts[1].index("ASSISTANT (Interne): PENSÉE") < llm.prompts[1].index("Résultat de l'outil")
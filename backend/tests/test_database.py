@@ -0,0 +1,49 @@
+import asyncio
+import time
+import httpx
+import pytest
+from unittest.mock import MagicMock
+from fastapi import FastAPI
+
+from routers import operations
+
+DB_LATENCY = 0.2
+CONCURRENT_REQUESTS = 8
+
+
+def slow_execute():
+    # Simulates a slow PostgREST round-trip (blocking, like supabase-py)
+    time.sleep(DB_LATENCY)
+    result = MagicMock()
+    result.data = []
+    return result
+
+
+@pytest.fixture
+def app(monkeypatch):
+    mock_supabase = MagicMock()
+    mock_supabase.table.return_value.select.return_value.order.return_value.execute.side_effect = slow_execute
+    monkeypatch.setattr(operations.service, "supabase", mock_supabase)
+
+    app = FastAPI()
+    app.include_router(operations.router)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_do_not_serialize(app):
+    """
+    Load test: N concurrent requests hitting a slow DB must complete in about
+    one DB latency, not N (which is what blocking the event loop produces).
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[
+            client.get("/operations/saisons") for _ in range(CONCURRENT_REQUESTS)
+        ])
+        elapsed = time.perf_counter() - start
+
+    assert all(r.status_code == 200 for r in responses)
+    serialized_time = CONCURRENT_REQUESTS * DB_LATENCY
+    assert elapsed < serialized_time / 2, f"{elapsed:.2f}s (serialized would be {serialized_time:.2f}s)"
@@ -0,0 +1,51 @@
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from core import dependencies
+from main import app
+
+
+def setup_function():
+    dependencies.reset_agents()
+
+
+def teardown_function():
+    dependencies.reset_agents()
+    app.dependency_overrides.clear()
+
+
+def test_agent_built_once():
+    with patch("core.dependencies.BastouilleChef") as chef_cls:
+        first = dependencies.get_bastouille_chef()
+        second = dependencies.get_bastouille_chef()
+
+    assert first is second
+    chef_cls.assert_called_once()
+
+
+def test_init_agents_survives_failing_agent():
+    with patch("core.dependencies.BotaniqueAgent", side_effect=ValueError("GEMINI_API_KEY missing")), \
+         patch("core.dependencies.CultureAgent"), \
+         patch("core.dependencies.BastouilleChef"), \
+         patch("core.dependencies.AgronomeAgent"):
+        dependencies.init_agents()
+
+    assert "botanique" not in dependencies._agents
+    assert {"culture", "bastouille_chef", "agronome"} <= set(dependencies._agents)
+
+
+def test_router_uses_injected_agent():
+    async def fake_stream(message, history=None, conversation_id=None):
+        yield f'data: {{"echo": "{message}", "conversation": "{conversation_id}"}}\n\n'
+
+    agent = MagicMock()
+    agent.chat_stream = fake_stream
+    app.dependency_overrides[dependencies.get_bastouille_chef] = lambda: agent
+
+    client = TestClient(app)
+    for message in ("un", "deux"):
+        response = client.post("/bastouille/chat", json={"message": message, "history": []}, headers={"X-Conversation-ID": "c1"})
+        assert response.status_code == 200
+        assert f'"echo": "{message}"' in response.text
+        assert '"conversation": "c1"' in response.text
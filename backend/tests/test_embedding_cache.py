@@ -0,0 +1,86 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from core.database import run_db
+from core.embedding_cache import EmbeddingCache, embedding_key
+from core.gemini import get_gemini_client
+
+VECTOR = [0.25, -0.5, 0.125]
+
+
+def test_key_normalizes_whitespace_but_not_model_or_task():
+    assert embedding_key("m", "t", "Tomate  Cerise ") == embedding_key("m", "t", "Tomate Cerise")
+    assert embedding_key("m", "t", "Tomate") != embedding_key("m2", "t", "Tomate")
+    assert embedding_key("m", "t", "Tomate") != embedding_key("m", "t2", "Tomate")
+
+
+def test_memory_and_disk_layers(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    cache = EmbeddingCache(name="test_embeddings", maxsize=10, path=path)
+    assert cache.get("m", "t", "Tomate") is None
+    cache.set("m", "t", "Tomate", VECTOR)
+    assert cache.get("m", "t", "Tomate") == VECTOR
+
+    # A fresh process only has the SQLite layer
+    restarted = EmbeddingCache(name="test_embeddings", maxsize=10, path=path)
+    assert restarted.get("m", "t", "Tomate") == VECTOR
+    assert restarted.get("m", "t", "Tomate") == VECTOR
+
+    stats = restarted.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 0)
+    assert stats["persisted"] == 1
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_memory_only_when_no_path():
+    cache = EmbeddingCache(name="test_embeddings", maxsize=1, path="")
+    cache.set("m", "t", "a", VECTOR)
+    cache.set("m", "t", "b", VECTOR)
+    # LRU evicted "a" and there is no persistent layer
+    assert cache.get("m", "t", "a") is None
+    assert cache.get("m", "t", "b") == VECTOR
+
+
+@pytest.mark.asyncio
+async def test_repeated_query_skips_embedding_call(tmp_path):
+    gemini = get_gemini_client()
+    api = MagicMock()
+    api.aio.models.embed_content = AsyncMock(return_value=MagicMock(embeddings=[MagicMock(values=VECTOR)]))
+    cache = EmbeddingCache(name="test_embeddings", path=str(tmp_path / "e.sqlite3"))
+
+    with patch.object(gemini, "client", api), patch.object(gemini, "embedding_cache", cache):
+        for _ in range(3):
+            assert await gemini.embed_content("Tomate cerise") == VECTOR
+        await gemini.embed_content("Tomate cerise", task_type="RETRIEVAL_QUERY")
+
+    assert api.aio.models.embed_content.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_embeds_only_cache_misses(tmp_path):
+    gemini = get_gemini_client()
+    api = MagicMock()
+    api.aio.models.embed_content = AsyncMock(return_value=MagicMock(
+        embeddings=[MagicMock(values=[1.0]), MagicMock(values=[2.0])]
+    ))
+    cache = EmbeddingCache(name="test_embeddings", path=str(tmp_path / "e.sqlite3"))
+    cache.set("text-embedding-004", "SEMANTIC_SIMILARITY", "Carotte", [0.5])
+
+    with patch.object(gemini, "client", api), patch.object(gemini, "embedding_cache", cache):
+        vectors = await gemini.embed_contents(["Tomate", "Carotte", "Radis"])
+
+    assert vectors == [[1.0], [0.5], [2.0]]
+    assert api.aio.models.embed_content.await_args.kwargs["contents"] == ["Tomate", "Radis"]
+
+
+@pytest.mark.asyncio
+async def test_async_access_keeps_sqlite_off_the_event_loop(tmp_path):
+    cache = EmbeddingCache(name="test_embeddings", maxsize=10, path=str(tmp_path / "e.sqlite3"))
+    assert not (tmp_path / "e.sqlite3").exists() # Opened on first use
+
+    with patch("core.embedding_cache.run_db", wraps=run_db) as offloaded:
+        await cache.aset("m", "t", "Tomate", VECTOR)
+        assert await cache.aget("m", "t", "Tomate") == VECTOR # Memory hit: served inline
+        assert await cache.aget_many("m", "t", ["Radis"]) == [None] # Miss: SQLite read
+    assert offloaded.await_count == 2
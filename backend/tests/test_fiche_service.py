@@ -0,0 +1,67 @@
+import json
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+
+EMBEDDING = [0.0123456789] * 768
+# A realistic fiche payload (identite, culture, calendrier...) weighs a few KB
+DATA = {"identite": {"nom": "Tomate", "variete": "Coeur de Boeuf"}, "notes": "x" * 4000}
+
+client = TestClient(app)
+
+
+def row(i, full=True):
+    item = {
+        "id": str(uuid.UUID(int=i)),
+        "nom": f"Tomate {i}",
+        "variete": "Coeur de Boeuf",
+        "espece": "Solanum lycopersicum",
+        "created_at": "2026-01-19T10:00:00+00:00",
+        "updated_at": "2026-01-19T10:00:00+00:00",
+        "similarity": 0.9
+    }
+    if full:
+        item.update({"data": DATA, "embedding_nom": json.dumps(EMBEDDING)})
+    return item
+
+
+@pytest.fixture
+def supabase():
+    from routers import botanique_fiches
+    mock = MagicMock()
+    with patch.object(botanique_fiches.service, "supabase", mock), \
+         patch.object(botanique_fiches.service.gemini, "embed_content", AsyncMock(return_value=EMBEDDING)), \
+         patch("services.fiche_service.get_vector_index", return_value=None):
+        yield mock
+
+
+def test_vector_summary_uses_summary_rpc_and_stays_small(supabase):
+    supabase.rpc.return_value.execute.return_value = MagicMock(data=[row(i, full=False) for i in range(1000)])
+
+    response = client.get("/botanique/fiches/vector/summary", params={"q": "tomate"})
+
+    assert response.status_code == 200
+    assert supabase.rpc.call_args.args[0] == "match_fiches_summary"
+    items = response.json()
+    assert len(items) == 1000
+    assert set(items[0]) == {"id", "nom", "variete", "espece", "created_at", "updated_at", "similarity"}
+    # Size regression guard: ~200 bytes per summary row (a full row with data was > 4 KB)
+    assert len(response.content) / len(items) < 300
+
+
+def test_full_fiche_responses_never_ship_embeddings(supabase):
+    supabase.rpc.return_value.execute.return_value = MagicMock(data=[row(i) for i in range(5)])
+    supabase.table.return_value.select.return_value.eq.return_value.execute.return_value = MagicMock(data=[row(1)])
+
+    vector = client.get("/botanique/fiches/vector", params={"q": "tomate"})
+    single = client.get(f"/botanique/fiches/{uuid.UUID(int=1)}")
+
+    for response in (vector, single):
+        assert response.status_code == 200
+        assert "embedding_nom" not in response.text
+    assert len(vector.content) / 5 < len(json.dumps(DATA)) + 500
+    assert "embedding_nom" not in supabase.table.return_value.select.call_args.args[0]
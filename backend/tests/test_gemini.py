@@ -0,0 +1,87 @@
+import asyncio
+import time
+from contextlib import aclosing
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from google.genai import types
+
+from core.gemini import GeminiStream
+
+CHUNK_DELAY = 0.1
+
+
+def chunk(*parts, usage=None, finish_reason=None):
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=list(parts)), finish_reason=finish_reason)],
+        usage_metadata=usage
+    )
+
+
+def make_stream(chunks, delay=0.0):
+    async def stream():
+        for c in chunks:
+            await asyncio.sleep(delay)
+            yield c
+
+    gemini = MagicMock()
+    gemini.client.aio.models.generate_content_stream = AsyncMock(return_value=stream())
+    return GeminiStream(gemini, model="gemini-test", contents="Bonjour", config=None,
+                        agent_name="Test", trace_id="t1", conversation_id="c1"), gemini
+
+
+CHUNKS = [
+    chunk(types.Part(text="Je cherche ")),
+    chunk(types.Part(text="la tomate.")),
+    chunk(types.Part(function_call=types.FunctionCall(name="rechercher", args={"query": "tomate"}),
+                     thought_signature=b"sig")),
+    chunk(types.Part(text=""), usage=types.GenerateContentResponseUsageMetadata(
+        prompt_token_count=120, candidates_token_count=15), finish_reason="STOP"),
+]
+
+
+@pytest.mark.asyncio
+async def test_stream_assembles_parts_and_logs_usage():
+    stream, gemini = make_stream(CHUNKS)
+    received = [part async for part in stream]
+
+    # Deltas are forwarded as-is, empty parts are not
+    assert [p.text or p.function_call.name for p in received] == ["Je cherche ", "la tomate.", "rechercher"]
+
+    # Assembled turn: merged text, function call with its thought signature, trailing empty text
+    assert stream.parts[0].text == "Je cherche la tomate."
+    assert stream.parts[1].thought_signature == b"sig"
+    assert [fc.name for fc in stream.function_calls] == ["rechercher"]
+    assert stream.text == "Je cherche la tomate."
+
+    gemini._log_to_db.assert_called_once()
+    log = gemini._log_to_db.call_args.kwargs
+    assert (log["in_tok"], log["out_tok"], log["err"]) == (120, 15, None)
+    assert log["method"] == "generate_content_stream"
+    assert log["out"]["function_calls"] == ["rechercher"]
+
+
+@pytest.mark.asyncio
+async def test_first_token_before_end_of_generation():
+    stream, _ = make_stream(CHUNKS, delay=CHUNK_DELAY)
+    start = time.perf_counter()
+    first_token_at = None
+    async for part in stream:
+        if first_token_at is None:
+            first_token_at = time.perf_counter() - start
+    total = time.perf_counter() - start
+
+    assert first_token_at < CHUNK_DELAY * 2
+    assert total >= CHUNK_DELAY * len(CHUNKS)
+
+
+@pytest.mark.asyncio
+async def test_closed_stream_is_logged():
+    stream, gemini = make_stream(CHUNKS)
+    async with aclosing(stream):
+        async for part in stream:
+            break
+
+    log = gemini._log_to_db.call_args.kwargs
+    assert log["err"] == "Stream closed before completion"
+    assert log["out"]["text"] == "Je cherche "
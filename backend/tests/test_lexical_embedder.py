@@ -0,0 +1,145 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from core.config import settings
+from main import app
+from services import lexical_embedder
+from services.catalog_index import CatalogIndex, PLANTS_CATALOG
+from services.lexical_embedder import LexicalEmbedder, LexicalIndex, get_lexical_index
+from services.llm import OllamaProvider
+
+PLANTS = [
+    {"id": "1", "nom_commun": "Tomate", "variete": "Coeur de Bœuf", "espece": "Solanum lycopersicum"},
+    {"id": "2", "nom_commun": "Tomate", "variete": "Marmande", "espece": "Solanum lycopersicum"},
+    {"id": "3", "nom_commun": "Carotte", "variete": "Nantaise", "espece": "Daucus carota"},
+    {"id": "4", "nom_commun": "Pomme de terre", "variete": "Charlotte", "espece": "Solanum tuberosum"},
+]
+
+
+@pytest.fixture
+def catalog():
+    index = CatalogIndex(PLANTS_CATALOG, ("nom_commun", "variete"))
+    index.upsert_many([dict(p) for p in PLANTS])
+    index.ready = True
+    with patch.object(lexical_embedder, "get_catalog_index", return_value=index):
+        lexical_embedder._indexes.clear()
+        yield index
+    lexical_embedder._indexes.clear()
+
+
+def documents():
+    return [(p["id"], f"{p['nom_commun']} {p['variete']} {p['espece']}", {"nom_commun": p["nom_commun"]}) for p in PLANTS]
+
+
+@pytest.mark.asyncio
+async def test_embed_text_is_a_normalized_dense_vector():
+    embedder = LexicalEmbedder(dim=1024)
+    vector = np.array(await embedder.embed_text("Tomate Cœur de Bœuf"))
+
+    assert vector.shape == (1024,)
+    assert np.linalg.norm(vector) == pytest.approx(1.0, abs=1e-5)
+    # Accent folding: same features with or without accents/ligatures
+    assert np.allclose(vector, await embedder.embed_text("tomate coeur de boeuf"))
+
+
+def test_search_ranks_typos_and_partial_names():
+    index = LexicalIndex(LexicalEmbedder(dim=4096))
+    index.build(documents())
+
+    assert index.search("tomates coeur de boeuf", k=1)[0][0] == "1"
+    assert index.search("marmandes", k=1)[0][0] == "2"
+    assert index.search("carote nantaise", k=1)[0][0] == "3"
+    hits = index.search("solanum", k=10)
+    assert {h[0] for h in hits} == {"1", "2", "4"}
+    assert all(0 < h[1] <= 1.0 + 1e-6 for h in hits)
+    assert index.search("zzzz") == []
+
+
+def test_lexical_index_follows_catalog_changes(catalog):
+    first = get_lexical_index(PLANTS_CATALOG)
+    assert get_lexical_index(PLANTS_CATALOG) is first
+
+    catalog.upsert({"id": "5", "nom_commun": "Radis", "variete": "18 jours", "espece": None})
+    rebuilt = get_lexical_index(PLANTS_CATALOG)
+    assert rebuilt is not first and len(rebuilt) == 5
+    assert rebuilt.search("radis", k=1)[0][0] == "5"
+
+
+@pytest.mark.asyncio
+async def test_ollama_embeds_locally():
+    provider = OllamaProvider()
+    vector = np.array(await provider.embed_text("Tomate Marmande"))
+
+    assert provider.local_embeddings and vector.shape == (settings.LEXICAL_EMBEDDING_DIM,)
+    assert np.isclose(np.linalg.norm(vector), 1.0)
+
+
+def test_vector_search_route_uses_lexical_vectors_with_a_local_provider(catalog):
+    with patch("routers.plantes.get_llm_provider", return_value=OllamaProvider()), \
+         patch("routers.plantes.service.find_similar_plants_vector") as find_similar:
+        response = TestClient(app).post("/botanique/search/vector", json={"query": "tomate marmande", "limit": 2})
+
+    find_similar.assert_not_called() # Lexical vectors never query the DB's vector space
+
+    assert response.status_code == 200
+    results = response.json()
+    assert results[0]["id"] == "2" and results[0]["nom_commun"] == "Tomate"
+    assert 0 < results[0]["similarity"] <= 1.0 + 1e-6
+
+
+class PagedTable:
+    """supabase-py stand-in serving a table in PostgREST pages (select / order / range)."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.pages = 0
+
+    def table(self, name):
+        return self
+
+    def select(self, columns):
+        return self
+
+    def order(self, column):
+        return self
+
+    def range(self, start, end):
+        self._page = self.rows[start:end + 1]
+        return self
+
+    def execute(self):
+        self.pages += 1
+        return MagicMock(data=self._page)
+
+
+def test_index_built_from_the_table_is_paginated_and_refreshed():
+    rows = [{"id": str(i), "nom_commun": f"Plante {i}", "variete": None, "espece": None} for i in range(2500)]
+    table = PagedTable(rows)
+    lexical_embedder._indexes.clear()
+
+    with patch.object(lexical_embedder, "get_catalog_index", return_value=None):
+        first = get_lexical_index(PLANTS_CATALOG, table)
+        assert len(first) == 2500 and table.pages == 3 # Not cut at 1000 rows
+        assert get_lexical_index(PLANTS_CATALOG, table) is first
+
+        rows.append({"id": "radis", "nom_commun": "Radis", "variete": None, "espece": None})
+        with patch("services.lexical_embedder.settings.LEXICAL_INDEX_TTL", 0.0):
+            rebuilt = get_lexical_index(PLANTS_CATALOG, table)
+    lexical_embedder._indexes.clear()
+
+    assert rebuilt is not first and rebuilt.search("radis", k=1)[0][0] == "radis"
+
+
+def test_vector_search_route_fallback_applies_the_lexical_threshold(catalog):
+    provider = MagicMock(local_embeddings=False)
+    provider.embed_text = AsyncMock(side_effect=RuntimeError("Gemini Embed failed"))
+
+    with patch("routers.plantes.get_llm_provider", return_value=provider):
+        response = TestClient(app).post("/botanique/search/vector", json={"query": "tomate", "limit": 10})
+
+    # Rows sharing only a few n-grams (below LEXICAL_MATCH_THRESHOLD) are not returned
+    assert response.status_code == 200
+    assert [r["id"] for r in response.json()] == ["2", "1"]
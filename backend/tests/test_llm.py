@@ -0,0 +1,110 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from services.llm import OllamaProvider, close_ollama_http_client
+
+TOKENS = ["Bon", "jour", " le", " jardin", "."]
+CHUNK_DELAY = 0.05
+
+
+class StubOllama(BaseHTTPRequestHandler):
+    """
+    Minimal /api/generate: NDJSON stream (or a single JSON object when stream=false).
+    Records client ports (connection reuse) and aborted streams (cancellation).
+    """
+    protocol_version = "HTTP/1.1"
+    ports = []
+    aborted = threading.Event()
+    tokens = TOKENS
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        StubOllama.ports.append(self.client_address[1])
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        final = {"done": True, "prompt_eval_count": 12, "eval_count": len(self.tokens)}
+
+        if not body.get("stream"):
+            payload = json.dumps({"response": "".join(self.tokens), **final}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        lines = [{"response": t, "done": False} for t in self.tokens] + [{"response": "", **final}]
+        try:
+            for line in lines:
+                data = (json.dumps(line) + "\n").encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+                time.sleep(CHUNK_DELAY)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            StubOllama.aborted.set()
+            self.close_connection = True
+
+
+@pytest.fixture
+def ollama():
+    StubOllama.ports = []
+    StubOllama.aborted.clear()
+    StubOllama.tokens = TOKENS
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllama)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    with patch("services.llm.settings.OLLAMA_BASE_URL", f"http://127.0.0.1:{server.server_port}"):
+        yield OllamaProvider()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_generate_stream_tokens_and_usage(ollama):
+    usage = {}
+    chunks = [chunk async for chunk in ollama.generate_stream("Salut", usage=usage)]
+    await close_ollama_http_client()
+
+    assert chunks == TOKENS
+    assert usage == {"prompt_tokens": 12, "completion_tokens": 5, "total_tokens": 17}
+
+
+@pytest.mark.asyncio
+async def test_generate_reuses_shared_connection(ollama):
+    for _ in range(3):
+        text, usage = await ollama.generate("Salut")
+    await close_ollama_http_client()
+
+    assert text == "Bonjour le jardin."
+    assert usage["total_tokens"] == 17
+    # One keep-alive connection for all calls
+    assert len(set(StubOllama.ports)) == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_stream_closes_connection(ollama):
+    StubOllama.tokens = [f"t{i} " for i in range(200)]
+    usage = {}
+    stream = ollama.generate_stream("Salut", usage=usage)
+    async for chunk in stream:
+        break
+    await stream.aclose()
+
+    # The server notices the dropped connection long before the 200 chunks are sent
+    aborted = await asyncio.to_thread(StubOllama.aborted.wait, 2.0)
+    await close_ollama_http_client()
+
+    assert aborted
+    assert usage == {}
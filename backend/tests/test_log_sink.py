@@ -0,0 +1,58 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+from core.log_sink import LLMLogSink
+
+
+def make_row(i: int):
+    return {"agent_name": "Test", "trace_id": f"turn-{i}", "duration_ms": i}
+
+
+@pytest.mark.asyncio
+async def test_rows_are_batched_and_flushed_on_stop():
+    mock_supabase = MagicMock()
+    sink = LLMLogSink(supabase=mock_supabase, max_queue=100, batch_size=10, flush_interval=60, spill_path="")
+    sink.start()
+
+    for i in range(25):
+        sink.enqueue(make_row(i))
+    await sink.stop()
+
+    insert = mock_supabase.table.return_value.insert
+    batch_sizes = [len(call.args[0]) for call in insert.call_args_list]
+    assert sum(batch_sizes) == 25
+    assert max(batch_sizes) <= 10
+    assert sink.written == 25
+    mock_supabase.table.assert_called_with("llm_logs")
+
+
+@pytest.mark.asyncio
+async def test_queue_full_spills_to_jsonl(tmp_path):
+    spill_file = tmp_path / "spill.jsonl"
+    sink = LLMLogSink(supabase=MagicMock(), max_queue=2, batch_size=10, flush_interval=60, spill_path=str(spill_file))
+    sink.start()
+
+    # The writer task has not run yet: the queue saturates after 2 rows
+    for i in range(5):
+        sink.enqueue(make_row(i))
+
+    lines = spill_file.read_text().splitlines()
+    assert len(lines) == 3
+    assert json.loads(lines[0])["trace_id"] == "turn-2"
+    assert sink.spilled == 3
+    await sink.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_insert_is_spilled(tmp_path):
+    mock_supabase = MagicMock()
+    mock_supabase.table.return_value.insert.return_value.execute.side_effect = Exception("DB down")
+    spill_file = tmp_path / "spill.jsonl"
+    sink = LLMLogSink(supabase=mock_supabase, max_queue=10, batch_size=10, flush_interval=60, spill_path=str(spill_file))
+    sink.start()
+
+    sink.enqueue(make_row(1))
+    await sink.stop()
+
+    assert sink.written == 0
+    assert len(spill_file.read_text().splitlines()) == 1
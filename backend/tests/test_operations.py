@@ -0,0 +1,46 @@
+import pytest
+from unittest.mock import MagicMock
+from services.operations import OperationsService, _tracking_id_cache
+
+MOCK_SUJET = {
+    "id": "uuid-1",
+    "tracking_id": "2026-SUJ-ABCD",
+    "nom": "Tomates",
+    "quantite": 10,
+    "unite": "PLANT",
+    "stade": "SEMIS",
+    "botanique_plantes": {"nom_commun": "Tomate", "variete": "Marmande"}
+}
+
+@pytest.fixture
+def service():
+    _tracking_id_cache.invalidate()
+    service = OperationsService(supabase=MagicMock())
+    return service
+
+def test_get_subjects_by_tracking_ids_single_query(service):
+    mock_supabase = service.supabase
+    mock_supabase.table.return_value.select.return_value.in_.return_value.execute.return_value.data = [MOCK_SUJET]
+
+    subjects = service.get_subjects_by_tracking_ids(["2026-SUJ-ABCD", "2026-SUJ-NONE", "2026-SUJ-ABCD"])
+
+    assert list(subjects.keys()) == ["2026-SUJ-ABCD"]
+    assert subjects["2026-SUJ-ABCD"].nom == "Tomate Marmande"
+    mock_supabase.table.return_value.select.return_value.in_.assert_called_once_with(
+        "tracking_id", ["2026-SUJ-ABCD", "2026-SUJ-NONE"]
+    )
+
+def test_resolve_subject_id_is_cached(service):
+    mock_supabase = service.supabase
+    query = mock_supabase.table.return_value.select.return_value.eq.return_value.limit.return_value
+    query.execute.return_value.data = [{"id": "uuid-1"}]
+
+    assert service.resolve_subject_id("2026-SUJ-ABCD") == "uuid-1"
+    assert service.resolve_subject_id("2026-SUJ-ABCD") == "uuid-1"
+    query.execute.assert_called_once()
+
+def test_resolve_subject_id_unknown(service):
+    mock_supabase = service.supabase
+    mock_supabase.table.return_value.select.return_value.eq.return_value.limit.return_value.execute.return_value.data = []
+
+    assert service.resolve_subject_id("2026-SUJ-NONE") is None
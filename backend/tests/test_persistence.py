@@ -60,3 +60,58 @@ def test_delete_plant_success(mock_supabase):
     
     result = service.delete_plant("123")
     assert result is True
+
+def test_shared_client_is_created_once(monkeypatch):
+    from services.persistence import get_supabase_client, close_supabase_client
+    monkeypatch.setenv("SUPABASE_URL", "http://localhost:54321")
+    monkeypatch.setenv("SUPABASE_KEY", "test-key")
+    close_supabase_client()
+
+    with patch("services.persistence.create_client") as mock_create:
+        first = get_supabase_client()
+        second = get_supabase_client()
+        service = BotaniquePersistenceService()
+
+        assert first is second
+        assert service.supabase is first
+        mock_create.assert_called_once()
+
+    close_supabase_client()
+
+MOCK_VARIETIES = [
+    {"nom_commun": "Radis", "variete": "18 jours", "categorie": "Légume-racine", "cycle": "ANNUELLE"},
+    {"nom_commun": "Tomate", "variete": "Cœur de Bœuf", "categorie": "Légume-fruit", "cycle": "ANNUELLE"},
+]
+
+@pytest.fixture
+def varieties_supabase(mock_supabase):
+    from services.persistence import invalidate_varieties_cache
+    invalidate_varieties_cache()
+    ordered = mock_supabase.table.return_value.select.return_value.order.return_value
+    ordered.limit.return_value.execute.return_value = MagicMock(data=[{"updated_at": "2026-01-19T10:00:00"}], count=2)
+    ordered.execute.return_value.data = MOCK_VARIETIES
+    yield mock_supabase
+    invalidate_varieties_cache()
+
+def test_varieties_summary_is_cached(varieties_supabase):
+    service = BotaniquePersistenceService(supabase=varieties_supabase)
+
+    first = service.get_all_varieties_summary()
+    second = service.get_all_varieties_summary()
+
+    assert first == second
+    assert "- Tomate Cœur de Bœuf [Catégorie: Légume-fruit, Cycle: ANNUELLE]" in first
+    # Full catalog read only once, and never the `data` JSONB
+    ordered = varieties_supabase.table.return_value.select.return_value.order.return_value
+    ordered.execute.assert_called_once()
+    assert "data->" in varieties_supabase.table.return_value.select.call_args_list[-1].args[0]
+
+def test_varieties_summary_retrieval_mode(varieties_supabase, monkeypatch):
+    from core.config import settings
+    monkeypatch.setattr(settings, "VARIETIES_CONTEXT_MAX_ROWS", 1)
+    service = BotaniquePersistenceService(supabase=varieties_supabase)
+
+    summary = service.get_all_varieties_summary("J'ai planté des tomates coeur de boeuf")
+
+    assert "Tomate" in summary
+    assert "Radis" not in summary
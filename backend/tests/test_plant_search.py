@@ -0,0 +1,105 @@
+from unittest.mock import MagicMock, patch
+
+from services.persistence import BotaniquePersistenceService
+from services.plant_search import PlantSearchService, reciprocal_rank_fusion
+from functions.rechercher import rechercher
+
+
+def plant(id, nom, variete=None, similarity=0.5):
+    return {"id": id, "nom_commun": nom, "variete": variete, "espece": None, "similarity": similarity}
+
+
+def supabase_with(trgm_rows):
+    supabase = MagicMock()
+    supabase.rpc.return_value.execute.return_value = MagicMock(data=trgm_rows)
+    return supabase
+
+
+def test_rrf_rewards_items_ranked_well_in_both_lists():
+    lexical = [{"id": "a"}, {"id": "b", "lexical_similarity": 0.6}]
+    semantic = [{"id": "c"}, {"id": "b", "vector_similarity": 0.8}]
+
+    fused = reciprocal_rank_fusion([lexical, semantic])
+
+    assert [row["id"] for row in fused] == ["b", "a", "c"]
+    assert fused[0] == {"id": "b", "lexical_similarity": 0.6, "vector_similarity": 0.8, "score": round(2 / 62, 6)}
+
+
+def test_lexical_search_uses_trigram_rpc_without_embedding():
+    supabase = supabase_with([plant("1", "Tomate", "Marmande", 0.71), plant("2", "Tomate", "Coeur de Boeuf", 0.4)])
+
+    with patch("services.plant_search.get_gemini_client") as gemini:
+        rows = PlantSearchService(supabase, hybrid=False).search("tomatte marmande", limit=1)
+
+    gemini.assert_not_called()
+    assert supabase.rpc.call_args.args[0] == "search_plants_trgm"
+    assert supabase.rpc.call_args.args[1]["query"] == "tomatte marmande"
+    assert rows == [{"id": "1", "nom_commun": "Tomate", "variete": "Marmande", "espece": None,
+                     "lexical_similarity": 0.71, "score": 0.71}]
+
+
+def test_hybrid_search_fuses_semantic_ranking():
+    supabase = supabase_with([plant("1", "Tomate", "Marmande")])
+    with patch("services.plant_search.get_gemini_client") as gemini, \
+         patch.object(BotaniquePersistenceService, "find_similar_plants_vector",
+                      return_value=[plant("2", "Tomate", "Coeur de Boeuf", 0.9), plant("1", "Tomate", "Marmande", 0.8)]):
+        gemini.return_value.embed_content_sync.return_value = [0.1] * 768
+        rows = PlantSearchService(supabase, hybrid=True).search("tomate")
+
+    assert [row["id"] for row in rows] == ["1", "2"]
+    assert rows[0]["lexical_similarity"] == 0.5 and rows[0]["vector_similarity"] == 0.8
+
+
+def test_best_match_rejects_distant_semantic_neighbours():
+    service = PlantSearchService(supabase_with([]), hybrid=True)
+    with patch.object(service, "semantic", return_value=[{"id": "9", "nom_commun": "Poivron", "vector_similarity": 0.7}]):
+        assert service.best_match("tomate") is None
+    with patch.object(service, "semantic", return_value=[{"id": "1", "nom_commun": "Tomate", "vector_similarity": 0.93}]):
+        assert service.best_match("tomates")["id"] == "1"
+
+
+def test_find_best_match_delegates_to_plant_search():
+    supabase = supabase_with([plant("1", "Carotte", "Nantaise", 0.62)])
+    service = BotaniquePersistenceService()
+    service.supabase = supabase
+
+    with patch("services.plant_search.settings.PLANT_SEARCH_HYBRID", False):
+        match = service.find_best_match("carottes nantaises")
+
+    assert match["id"] == "1"
+    assert supabase.rpc.call_args.args[0] == "search_plants_trgm"
+
+
+def test_search_garden_is_one_rpc_when_plants_are_looked_up_server_side():
+    supabase = MagicMock()
+    supabase.rpc.return_value.execute.return_value = MagicMock(data={
+        "plants": [plant("1", "Tomate", "Marmande", 0.8)],
+        "subjects": [{"id": "s1", "tracking_id": "2026-SUJ-1", "nom": "Tomate Marmande", "variete_id": "1"}]
+    })
+
+    with patch("services.plant_search.get_catalog_index", return_value=None), \
+         patch("services.plant_search.settings.PLANT_SEARCH_HYBRID", False), \
+         patch("functions.rechercher.get_supabase_client", return_value=supabase):
+        result = rechercher("tomates marmande")
+
+    supabase.rpc.assert_called_once()
+    supabase.table.assert_not_called()
+    name, params = supabase.rpc.call_args.args
+    assert name == "search_garden" and params["plant_ids"] is None
+    assert result["plants_catalog"][0]["score"] == 0.8
+    assert result["count_subjects"] == 1
+
+
+def test_search_garden_passes_locally_resolved_plant_ids():
+    supabase = MagicMock()
+    supabase.rpc.return_value.execute.return_value = MagicMock(data={"plants": [], "subjects": [{"id": "s1"}]})
+    index = MagicMock()
+    index.search.return_value = [plant("1", "Tomate", "Marmande", 0.9)]
+
+    with patch("services.plant_search.get_catalog_index", return_value=index):
+        result = PlantSearchService(supabase, hybrid=False).search_garden("tomate marmande")
+
+    assert supabase.rpc.call_count == 1
+    name, params = supabase.rpc.call_args.args
+    assert name == "search_garden" and params["plant_ids"] == ["1"]
+    assert result["plants"][0]["lexical_similarity"] == 0.9 and result["subjects"] == [{"id": "s1"}]
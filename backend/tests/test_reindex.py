@@ -0,0 +1,130 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.embedding_cache import embedding_key
+from services.reindex import ReindexPipeline, TARGETS
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db, self.table, self.after, self.page = db, table, None, None
+
+    def select(self, columns):
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, n):
+        self.page = n
+        return self
+
+    def gt(self, column, value):
+        self.after = value
+        return self
+
+    def execute(self):
+        if self.db.fail_after_id is not None and self.after == self.db.fail_after_id:
+            raise ConnectionError("PostgREST unavailable")
+        rows = sorted(self.db.rows.values(), key=lambda r: r["id"])
+        rows = [dict(r) for r in rows if self.after is None or r["id"] > self.after]
+        return MagicMock(data=rows[:self.page])
+
+
+class FakeSupabase:
+    """In-memory fiches_botanique with the bulk update RPC."""
+
+    def __init__(self, names):
+        self.rows = {f"id{i:03d}": {"id": f"id{i:03d}", "nom": nom, "embedding_nom_source_hash": None}
+                     for i, nom in enumerate(names)}
+        self.fail_after_id = None
+        self.rpc_calls = 0
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        assert name == "bulk_update_fiches_embeddings"
+        self.rpc_calls += 1
+        for row in params["rows"]:
+            self.rows[row["id"]]["embedding_nom_source_hash"] = row["source_hash"]
+            self.rows[row["id"]]["embedding_nom"] = row["embedding"]
+        return MagicMock(execute=MagicMock(return_value=MagicMock(data=len(params["rows"]))))
+
+
+class FakeGemini:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []
+        self.in_flight = self.max_in_flight = 0
+
+    def embedding_source_hash(self, text, task_type="SEMANTIC_SIMILARITY"):
+        return embedding_key("text-embedding-004", task_type, text)
+
+    async def embed_contents(self, texts, task_type="SEMANTIC_SIMILARITY"):
+        self.calls.append(list(texts))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.latency)
+        self.in_flight -= 1
+        return [[float(len(t))] for t in texts]
+
+
+def pipeline(supabase, gemini, tmp_path, **kwargs):
+    options = dict(batch_size=10, concurrency=3, rate_per_minute=0, page_size=50,
+                   checkpoint_path=str(tmp_path / "checkpoint.json"))
+    options.update(kwargs)
+    return ReindexPipeline(TARGETS["fiches_botanique"], supabase=supabase, gemini=gemini, **options)
+
+
+@pytest.mark.asyncio
+async def test_only_missing_or_stale_rows_are_embedded(tmp_path):
+    supabase = FakeSupabase([f"Plante {i}" for i in range(120)])
+    gemini = FakeGemini(latency=0.01)
+
+    report = await pipeline(supabase, gemini, tmp_path).run()
+    assert (report["scanned"], report["written"], report["errors"]) == (120, 120, 0)
+    # Multi-text batches written with one RPC each, bounded concurrency
+    assert len(gemini.calls) == supabase.rpc_calls == 12
+    assert max(len(c) for c in gemini.calls) == 10
+    assert gemini.max_in_flight == 3
+
+    # Up to date: nothing to do. Renamed row: only that one.
+    supabase.rows["id007"]["nom"] = "Tomate Cerise"
+    gemini.calls.clear()
+    report = await pipeline(supabase, gemini, tmp_path).run()
+    assert report["written"] == 1
+    assert gemini.calls == [["Tomate Cerise"]]
+
+    report = await pipeline(supabase, gemini, tmp_path, force=True).run()
+    assert report["written"] == 120
+
+
+@pytest.mark.asyncio
+async def test_resumes_from_checkpoint_after_crash(tmp_path):
+    supabase = FakeSupabase([f"Plante {i}" for i in range(120)])
+    gemini = FakeGemini()
+
+    # Crash while fetching the third page
+    supabase.fail_after_id = "id099"
+    with pytest.raises(ConnectionError):
+        await pipeline(supabase, gemini, tmp_path).run()
+    assert sum(len(c) for c in gemini.calls) == 100
+
+    supabase.fail_after_id = None
+    scanned_before = []
+    original_table = supabase.table
+    def spying_table(name):
+        query = original_table(name)
+        scanned_before.append(query)
+        return query
+    supabase.table = spying_table
+
+    report = await pipeline(supabase, gemini, tmp_path).run()
+    assert scanned_before[0].after == "id099"
+    assert (report["scanned"], report["written"]) == (20, 20)
+    assert all(r["embedding_nom_source_hash"] for r in supabase.rows.values())
+    # Completed run clears the checkpoint
+    assert not (tmp_path / "checkpoint.json").read_text().strip("{} \n")
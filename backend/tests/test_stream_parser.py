@@ -0,0 +1,122 @@
+import random
+
+import pytest
+
+from agents.stream_parser import StreamParser, parse_tool_call
+
+TOOL_RESPONSE = (
+    "```json\nPENSÉE : Je vérifie si la tomate existe.\n"
+    '{\n  "tool": "search_garden",\n  "args": {"query": "tomate {cerise}", "note": "l\'abri \\"nord\\""}\n}\n```'
+)
+
+RESPONSES = [
+    "PENSÉE : L'utilisateur veut planter.\nRÉPONSE : C'est noté, 3 pieds de tomate.",
+    "PENSÉE : Rien à faire.\n\nBonjour ! Que puis-je faire ?",
+    "pensée : je réfléchis\n**Réponse** : Voilà.",
+    "  RÉPONSE : Les radis se sèment en mars.",
+    "Les carottes aiment les sols légers et profonds.",
+    "Oui.",
+    "PENSÉE : réponse partielle RÉPONSE sans deux-points puis Réponse # : fin.",
+    TOOL_RESPONSE,
+    "Je note ça. " + TOOL_RESPONSE,
+    "PENSÉE : outil brut\n{'tool': 'log_event', 'args': {'type': 'Semis', 'notes': \"l'été\"}}",
+    "PENSÉE : pas d'outil {ici} ni {là\n\nRÉPONSE : rien",
+    # Unbalanced brace / apostrophe in braces in the prose before the fenced block
+    'PENSÉE : je cherche {tomate\n```json\n{"tool": "search_garden", "args": {"query": "tomate"}}\n```',
+    'PENSÉE : je regarde {l\'arbre}, puis\n```json\n{"tool": "search_garden", "args": {"query": "arbre"}}\n```',
+]
+
+
+def run(parser: StreamParser, chunks):
+    events = []
+    for chunk in chunks:
+        events += parser.feed(chunk)
+    events += parser.finish()
+    return merge(events)
+
+
+def merge(events):
+    merged = []
+    for event_type, text in events:
+        assert text
+        if merged and merged[-1][0] == event_type:
+            merged[-1] = (event_type, merged[-1][1] + text)
+        else:
+            merged.append((event_type, text))
+    return merged
+
+
+def random_chunks(text, rng):
+    cuts = sorted(rng.sample(range(1, len(text)), min(len(text) - 1, rng.randint(1, 12))))
+    return [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+
+
+def test_thought_then_message():
+    assert run(StreamParser(), [RESPONSES[0]]) == [
+        ("thought_token", "PENSÉE : L'utilisateur veut planter.\nRÉPONSE :"),
+        ("message_token", " C'est noté, 3 pieds de tomate."),
+    ]
+    assert run(StreamParser(), [RESPONSES[1]]) == [
+        ("thought_token", "PENSÉE : Rien à faire."),
+        ("message_token", "Bonjour ! Que puis-je faire ?"),
+    ]
+
+
+def test_short_plain_reply_is_flushed_at_end():
+    assert run(StreamParser(), ["Ou", "i."]) == [("message_token", "Oui.")]
+
+
+def test_tool_block_is_hidden_and_extracted():
+    parser = StreamParser()
+    assert run(parser, ["Je note ça. ", TOOL_RESPONSE]) == [("message_token", "Je note ça. ")]
+    assert parser.tool_call == {
+        "tool": "search_garden",
+        "args": {"query": "tomate {cerise}", "note": 'l\'abri "nord"'},
+    }
+    assert parser.text == "Je note ça. " + TOOL_RESPONSE
+
+
+def test_tool_call_is_available_as_soon_as_the_object_closes():
+    parser = StreamParser()
+    closing = TOOL_RESPONSE.rindex("}") + 1
+    parser.feed(TOOL_RESPONSE[:closing - 1])
+    assert parser.tool_call is None
+    parser.feed(TOOL_RESPONSE[closing - 1:closing])
+    assert parser.tool_call["tool"] == "search_garden"
+
+
+def test_parse_tool_call_variants():
+    assert parse_tool_call(RESPONSES[9]) == {"tool": "log_event", "args": {"type": "Semis", "notes": "l'été"}}
+    assert parse_tool_call('{"tool": "list_my_subjects", "args": {}}') == {"tool": "list_my_subjects", "args": {}}
+    assert parse_tool_call(RESPONSES[10]) is None
+    assert parse_tool_call('{"tool": "x", "args": {') is None
+    # A nested "tool" key is not a tool call
+    assert parse_tool_call('{"args": {"tool": 1}}') is None
+    assert parse_tool_call('{"tool": "log_event", "args": {"tool": 1}}') == {"tool": "log_event", "args": {"tool": 1}}
+    # Braces and quotes of the prose do not leak into the fenced block
+    assert parse_tool_call(RESPONSES[11]) == {"tool": "search_garden", "args": {"query": "tomate"}}
+    assert parse_tool_call(RESPONSES[12]) == {"tool": "search_garden", "args": {"query": "arbre"}}
+
+
+@pytest.mark.parametrize("response", RESPONSES)
+def test_any_two_way_split_routes_like_a_single_chunk(response):
+    expected_parser = StreamParser()
+    expected = run(expected_parser, [response])
+    for i in range(1, len(response)):
+        parser = StreamParser()
+        assert run(parser, [response[:i], response[i:]]) == expected, i
+        assert parser.tool_call == expected_parser.tool_call, i
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_chunking_routes_like_a_single_chunk(seed):
+    rng = random.Random(seed)
+    for response in RESPONSES:
+        expected_parser = StreamParser()
+        expected = run(expected_parser, [response])
+        for _ in range(20):
+            chunks = random_chunks(response, rng)
+            parser = StreamParser()
+            assert run(parser, chunks) == expected, chunks
+            assert parser.tool_call == expected_parser.tool_call, chunks
+            assert parser.text == response
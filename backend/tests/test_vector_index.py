@@ -0,0 +1,167 @@
+from unittest.mock import MagicMock, patch
+
+import uuid
+
+import numpy as np
+import pytest
+
+from services.fiche_service import FicheService
+from services.table_sync import SyncedIndexes
+from services.vector_index import VectorIndex, VectorIndexSync
+
+DIM = 16
+
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(42)
+    return rng.normal(size=(200, DIM)).astype(np.float32)
+
+
+def build_index(vectors, directory=""):
+    index = VectorIndex("test", dim=DIM, directory=directory)
+    index.upsert_many((f"id{i}", v, {"nom": f"Plante {i}"}) for i, v in enumerate(vectors))
+    return index
+
+
+def brute_force(vectors, query, k):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    return [f"id{i}" for i in np.argsort(-scores)[:k]]
+
+
+def test_top_k_matches_brute_force(vectors):
+    index = build_index(vectors)
+    query = vectors[3] + 0.1
+    hits = index.search(query, k=10)
+
+    assert [h[0] for h in hits] == brute_force(vectors, query, 10)
+    assert hits[0][2] == {"nom": "Plante 3"}
+    assert all(a[1] >= b[1] for a, b in zip(hits, hits[1:]))
+    # Threshold keeps strictly greater similarities only
+    assert all(h[1] > 0.5 for h in index.search(query, k=200, threshold=0.5))
+
+
+def test_batch_equals_single_queries(vectors):
+    index = build_index(vectors)
+    queries = vectors[:5] * 2 + 0.3
+    batched = index.search_batch(queries, k=7)
+    for hits, query in zip(batched, queries):
+        single = index.search(query, k=7)
+        assert [h[0] for h in hits] == [h[0] for h in single]
+        assert [h[1] for h in hits] == pytest.approx([h[1] for h in single], abs=1e-5)
+
+
+def test_upsert_replace_and_remove(vectors):
+    index = build_index(vectors)
+    index.upsert("id5", "[" + ",".join(str(x) for x in vectors[9]) + "]", {"nom": "Renommée"})
+    assert len(index) == 200
+    assert index.search(vectors[9], k=2)[1][0] in ("id5", "id9")
+
+    index.remove("id0")
+    index.retain(f"id{i}" for i in range(1, 100))
+    assert len(index) == 99
+    assert "id150" not in index
+    assert [h[0] for h in index.search(vectors[42], k=1)] == ["id42"]
+
+
+def test_save_and_memory_mapped_load(vectors, tmp_path):
+    index = build_index(vectors, directory=str(tmp_path))
+    index.synced_at = "2026-01-19T10:00:00+00:00"
+    index.save()
+
+    loaded = VectorIndex("test", dim=DIM, directory=str(tmp_path))
+    assert loaded.load()
+    assert isinstance(loaded._matrix, np.memmap)
+    assert loaded.synced_at == index.synced_at
+    assert not loaded.ready
+    assert loaded.search(vectors[7], k=5) == index.search(vectors[7], k=5)
+
+    # Copy-on-write: updating a mapped index doesn't touch the file until save()
+    loaded.upsert("id7", vectors[8], {})
+    loaded.upsert("new", vectors[0], {})
+    reloaded = VectorIndex("test", dim=DIM, directory=str(tmp_path))
+    reloaded.load()
+    assert len(reloaded) == 200
+    assert reloaded.search(vectors[7], k=1)[0][0] == "id7"
+
+
+@pytest.mark.asyncio
+async def test_summary_search_served_by_local_index(vectors):
+    ids = [str(uuid.uuid4()) for _ in vectors]
+    index = VectorIndex("test", dim=DIM, directory="")
+    index.upsert_many(
+        (id, v, {"nom": f"Plante {i}", "variete": None, "espece": None, "created_at": None, "updated_at": None})
+        for i, (id, v) in enumerate(zip(ids, vectors))
+    )
+    supabase = MagicMock()
+    service = FicheService(supabase=supabase)
+
+    with patch("services.fiche_service.get_vector_index", return_value=index), \
+         patch.object(service.gemini, "embed_content", return_value=vectors[12].tolist()):
+        results = await service.search_vector_summary("Plante 12")
+
+    assert results[0].nom == "Plante 12"
+    assert str(results[0].id) == ids[12]
+    assert results[0].similarity == pytest.approx(1.0, abs=1e-5)
+    supabase.rpc.assert_not_called()
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_quantized_index_reranks_to_exact_results(vectors, precision):
+    index = VectorIndex("test", dim=DIM, directory="", precision=precision, rerank=4)
+    index.upsert_many((f"id{i}", v, {}) for i, v in enumerate(vectors))
+    query = vectors[3] + 0.1
+
+    hits = index.search(query, k=10)
+
+    assert [h[0] for h in hits] == brute_force(vectors, query, 10)
+    exact = build_index(vectors).search(query, k=10)
+    assert [h[1] for h in hits] == pytest.approx([h[1] for h in exact], abs=1e-6)
+    assert index.memory_per_vector() < DIM * 4
+
+
+def test_quantized_save_keeps_exact_rows_on_disk_only(vectors, tmp_path):
+    index = VectorIndex("test", dim=DIM, directory=str(tmp_path), precision="int8", rerank=4)
+    index.upsert_many((f"id{i}", v, {}) for i, v in enumerate(vectors))
+    index.remove("id0")
+    index.save()
+    assert index._exact == {} and isinstance(index._exact_file, np.memmap)
+
+    loaded = VectorIndex("test", dim=DIM, directory=str(tmp_path), precision="int8", rerank=4)
+    assert loaded.load()
+    assert loaded._matrix.dtype == np.int8 and len(loaded) == 199
+    assert loaded.search(vectors[7], k=5) == index.search(vectors[7], k=5)
+
+    # Updates after load are re-ranked from memory until the next save
+    loaded.upsert("id7", vectors[8], {})
+    assert [h[0] for h in loaded.search(vectors[8], k=2)] in (["id7", "id8"], ["id8", "id7"])
+    assert loaded.search(vectors[8], k=1)[0][1] == pytest.approx(1.0, abs=1e-6)
+
+
+@pytest.mark.asyncio
+async def test_sync_skips_rows_without_vector_and_saves_on_stop(vectors, tmp_path):
+    supabase = MagicMock()
+    pages = supabase.table.return_value.select.return_value.order.return_value.order.return_value.range.return_value
+    pages.execute.return_value = MagicMock(data=[
+        {"id": "a", "nom": "Tomate", "updated_at": "2026-01-19T10:00:00", "embedding": vectors[0].tolist()},
+        {"id": "b", "nom": "Radis", "updated_at": "2026-01-19T10:00:05", "embedding": None},
+    ])
+    counted = supabase.table.return_value.select.return_value.not_.is_.return_value
+    counted.limit.return_value.execute.return_value = MagicMock(count=1)
+    sync = VectorIndexSync(VectorIndex("test", dim=DIM, directory=str(tmp_path)), "botanique_plantes", "embedding",
+                           "id, nom, updated_at", supabase=supabase)
+
+    assert sync.refresh() == 1
+    # Rows without a vector neither enter the index nor move synced_at; counts exclude them too
+    assert "a" in sync.index and "b" not in sync.index
+    assert sync.index.synced_at == "2026-01-19T10:00:00"
+    supabase.table.return_value.select.return_value.not_.is_.assert_called_with("embedding", "null")
+    assert not sync.index.dirty
+
+    registry = SyncedIndexes("Vector index", ["test"], lambda name: sync, enabled=lambda: True, interval=lambda: 3600)
+    assert registry.get_index("test") is sync.index
+    registry.start()
+    sync.index.upsert("c", vectors[1])
+    await registry.stop()
+    assert not sync.index.dirty and VectorIndex("test", dim=DIM, directory=str(tmp_path)).load()
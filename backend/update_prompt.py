@@ -44,3 +44,4 @@ Si tu oublies "RÉPONSE :", le message ne s'affichera pas correctement.
 client = get_supabase_client()
 res = client.table('agent_configurations').update({"system_prompt": NEW_PROMPT}).eq("agent_key", "culture_v1").execute()
 print("Updated prompt for culture_v1 to v1.6 (Response Marker)")
+print("Running backend picks it up within PROMPT_CACHE_TTL, or immediately via POST /admin/cache/prompts/invalidate?agent_key=culture_v1")
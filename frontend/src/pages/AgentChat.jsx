@@ -1,6 +1,7 @@
 import { useState, useEffect, useRef } from "react";
 import { Send, Trash2, Bot } from "lucide-react";
 import AgentDebugPanel from "../components/AgentDebugPanel";
+import { generateUUID, postChatMessage } from "../services/chat";
 
 export default function AgentChat() {
     // Chat History (Clean, for Left Panel)
@@ -11,6 +12,11 @@ export default function AgentChat() {
         } catch (e) { return []; }
     });
 
+    // Session ID (server-side history key)
+    const [sessionId, setSessionId] = useState(() => {
+        return localStorage.getItem("culture_session_id") || generateUUID();
+    });
+
     // Debug Logs (Raw, for Right Panel)
     const [logs, setLogs] = useState([]);
 
@@ -19,10 +25,11 @@ export default function AgentChat() {
     const messagesEndRef = useRef(null);
     const chatContainerRef = useRef(null);
 
-    // Save Chat to localStorage
+    // Save Chat & Session to localStorage
     useEffect(() => {
         localStorage.setItem("chat_history_v2", JSON.stringify(messages));
-    }, [messages]);
+        localStorage.setItem("culture_session_id", sessionId);
+    }, [messages, sessionId]);
 
     const scrollToBottom = () => {
         messagesEndRef.current?.scrollIntoView({ behavior: "smooth" });
@@ -52,17 +59,9 @@ export default function AgentChat() {
         ]);
 
         try {
-            const historyPayload = messages.map(m => ({ role: m.role, content: m.content }));
+            // History is kept server-side per X-Conversation-ID: only the new message is sent
             const apiUrl = `http://${window.location.hostname}:8000/agents/culture/chat`;
-
-            const response = await fetch(apiUrl, {
-                method: "POST",
-                headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({
-                    query: userMessage.content,
-                    history: historyPayload
-                }),
-            });
+            const response = await postChatMessage(apiUrl, sessionId, { query: userMessage.content }, messages);
 
             if (!response.ok) throw new Error(response.statusText);
 
@@ -141,6 +140,7 @@ export default function AgentChat() {
         if (confirm("Effacer tout l'historique ?")) {
             setMessages([]);
             setLogs([]);
+            setSessionId(generateUUID());
             localStorage.removeItem("chat_history_v2");
         }
     };
@@ -4,19 +4,9 @@ import { Send, Trash2, Bot, Cpu } from "lucide-react";
 // import remarkGfm from 'remark-gfm';
 import AgentDebugPanel from "../components/AgentDebugPanel";
 import ConfirmationModal from "../components/ConfirmationModal";
+import { generateUUID, postChatMessage } from "../services/chat";
 
 export default function BastouilleChef() {
-    // Safe UUID Generator
-    const generateUUID = () => {
-        if (window.crypto && window.crypto.randomUUID) {
-            return crypto.randomUUID();
-        }
-        return 'xxxxxxxx-xxxx-4xxx-yxxx-xxxxxxxxxxxx'.replace(/[xy]/g, function (c) {
-            var r = Math.random() * 16 | 0, v = c == 'x' ? r : (r & 0x3 | 0x8);
-            return v.toString(16);
-        });
-    };
-
     // Chat History
     const [messages, setMessages] = useState(() => {
         try {
@@ -81,25 +71,8 @@ export default function BastouilleChef() {
         try {
             const apiUrl = `http://${window.location.hostname}:8000/bastouille/chat`;
 
-            // Prepare history (Assistants mapped to 'model' handled by backend default)
-            const history = messages
-                .filter(m => !m.content.includes("⚠️ Erreur")) // Filter errors
-                .map(m => ({
-                    role: m.role,
-                    content: m.content
-                }));
-
-            const response = await fetch(apiUrl, {
-                method: "POST",
-                headers: {
-                    "Content-Type": "application/json",
-                    "X-Conversation-ID": sessionId
-                },
-                body: JSON.stringify({
-                    message: userMessage.content,
-                    history: history
-                }),
-            });
+            // History is kept server-side per X-Conversation-ID: only the new message is sent
+            const response = await postChatMessage(apiUrl, sessionId, { message: userMessage.content }, messages);
 
             if (!response.ok) throw new Error(response.statusText);
 
@@ -0,0 +1,40 @@
+/**
+ * Shared helpers of the streaming chat pages (Baštouille, Chef de Culture)
+ */
+
+// Safe UUID Generator (crypto.randomUUID is missing on plain HTTP)
+export const generateUUID = () => {
+    if (window.crypto && window.crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return 'xxxxxxxx-xxxx-4xxx-yxxx-xxxxxxxxxxxx'.replace(/[xy]/g, function (c) {
+        var r = Math.random() * 16 | 0, v = c == 'x' ? r : (r & 0x3 | 0x8);
+        return v.toString(16);
+    });
+};
+
+/**
+ * Conversation as sent to the server: text messages only, error bubbles left out
+ */
+export const chatHistory = (messages) => messages
+    .filter(m => m.content && !m.content.includes("⚠️ Erreur")) // Filter errors
+    .map(({ role, content }) => ({ role, content }));
+
+/**
+ * POSTs a chat message. The history is kept server-side per X-Conversation-ID, so only
+ * the new message is sent ([] for a new chat). On a 409 the server lost it (restart,
+ * expiry, new session ID...): the request is resent with the local history.
+ */
+export const postChatMessage = async (apiUrl, conversationId, payload, messages) => {
+    const localHistory = chatHistory(messages);
+    const send = (history) => fetch(apiUrl, {
+        method: "POST",
+        headers: {
+            "Content-Type": "application/json",
+            "X-Conversation-ID": conversationId
+        },
+        body: JSON.stringify({ ...payload, history }),
+    });
+    const response = await send(localHistory.length ? undefined : []);
+    return response.status === 409 ? send(localHistory) : response;
+};
@@ -0,0 +1,13 @@
+-- Track modifications on botanique_plantes.
+-- Used as a cheap catalog version (count + max(updated_at)) by the varieties summary cache.
+ALTER TABLE botanique_plantes
+ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW() NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_botanique_plantes_updated_at ON botanique_plantes(updated_at DESC);
+
+-- Reuses update_updated_at_column() (see create_fiches_botanique)
+DROP TRIGGER IF EXISTS update_botanique_plantes_modtime ON botanique_plantes;
+CREATE TRIGGER update_botanique_plantes_modtime
+    BEFORE UPDATE ON botanique_plantes
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
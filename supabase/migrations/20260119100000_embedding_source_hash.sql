@@ -0,0 +1,48 @@
+-- Re-embedding pipeline (backend/services/reindex.py)
+-- Each vector column gets the hash of the (model, task, text) it was computed from:
+-- a row is re-embedded only when the hash is missing or differs from the current one.
+
+-- botanique_plantes.embedding was first added from the SQL editor, make it explicit
+CREATE EXTENSION IF NOT EXISTS vector;
+ALTER TABLE botanique_plantes ADD COLUMN IF NOT EXISTS embedding VECTOR(768);
+
+ALTER TABLE botanique_plantes ADD COLUMN IF NOT EXISTS embedding_source_hash TEXT;
+ALTER TABLE fiches_botanique ADD COLUMN IF NOT EXISTS embedding_nom_source_hash TEXT;
+
+-- Bulk vector updates: one statement per batch instead of one UPDATE per row
+-- rows: [{"id": "...", "embedding": [0.1, ...], "source_hash": "..."}, ...]
+CREATE OR REPLACE FUNCTION bulk_update_botanique_embeddings(rows JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  updated_count INTEGER;
+BEGIN
+  UPDATE botanique_plantes AS p
+  SET embedding = r.embedding::vector,
+      embedding_source_hash = r.source_hash
+  FROM jsonb_to_recordset(rows) AS r(id UUID, embedding TEXT, source_hash TEXT)
+  WHERE p.id = r.id;
+
+  GET DIAGNOSTICS updated_count = ROW_COUNT;
+  RETURN updated_count;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION bulk_update_fiches_embeddings(rows JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  updated_count INTEGER;
+BEGIN
+  UPDATE fiches_botanique AS f
+  SET embedding_nom = r.embedding::vector,
+      embedding_nom_source_hash = r.source_hash
+  FROM jsonb_to_recordset(rows) AS r(id UUID, embedding TEXT, source_hash TEXT)
+  WHERE f.id = r.id;
+
+  GET DIAGNOSTICS updated_count = ROW_COUNT;
+  RETURN updated_count;
+END;
+$$;
@@ -0,0 +1,106 @@
+-- Index-friendly similarity search RPCs.
+--
+-- The previous match_fiches / match_botanique filtered on `1 - (embedding <=> q) > threshold`
+-- and ordered by the similarity alias: the planner can't use an ANN index for that shape,
+-- so every search was a sequential scan. The rewritten functions:
+--   1. order by the distance operator with LIMIT (index scan),
+--   2. apply the similarity threshold on those candidates afterwards.
+-- Optional `probes` (ivfflat) / `ef_search` (hnsw) tune recall vs latency per call.
+--
+-- Index: HNSW instead of ivfflat (lists = 100 regardless of table size gave poor recall on
+-- small tables and needs a rebuild as the catalog grows; HNSW needs no training step).
+-- For very large catalogs ivfflat stays an option: lists ~ rows / 1000, probes ~ sqrt(lists).
+-- Compare configurations with backend/scripts/bench_vector_rpc.py.
+
+DROP INDEX IF EXISTS fiches_botanique_embedding_idx;
+CREATE INDEX IF NOT EXISTS fiches_botanique_embedding_hnsw_idx
+    ON fiches_botanique USING hnsw (embedding_nom vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+DROP INDEX IF EXISTS botanique_plantes_embedding_idx;
+CREATE INDEX IF NOT EXISTS botanique_plantes_embedding_hnsw_idx
+    ON botanique_plantes USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+-- Signatures change (new optional parameters): drop the old overloads first
+DROP FUNCTION IF EXISTS match_fiches(vector, float, int);
+DROP FUNCTION IF EXISTS match_botanique(vector, float, int);
+
+CREATE OR REPLACE FUNCTION match_fiches (
+  query_embedding vector(768),
+  match_threshold float,
+  match_count int,
+  probes int DEFAULT NULL,
+  ef_search int DEFAULT NULL
+)
+RETURNS TABLE (
+  id UUID,
+  data JSONB,
+  variete TEXT,
+  espece TEXT,
+  nom TEXT,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ,
+  similarity FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  -- Transaction-local settings (each PostgREST call runs in its own transaction)
+  IF probes IS NOT NULL THEN
+    PERFORM set_config('ivfflat.probes', probes::text, true);
+  END IF;
+  -- An HNSW scan returns at most ef_search rows: never ask for fewer than match_count (max 1000)
+  PERFORM set_config('hnsw.ef_search', GREATEST(COALESCE(ef_search, 40), LEAST(match_count, 1000))::text, true);
+
+  RETURN QUERY
+  SELECT c.id, c.data, c.variete, c.espece, c.nom, c.created_at, c.updated_at, c.similarity
+  FROM (
+    SELECT
+      f.id, f.data, f.variete, f.espece, f.nom, f.created_at, f.updated_at,
+      1 - (f.embedding_nom <=> query_embedding) AS similarity
+    FROM fiches_botanique AS f
+    WHERE f.embedding_nom IS NOT NULL
+    ORDER BY f.embedding_nom <=> query_embedding
+    LIMIT match_count
+  ) AS c
+  WHERE c.similarity > match_threshold
+  ORDER BY c.similarity DESC;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION match_botanique (
+  query_embedding vector(768),
+  match_threshold float,
+  match_count int,
+  probes int DEFAULT NULL,
+  ef_search int DEFAULT NULL
+)
+RETURNS TABLE (
+  id UUID,
+  nom_commun TEXT,
+  variete TEXT,
+  espece TEXT,
+  similarity FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF probes IS NOT NULL THEN
+    PERFORM set_config('ivfflat.probes', probes::text, true);
+  END IF;
+  PERFORM set_config('hnsw.ef_search', GREATEST(COALESCE(ef_search, 40), LEAST(match_count, 1000))::text, true);
+
+  RETURN QUERY
+  SELECT c.id, c.nom_commun, c.variete, c.espece, c.similarity
+  FROM (
+    SELECT
+      p.id, p.nom_commun, p.variete, p.espece,
+      1 - (p.embedding <=> query_embedding) AS similarity
+    FROM botanique_plantes AS p
+    WHERE p.embedding IS NOT NULL
+    ORDER BY p.embedding <=> query_embedding
+    LIMIT match_count
+  ) AS c
+  WHERE c.similarity > match_threshold
+  ORDER BY c.similarity DESC;
+END;
+$$;
@@ -0,0 +1,42 @@
+-- Summary projection of match_fiches: same search, without the `data` JSONB payload.
+-- Used by list/summary endpoints (FicheService.search_vector_summary), which only need
+-- id, names, dates and similarity for up to 1000 rows.
+CREATE OR REPLACE FUNCTION match_fiches_summary (
+  query_embedding vector(768),
+  match_threshold float,
+  match_count int,
+  probes int DEFAULT NULL,
+  ef_search int DEFAULT NULL
+)
+RETURNS TABLE (
+  id UUID,
+  nom TEXT,
+  variete TEXT,
+  espece TEXT,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ,
+  similarity FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF probes IS NOT NULL THEN
+    PERFORM set_config('ivfflat.probes', probes::text, true);
+  END IF;
+  PERFORM set_config('hnsw.ef_search', GREATEST(COALESCE(ef_search, 40), LEAST(match_count, 1000))::text, true);
+
+  RETURN QUERY
+  SELECT c.id, c.nom, c.variete, c.espece, c.created_at, c.updated_at, c.similarity
+  FROM (
+    SELECT
+      f.id, f.nom, f.variete, f.espece, f.created_at, f.updated_at,
+      1 - (f.embedding_nom <=> query_embedding) AS similarity
+    FROM fiches_botanique AS f
+    WHERE f.embedding_nom IS NOT NULL
+    ORDER BY f.embedding_nom <=> query_embedding
+    LIMIT match_count
+  ) AS c
+  WHERE c.similarity > match_threshold
+  ORDER BY c.similarity DESC;
+END;
+$$;
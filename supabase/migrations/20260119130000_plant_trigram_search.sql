@@ -0,0 +1,55 @@
+-- Typo/accent/plural tolerant plant lookup (backend/services/plant_search.py)
+-- "tomates coeur de bœuf" ~ "Tomate Cœur de Boeuf"
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() is only STABLE (dictionary lookup): wrap it with a fixed dictionary and
+-- search_path so it can be used in a generated column / index expression.
+CREATE OR REPLACE FUNCTION plant_search_fold(value TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE PARALLEL SAFE
+SET search_path = public, extensions
+AS $$
+  SELECT lower(unaccent('unaccent'::regdictionary, coalesce(value, '')));
+$$;
+
+-- Accent-folded "nom variete", kept in sync by Postgres
+ALTER TABLE botanique_plantes
+ADD COLUMN IF NOT EXISTS search_text TEXT
+GENERATED ALWAYS AS (plant_search_fold(nom_commun || ' ' || coalesce(variete, ''))) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_botanique_plantes_search_text_trgm
+    ON botanique_plantes USING gin (search_text gin_trgm_ops);
+
+-- Scored candidates: word similarity of the folded query against "nom variete".
+-- The `<%` operator is served by the GIN index; min_similarity sets its threshold.
+CREATE OR REPLACE FUNCTION search_plants_trgm (
+  query TEXT,
+  match_count INT DEFAULT 20,
+  min_similarity FLOAT DEFAULT 0.3
+)
+RETURNS TABLE (
+  id UUID,
+  nom_commun TEXT,
+  variete TEXT,
+  espece TEXT,
+  similarity FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  folded TEXT := plant_search_fold(query);
+BEGIN
+  PERFORM set_config('pg_trgm.word_similarity_threshold', min_similarity::text, true);
+
+  RETURN QUERY
+  SELECT
+    p.id, p.nom_commun, p.variete, p.espece,
+    GREATEST(word_similarity(folded, p.search_text), similarity(folded, p.search_text))::float AS similarity
+  FROM botanique_plantes AS p
+  WHERE folded <% p.search_text
+  ORDER BY 5 DESC, length(p.search_text)
+  LIMIT match_count;
+END;
+$$;
@@ -0,0 +1,49 @@
+-- One round-trip garden search (backend/services/plant_search.py: rechercher, search_garden tool)
+-- Catalog matches + active subjects (linked to a matched plant or matching the query by name).
+
+-- Active subjects by plant, and name substring lookups (ILIKE '%q%' is served by trigram GIN)
+CREATE INDEX IF NOT EXISTS idx_sujets_variete_active
+    ON sujets (variete_id) WHERE stade <> 'TERMINE';
+CREATE INDEX IF NOT EXISTS idx_sujets_nom_trgm
+    ON sujets USING gin (nom gin_trgm_ops);
+
+-- plant_ids: plants already resolved by the caller (in-memory catalog index, hybrid search);
+-- when NULL, plants are looked up here with search_plants_trgm.
+CREATE OR REPLACE FUNCTION search_garden (
+  query TEXT,
+  plant_ids UUID[] DEFAULT NULL,
+  match_count INT DEFAULT 5,
+  min_similarity FLOAT DEFAULT 0.3
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  plants JSONB := '[]'::jsonb;
+  ids UUID[] := plant_ids;
+  subjects JSONB;
+BEGIN
+  IF ids IS NULL THEN
+    SELECT
+      coalesce(jsonb_agg(jsonb_build_object(
+        'id', p.id, 'nom_commun', p.nom_commun, 'variete', p.variete,
+        'espece', p.espece, 'similarity', p.similarity
+      ) ORDER BY p.rank), '[]'::jsonb),
+      coalesce(array_agg(p.id), '{}')
+    INTO plants, ids
+    FROM search_plants_trgm(query, match_count, min_similarity)
+      WITH ORDINALITY AS p(id, nom_commun, variete, espece, similarity, rank);
+  END IF;
+
+  SELECT coalesce(jsonb_agg(jsonb_build_object(
+    'id', s.id, 'tracking_id', s.tracking_id, 'nom', s.nom,
+    'stade', s.stade, 'quantite', s.quantite, 'variete_id', s.variete_id
+  ) ORDER BY s.tracking_id), '[]'::jsonb)
+  INTO subjects
+  FROM sujets AS s
+  WHERE s.stade <> 'TERMINE'
+    AND (s.variete_id = ANY(ids) OR s.nom ILIKE '%' || query || '%');
+
+  RETURN jsonb_build_object('plants', plants, 'subjects', subjects);
+END;
+$$;
@@ -0,0 +1,164 @@
+-- Half-precision ANN indexes with exact re-rank (requires pgvector >= 0.7 for halfvec).
+--
+-- Columns stay vector(768): the float32 values are the re-rank source. Only the HNSW indexes
+-- are rebuilt on the halfvec(768) cast, halving index size (and the pages a scan touches).
+-- The match_* RPCs fetch `match_count * rerank` candidates through the halfvec index, re-score
+-- them with the exact float32 distance and keep the best match_count: `rerank` trades a few
+-- extra distance computations for the recall lost to quantization (1 = no re-rank).
+-- Compare configurations with backend/scripts/bench_vector_rpc.py.
+
+DROP INDEX IF EXISTS fiches_botanique_embedding_hnsw_idx;
+CREATE INDEX IF NOT EXISTS fiches_botanique_embedding_halfvec_idx
+    ON fiches_botanique USING hnsw ((embedding_nom::halfvec(768)) halfvec_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+DROP INDEX IF EXISTS botanique_plantes_embedding_hnsw_idx;
+CREATE INDEX IF NOT EXISTS botanique_plantes_embedding_halfvec_idx
+    ON botanique_plantes USING hnsw ((embedding::halfvec(768)) halfvec_cosine_ops) WITH (m = 16, ef_construction = 64);
+
+-- Signatures change (new optional `rerank` parameter): drop the old overloads first
+DROP FUNCTION IF EXISTS match_fiches(vector, float, int, int, int);
+DROP FUNCTION IF EXISTS match_fiches_summary(vector, float, int, int, int);
+DROP FUNCTION IF EXISTS match_botanique(vector, float, int, int, int);
+
+CREATE OR REPLACE FUNCTION match_fiches (
+  query_embedding vector(768),
+  match_threshold float,
+  match_count int,
+  probes int DEFAULT NULL,
+  ef_search int DEFAULT NULL,
+  rerank int DEFAULT 4
+)
+RETURNS TABLE (
+  id UUID,
+  data JSONB,
+  variete TEXT,
+  espece TEXT,
+  nom TEXT,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ,
+  similarity FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  candidates int := match_count * GREATEST(COALESCE(rerank, 1), 1);
+BEGIN
+  IF probes IS NOT NULL THEN
+    PERFORM set_config('ivfflat.probes', probes::text, true);
+  END IF;
+  -- An HNSW scan returns at most ef_search rows: never ask for fewer than the candidates (max 1000)
+  PERFORM set_config('hnsw.ef_search', GREATEST(COALESCE(ef_search, 40), LEAST(candidates, 1000))::text, true);
+
+  RETURN QUERY
+  SELECT f.id, f.data, f.variete, f.espece, f.nom, f.created_at, f.updated_at, r.similarity
+  FROM (
+    -- Exact re-rank of the halfvec candidates (id + vector only: `data` is joined for the winners)
+    SELECT c.id, 1 - (c.embedding_nom <=> query_embedding) AS similarity
+    FROM (
+      SELECT f.id, f.embedding_nom
+      FROM fiches_botanique AS f
+      WHERE f.embedding_nom IS NOT NULL
+      ORDER BY f.embedding_nom::halfvec(768) <=> query_embedding::halfvec(768)
+      LIMIT candidates
+    ) AS c
+    ORDER BY c.embedding_nom <=> query_embedding
+    LIMIT match_count
+  ) AS r
+  JOIN fiches_botanique AS f ON f.id = r.id
+  WHERE r.similarity > match_threshold
+  ORDER BY r.similarity DESC;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION match_fiches_summary (
+  query_embedding vector(768),
+  match_threshold float,
+  match_count int,
+  probes int DEFAULT NULL,
+  ef_search int DEFAULT NULL,
+  rerank int DEFAULT 4
+)
+RETURNS TABLE (
+  id UUID,
+  nom TEXT,
+  variete TEXT,
+  espece TEXT,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ,
+  similarity FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  candidates int := match_count * GREATEST(COALESCE(rerank, 1), 1);
+BEGIN
+  IF probes IS NOT NULL THEN
+    PERFORM set_config('ivfflat.probes', probes::text, true);
+  END IF;
+  PERFORM set_config('hnsw.ef_search', GREATEST(COALESCE(ef_search, 40), LEAST(candidates, 1000))::text, true);
+
+  RETURN QUERY
+  SELECT f.id, f.nom, f.variete, f.espece, f.created_at, f.updated_at, r.similarity
+  FROM (
+    SELECT c.id, 1 - (c.embedding_nom <=> query_embedding) AS similarity
+    FROM (
+      SELECT f.id, f.embedding_nom
+      FROM fiches_botanique AS f
+      WHERE f.embedding_nom IS NOT NULL
+      ORDER BY f.embedding_nom::halfvec(768) <=> query_embedding::halfvec(768)
+      LIMIT candidates
+    ) AS c
+    ORDER BY c.embedding_nom <=> query_embedding
+    LIMIT match_count
+  ) AS r
+  JOIN fiches_botanique AS f ON f.id = r.id
+  WHERE r.similarity > match_threshold
+  ORDER BY r.similarity DESC;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION match_botanique (
+  query_embedding vector(768),
+  match_threshold float,
+  match_count int,
+  probes int DEFAULT NULL,
+  ef_search int DEFAULT NULL,
+  rerank int DEFAULT 4
+)
+RETURNS TABLE (
+  id UUID,
+  nom_commun TEXT,
+  variete TEXT,
+  espece TEXT,
+  similarity FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  candidates int := match_count * GREATEST(COALESCE(rerank, 1), 1);
+BEGIN
+  IF probes IS NOT NULL THEN
+    PERFORM set_config('ivfflat.probes', probes::text, true);
+  END IF;
+  PERFORM set_config('hnsw.ef_search', GREATEST(COALESCE(ef_search, 40), LEAST(candidates, 1000))::text, true);
+
+  RETURN QUERY
+  SELECT r.id, r.nom_commun, r.variete, r.espece, r.similarity
+  FROM (
+    SELECT
+      c.id, c.nom_commun, c.variete, c.espece,
+      1 - (c.embedding <=> query_embedding) AS similarity
+    FROM (
+      SELECT p.id, p.nom_commun, p.variete, p.espece, p.embedding
+      FROM botanique_plantes AS p
+      WHERE p.embedding IS NOT NULL
+      ORDER BY p.embedding::halfvec(768) <=> query_embedding::halfvec(768)
+      LIMIT candidates
+    ) AS c
+    ORDER BY c.embedding <=> query_embedding
+    LIMIT match_count
+  ) AS r
+  WHERE r.similarity > match_threshold
+  ORDER BY r.similarity DESC;
+END;
+$$;
@@ -0,0 +1,25 @@
+-- Server-side conversation history (backend/core/conversations.py, CONVERSATION_STORE_PERSIST).
+--
+-- One row per (agent, X-Conversation-ID): the native Gemini contents of the conversation
+-- (text, function calls and responses, base64 thought signatures) as a JSONB array.
+-- The backend keeps an in-memory LRU in front of it; the table lets histories survive
+-- restarts and be shared between workers. Rows untouched for long can be purged by updated_at.
+
+CREATE TABLE IF NOT EXISTS agent_conversations (
+    agent TEXT NOT NULL,
+    conversation_id TEXT NOT NULL,
+    contents JSONB NOT NULL DEFAULT '[]'::jsonb,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (agent, conversation_id)
+);
+
+CREATE INDEX IF NOT EXISTS agent_conversations_conversation_id_idx ON agent_conversations (conversation_id);
+CREATE INDEX IF NOT EXISTS agent_conversations_updated_at_idx ON agent_conversations (updated_at);
+
+-- Trigger for updated_at (update_updated_at_column: 20260118190000_create_fiches_botanique.sql)
+DROP TRIGGER IF EXISTS update_agent_conversations_modtime ON agent_conversations;
+CREATE TRIGGER update_agent_conversations_modtime
+    BEFORE UPDATE ON agent_conversations
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();